@@ -1,18 +1,34 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, url_for
 from flask_cors import CORS
+from werkzeug.wsgi import wrap_file
 import requests
 import os
 import json
-import re
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle, Image
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from datetime import datetime
-import io
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import atexit
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from mistral_client import MistralClientPool, MistralReply, async_mistral_client, current_async_client, httpx, iter_stream_deltas
+from llm_cache import create_llm_cache, make_cache_key
+from objective_cache import ObjectiveCache
+from singleflight import SingleFlight, SqliteLease
+from jobs import JobRunner, JobStore, default_job_store_path
+from similarity_index import SimilarityIndex, adapt_smart_object, available as similarity_available
+from hedging import Hedger
+from key_pool import KeyPool, parse_api_keys, ERROR_AUTH, ERROR_RATE_LIMIT, ERROR_TIMEOUT, ERROR_THROTTLED, ERROR_CANCELLED, ERROR_OTHER
+from rate_limiter import RateLimiter
+from json_extract import extract_json_object
+from token_budget import FINISH_LENGTH, TokenBudget
+from deadline import Deadline, ensure_deadline
+from pdf_document import configure_pdf_output, create_pdf
+from pdf_pool import PdfPoolFull, PdfPoolTimeout, PdfRenderPool
+from prompts import (DOMAIN_TEMPLATE_TOKENS, IKIGAI_SYSTEM_PROMPT, PROMPT_VERSIONS, SMART_SYSTEM_PROMPT, TEMPLATE_TOKENS,
+                     build_ikigai_prompt, build_smart_batch_prompt, build_smart_prompt, build_smart_repair_prompt,
+                     smart_system_prompt)
+from domain_classifier import GENERAL, DomainClassifier
+from smart_schema import (SMART_FIELDS, clean_smart_object, parse_smart_json, partial_smart_fields,
+                          validate_smart_object, validation_stats)
 
 # Importer config avec gestion d'erreur
 try:
@@ -67,193 +83,672 @@ if MISTRAL_API_KEY and MISTRAL_API_KEY.strip():
         print(f"   Clé de secours (aperçu): {backup_preview}")
     else:
         print("Configuration Mistral : Clé de secours non configurée")
-else:
+elif not getattr(config, 'MISTRAL_API_KEYS', ''):
     print("Configuration Mistral : MISTRAL_API_KEY non configurée")
     print("   Sur Vercel : Allez dans Settings > Environment Variables et ajoutez MISTRAL_API_KEY")
     print("   Localement : Creez un fichier .env avec MISTRAL_API_KEY=votre_cle")
 
-def call_mistral_api(prompt, api_key=None):
-    """Appelle l'API Mistral pour obtenir une réponse de l'IA - Version améliorée avec gestion d'erreur et clé de secours"""
-    # Utiliser la clé fournie ou la clé principale par défaut
-    if not api_key:
-        api_key = MISTRAL_API_KEY
+# Client HTTP mutualisé : une session keep-alive par clé API, partagée par tous les threads
+MISTRAL_API_URL = getattr(config, 'MISTRAL_API_URL', "https://api.mistral.ai/v1/chat/completions")
+MISTRAL_POOL_MAXSIZE = getattr(config, 'MISTRAL_POOL_MAXSIZE', 10)
+mistral_pool = MistralClientPool(pool_maxsize=MISTRAL_POOL_MAXSIZE)
+
+# Cache des réponses de l'IA : 'memory' (par processus), 'sqlite' (partagé entre workers) ou 'off'
+LLM_CACHE_BACKEND = getattr(config, 'LLM_CACHE_BACKEND', 'memory')
+try:
+    llm_cache = create_llm_cache(
+        LLM_CACHE_BACKEND,
+        path=getattr(config, 'LLM_CACHE_PATH', None),
+        ttl=getattr(config, 'LLM_CACHE_TTL', 3600),
+        max_entries=getattr(config, 'LLM_CACHE_MAX_ENTRIES', 1000),
+        max_bytes=getattr(config, 'LLM_CACHE_MAX_BYTES', 20 * 1024 * 1024),
+    )
+except Exception as e:
+    # Fichier SQLite inaccessible (système de fichiers en lecture seule...) : repli en mémoire
+    print(f"Cache IA ({LLM_CACHE_BACKEND}) indisponible : {e} - utilisation du cache mémoire")
+    llm_cache = create_llm_cache('memory')
+
+# Objectifs SMART validés, retrouvés par texte normalisé quelle que soit leur position dans la liste
+objective_cache = ObjectiveCache(
+    llm_cache if getattr(config, 'OBJECTIVE_CACHE', True) else None,
+    MISTRAL_MODEL or "mistral-small-latest",
+    reference_year=getattr(config, 'OBJECTIVE_CACHE_REFERENCE_YEAR', 2026),
+    # Nouvelle version d'un prompt SMART : nouvelles entrées
+    namespace=f"smart_objective_{PROMPT_VERSIONS['smart']}_{PROMPT_VERSIONS['smart_domain']}",
+)
+
+# Appels identiques en vol regroupés : un seul appel Mistral par prompt, un seul traitement par objectif.
+# Entre workers, un bail SQLite désigne le meneur (nécessite le cache SQLite pour partager le résultat)
+llm_lease = None
+if getattr(config, 'SINGLE_FLIGHT_SHARED', True) and getattr(llm_cache, 'backend', None) == 'sqlite':
+    try:
+        llm_lease = SqliteLease(llm_cache.path, ttl=getattr(config, 'SINGLE_FLIGHT_LEASE_TTL', 30.0))
+    except Exception as e:
+        print(f"Regroupement des appels entre workers indisponible : {e}")
+llm_flight = SingleFlight(lease=llm_lease)
+objective_flight = SingleFlight()
+
+# Tâches en arrière-plan (?mode=job) : pool de threads, état et résultats partiels dans un fichier SQLite
+# (désactivées par défaut sur Vercel : la demande de tâche est alors ignorée)
+JOB_MODE_ENABLED = getattr(config, 'JOB_MODE_ENABLED', True)
+JOB_MAX_WORKERS = max(1, getattr(config, 'JOB_MAX_WORKERS', 2))
+_job_runner = None
+_job_runner_lock = threading.Lock()
+
+def get_job_runner():
+    """Pool des tâches, créé à la première tâche (le fichier SQLite n'est ouvert que si le mode est utilisé)"""
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            store = JobStore(
+                getattr(config, 'JOB_STORE_PATH', None) or default_job_store_path(),
+                ttl=getattr(config, 'JOB_TTL', 3600),
+                stale_after=getattr(config, 'JOB_STALE_AFTER', 300),
+            )
+            _job_runner = JobRunner(store, max_workers=JOB_MAX_WORKERS)
+        return _job_runner
+
+# Index de similarité (NumPy) : un objectif proche d'un objectif déjà traité réutilise son objectif SMART
+SIMILARITY_THRESHOLD = getattr(config, 'SIMILARITY_THRESHOLD', 0.9)
+SIMILARITY_INDEX_PATH = getattr(config, 'SIMILARITY_INDEX_PATH', None)
+SIMILARITY_INDEX_SAVE_EVERY = max(1, getattr(config, 'SIMILARITY_INDEX_SAVE_EVERY', 50))
+similarity_index = None
+if getattr(config, 'SIMILARITY_INDEX', True):
+    if similarity_available():
+        similarity_index = SimilarityIndex(
+            dim=getattr(config, 'SIMILARITY_INDEX_DIM', 512),
+            max_entries=getattr(config, 'SIMILARITY_INDEX_MAX_ENTRIES', 5000),
+            reference_year=getattr(config, 'OBJECTIVE_CACHE_REFERENCE_YEAR', 2026),
+            namespace=objective_cache.namespace,  # Nouvelle version d'un prompt SMART : index sauvegardé ignoré
+        )
+        if SIMILARITY_INDEX_PATH and os.path.exists(SIMILARITY_INDEX_PATH):
+            try:
+                if similarity_index.load(SIMILARITY_INDEX_PATH):
+                    print(f"Index de similarité : {len(similarity_index)} objectifs rechargés")
+                else:
+                    print(f"Index de similarité : fichier {SIMILARITY_INDEX_PATH} construit avec d'autres paramètres "
+                          f"ou prompts - index vide")
+            except Exception as e:
+                print(f"Index de similarité : fichier {SIMILARITY_INDEX_PATH} illisible ({e}) - index vide")
+    else:
+        print("Index de similarité désactivé : NumPy n'est pas installé")
+
+# Pool de clés : MISTRAL_API_KEYS="cle1:poids,cle2,..." ou, à défaut, la clé principale et la clé de secours
+MISTRAL_API_KEYS = parse_api_keys(getattr(config, 'MISTRAL_API_KEYS', ''))
+if not MISTRAL_API_KEYS:
+    MISTRAL_API_KEYS = [(key.strip(), 1) for key in (MISTRAL_API_KEY, MISTRAL_API_KEY_BACKUP) if key and key.strip()]
+key_pool = KeyPool(
+    MISTRAL_API_KEYS,
+    max_concurrency=getattr(config, 'MISTRAL_KEY_MAX_CONCURRENCY', 4),
+    cooldown=getattr(config, 'MISTRAL_BREAKER_COOLDOWN', 30.0),
+    auth_cooldown=getattr(config, 'MISTRAL_BREAKER_AUTH_COOLDOWN', 300.0),
+    timeout_threshold=getattr(config, 'MISTRAL_BREAKER_TIMEOUT_THRESHOLD', 2),
+)
+if len(key_pool) > 2:
+    print(f"Configuration Mistral : pool de {len(key_pool)} clés")
+
+# Limiteur de débit par clé (seau à jetons), partagé entre threads et workers via un fichier verrouillé
+rate_limiter = RateLimiter(
+    rate=getattr(config, 'MISTRAL_RATE_LIMIT_RPS', 5.0),
+    burst=getattr(config, 'MISTRAL_RATE_LIMIT_BURST', 5),
+    max_wait=getattr(config, 'MISTRAL_RATE_LIMIT_MAX_WAIT', 2.0),
+    shared=getattr(config, 'MISTRAL_RATE_LIMIT_SHARED', True),
+    directory=getattr(config, 'MISTRAL_RATE_LIMIT_DIR', None),
+    max_block=getattr(config, 'MISTRAL_RATE_LIMIT_MAX_BLOCK', 120.0),
+)
+
+# Objectifs traités en parallèle par requête
+OBJECTIVES_MAX_WORKERS = max(1, getattr(config, 'OBJECTIVES_MAX_WORKERS', 3))
+
+# Pipeline asynchrone : nombre maximum d'appels Mistral en vol par requête
+ASYNC_MAX_CONCURRENCY = max(1, getattr(config, 'ASYNC_MAX_CONCURRENCY', 100))
+
+# Consommation de tokens par type d'appel et max_tokens adaptatif (percentile des réponses observées x marge)
+token_budget = TokenBudget(
+    percentile=getattr(config, 'MISTRAL_MAX_TOKENS_PERCENTILE', 95),
+    headroom=getattr(config, 'MISTRAL_MAX_TOKENS_HEADROOM', 1.25),
+    min_tokens=getattr(config, 'MISTRAL_MAX_TOKENS_MIN', 300),
+    adaptive=getattr(config, 'MISTRAL_ADAPTIVE_MAX_TOKENS', True),
+)
+
+# Mode groupé : objectifs par appel Mistral (1 = un appel par objectif), tokens et timeout d'un lot
+SMART_BATCH_SIZE = max(1, getattr(config, 'SMART_BATCH_SIZE', 1))
+SMART_BATCH_ITEM_TOKENS = getattr(config, 'SMART_BATCH_ITEM_TOKENS', 1000)
+SMART_BATCH_TIMEOUT = getattr(config, 'SMART_BATCH_TIMEOUT', 25)
+
+# Échéance par requête : les timeouts des appels Mistral sont tirés du temps restant
+REQUEST_DEADLINE = getattr(config, 'REQUEST_DEADLINE', 9.0)
+MISTRAL_MIN_ATTEMPT_TIME = getattr(config, 'MISTRAL_MIN_ATTEMPT_TIME', 1.5)
+MISTRAL_CONNECT_TIMEOUT = getattr(config, 'MISTRAL_CONNECT_TIMEOUT', 3.0)
+
+# Réparation d'une réponse SMART incomplète : seuls les champs manquants sont redemandés
+SMART_REPAIR_MAX_FIELDS = getattr(config, 'SMART_REPAIR_MAX_FIELDS', 3)
+SMART_REPAIR_FIELD_TOKENS = getattr(config, 'SMART_REPAIR_FIELD_TOKENS', 300)
+
+# Domaine de l'objectif (classification locale par mots-clés) : prompt SMART court propre au domaine
+domain_classifier = DomainClassifier() if getattr(config, 'DOMAIN_ROUTING', True) else None
+
+def smart_route(objective_text):
+    """(domaine, message système, call_type) du prompt SMART individuel selon le domaine de l'objectif"""
+    domain = domain_classifier.classify(objective_text) if domain_classifier is not None else GENERAL
+    if domain == GENERAL:
+        return domain, SMART_SYSTEM_PROMPT, 'smart'
+    return domain, smart_system_prompt(domain), f'smart_{domain}'
+
+def observe_smart_route(domain, started):
+    """Durée du traitement d'un objectif, comptée par domaine"""
+    if domain_classifier is not None:
+        domain_classifier.observe_call(domain, time.perf_counter() - started)
+
+def new_request_deadline():
+    """Deadline créée à l'entrée d'une route et passée à toute la chaîne d'appels"""
+    return Deadline(REQUEST_DEADLINE or None, min_attempt=MISTRAL_MIN_ATTEMPT_TIME,
+                    connect_timeout=MISTRAL_CONNECT_TIMEOUT)
+
+# Requêtes hedgées : la clé de secours est lancée quand la principale dépasse un percentile de latence
+MISTRAL_HEDGING = getattr(config, 'MISTRAL_HEDGING', False)
+hedger = Hedger(
+    percentile=getattr(config, 'MISTRAL_HEDGE_PERCENTILE', 90),
+    default_delay=getattr(config, 'MISTRAL_HEDGE_DEFAULT_DELAY', 2.5),
+    min_delay=getattr(config, 'MISTRAL_HEDGE_MIN_DELAY', 0.5),
+)
+
+def build_mistral_payload(prompt, temperature=0.7, max_tokens=1200, json_mode=False, system=None):
+    """Corps de la requête chat/completions (json_mode : le modèle ne peut répondre qu'un objet JSON)
+
+    system : consignes fixes envoyées en premier message, identiques d'un appel à l'autre (prompts.py)
+    """
+    # Vérifier que le modèle est configuré
+    model = MISTRAL_MODEL if MISTRAL_MODEL else "mistral-small-latest"
+    messages = [{"role": "system", "content": system}] if system else []
+    messages.append({"role": "user", "content": prompt})
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens  # 1200 par défaut : équilibre qualité et vitesse
+    }
+    if json_mode:
+        payload["response_format"] = {"type": "json_object"}
+    return payload
+
+def read_mistral_response(response, api_key, key_type):
+    """Interprète la réponse HTTP de Mistral (requests ou httpx) en MistralReply"""
+    # Retry-After / ratelimit-* : bloquer le seau de la clé pour ne pas provoquer de 429
+    retry_after = rate_limiter.observe(api_key, response.headers)
+    
+    # Gestion des différents codes de réponse
+    if response.status_code == 200:
+        result = response.json()
+        if result.get('choices') and len(result['choices']) > 0:
+            choice = result['choices'][0]
+            content = choice.get('message', {}).get('content', '')
+            if content and content.strip():
+                finish_reason = choice.get('finish_reason')
+                if finish_reason == FINISH_LENGTH:
+                    print(f"API Mistral ({key_type}) : Réponse tronquée par max_tokens ({len(content)} caractères)")
+                else:
+                    print(f"API Mistral ({key_type}) : Réponse reçue ({len(content)} caractères)")
+                return MistralReply(content=content.strip(), status_code=200,
+                                    usage=result.get('usage'), finish_reason=finish_reason)
+        print("API Mistral : Réponse vide ou invalide")
+        return MistralReply(error=ERROR_OTHER, status_code=200)
     
+    elif response.status_code == 401:
+        print(f"API Mistral ({key_type}) : Erreur 401 - Clé API invalide ou expirée")
+        return MistralReply(error=ERROR_AUTH, status_code=401)
+    
+    elif response.status_code == 429:
+        print(f"API Mistral ({key_type}) : Erreur 429 - Limite de taux dépassée")
+        return MistralReply(error=ERROR_RATE_LIMIT, status_code=429, retry_after=retry_after)
+    
+    elif response.status_code == 400:
+        error_detail = response.text[:200] if response.text else ""
+        print(f"API Mistral : Erreur 400 - Requête invalide: {error_detail}")
+        return MistralReply(error=ERROR_OTHER, status_code=400)
+    
+    else:
+        error_detail = response.text[:200] if response.text else ""
+        print(f"API Mistral : Erreur {response.status_code}: {error_detail}")
+        return MistralReply(error=ERROR_OTHER, status_code=response.status_code)
+
+def request_mistral(prompt, api_key, temperature=0.7, max_tokens=1200, timeout=8, json_mode=False, deadline=None,
+                    system=None):
+    """Envoie un prompt à Mistral avec une clé donnée et retourne un MistralReply (contenu ou type d'erreur)"""
     # Vérifier que la clé API est configurée
     if not api_key or api_key.strip() == "":
         print("Clé API Mistral non configurée ou vide")
-        return None
+        return MistralReply(error=ERROR_OTHER)
     
-    # Vérifier que le modèle est configuré
-    model = MISTRAL_MODEL if MISTRAL_MODEL else "mistral-small-latest"
+    key_type = key_pool.label_for(api_key)
+    # Timeouts de connexion et de lecture tirés du temps restant de la requête (au plus `timeout`)
+    connect_timeout, read_timeout = ensure_deadline(deadline).timeouts(timeout)
     
     try:
-        url = "https://api.mistral.ai/v1/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key.strip()}"  # S'assurer qu'il n'y a pas d'espaces
-        }
+        payload = build_mistral_payload(prompt, temperature, max_tokens, json_mode, system)
         
-        payload = {
-            "model": model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.7,
-            "max_tokens": 1200  # Optimisé pour équilibrer qualité et vitesse
-        }
-        
-        # Appel API avec timeout optimisé pour Vercel (8s pour compatibilité plan gratuit)
         # Note: Vercel gratuit = 10s max, Pro = 60s max
-        response = requests.post(url, headers=headers, json=payload, timeout=8)
-        
-        # Gestion des différents codes de réponse
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('choices') and len(result['choices']) > 0:
-                content = result['choices'][0].get('message', {}).get('content', '')
-                if content and content.strip():
-                    key_type = "principale" if api_key == MISTRAL_API_KEY else "secours"
-                    print(f"API Mistral ({key_type}) : Réponse reçue ({len(content)} caractères)")
-                    return content.strip()
-            print("API Mistral : Réponse vide ou invalide")
-            return None
-        
-        elif response.status_code == 401:
-            key_type = "principale" if api_key == MISTRAL_API_KEY else "secours"
-            print(f"API Mistral ({key_type}) : Erreur 401 - Clé API invalide ou expirée")
-            return None
-        
-        elif response.status_code == 429:
-            key_type = "principale" if api_key == MISTRAL_API_KEY else "secours"
-            print(f"API Mistral ({key_type}) : Erreur 429 - Limite de taux dépassée")
-            return None
-        
-        elif response.status_code == 400:
-            error_detail = response.text[:200] if response.text else ""
-            print(f"API Mistral : Erreur 400 - Requête invalide: {error_detail}")
-            return None
-        
-        else:
-            error_detail = response.text[:200] if response.text else ""
-            print(f"API Mistral : Erreur {response.status_code}: {error_detail}")
-            return None
+        # La session (et donc la connexion TLS) est réutilisée entre les appels
+        response = mistral_pool.post(api_key, MISTRAL_API_URL, json=payload, timeout=(connect_timeout, read_timeout))
+        return read_mistral_response(response, api_key, key_type)
         
     except requests.exceptions.Timeout:
-        key_type = "principale" if api_key == MISTRAL_API_KEY else "secours"
+        if read_timeout < timeout:
+            # Coupé par l'échéance de la requête et non par la lenteur de la clé : pas de pénalité
+            print(f"API Mistral ({key_type}) : Échéance de la requête atteinte ({read_timeout:.1f}s) - appel abandonné")
+            return MistralReply(error=ERROR_CANCELLED)
         print(f"API Mistral ({key_type}) : Timeout - L'API prend trop de temps à répondre")
-        return None
+        return MistralReply(error=ERROR_TIMEOUT)
     
     except requests.exceptions.RequestException as e:
-        key_type = "principale" if api_key == MISTRAL_API_KEY else "secours"
         print(f"API Mistral ({key_type}) : Erreur de connexion: {str(e)}")
-        return None
+        return MistralReply(error=ERROR_OTHER)
     
     except Exception as e:
-        key_type = "principale" if api_key == MISTRAL_API_KEY else "secours"
         print(f"API Mistral ({key_type}) : Erreur inattendue: {str(e)}")
         import traceback
         traceback.print_exc()
+        return MistralReply(error=ERROR_OTHER)
+
+def call_mistral_api(prompt, api_key=None, temperature=0.7, max_tokens=1200):
+    """Appelle l'API Mistral pour obtenir une réponse de l'IA - Retourne le texte ou None"""
+    # Utiliser la clé fournie ou la clé principale par défaut
+    if not api_key:
+        api_key = MISTRAL_API_KEY
+    return request_mistral(prompt, api_key, temperature, max_tokens).content
+
+def call_with_key(pooled, prompt, temperature=0.7, max_tokens=1200, timeout=8, json_mode=False, deadline=None,
+                  system=None, cancel=None):
+    """Appelle Mistral avec une clé réservée du pool puis la libère en remontant le résultat au disjoncteur
+
+    cancel (HedgeCancel) : perdante d'un hedge ; la clé est libérée dès l'annulation et la requête
+    n'est pas envoyée si elle n'est pas encore partie.
+    """
+    deadline = ensure_deadline(deadline)
+    reply = MistralReply(error=ERROR_OTHER)
+    release_lock = threading.Lock()
+    released = False
+    
+    def release(error_kind, retry_after=None):
+        nonlocal released
+        with release_lock:
+            if released:
+                return
+            released = True
+        key_pool.release(pooled, error_kind, retry_after)
+    
+    if cancel is not None:
+        cancel.on_cancel(lambda: release(ERROR_CANCELLED))
+    try:
+        # Attendre brièvement un jeton plutôt que d'envoyer une requête vouée au 429
+        # (jamais au point de ne plus laisser le temps à l'appel d'aboutir)
+        if cancel is not None and cancel.is_set():
+            reply = MistralReply(error=ERROR_CANCELLED)
+        elif not rate_limiter.acquire(pooled.api_key, max_wait=deadline.wait_budget(rate_limiter.max_wait)):
+            print(f"API Mistral ({pooled.label}) : Débit local atteint - requête non envoyée")
+            reply = MistralReply(error=ERROR_THROTTLED)
+        elif cancel is not None and cancel.is_set():
+            # Annulée pendant l'attente du jeton : l'autre requête du hedge a déjà répondu
+            reply = MistralReply(error=ERROR_CANCELLED)
+        else:
+            reply = request_mistral(prompt, pooled.api_key, temperature, max_tokens, timeout, json_mode, deadline,
+                                    system)
+    finally:
+        release(reply.error, reply.retry_after)
+    return reply
+
+def call_next_key(prompt, temperature, max_tokens, tried, timeout=8, json_mode=False, deadline=None, system=None,
+                  cancel=None):
+    """Réserve la prochaine clé disponible non encore essayée et l'appelle - Retourne un MistralReply ou None"""
+    deadline = ensure_deadline(deadline)
+    if not deadline.can_attempt() or (cancel is not None and cancel.is_set()):
+        return None
+    pooled = key_pool.acquire(exclude=tried, timeout=deadline.wait_budget(2.0))
+    if pooled is None:
         return None
+    tried.add(pooled.api_key)
+    reply = call_with_key(pooled, prompt, temperature, max_tokens, timeout, json_mode, deadline, system, cancel)
+    if reply.error == ERROR_CANCELLED and cancel is not None and cancel.is_set():
+        print(f"API Mistral ({pooled.label}) : Requête hedgée abandonnée (l'autre clé a répondu)")
+    elif reply:
+        print(f"API Mistral ({pooled.label}) : Succès - Réponse reçue")
+    else:
+        print(f"API Mistral ({pooled.label}) : Échec")
+    return reply
 
 # Fonction Hugging Face supprimée - Utilisation exclusive de Mistral
 
-def call_ai_api(prompt):
-    """Appelle l'API Mistral avec clé principale et clé de secours - Version améliorée"""
-    # Essayer la clé principale d'abord
-    if MISTRAL_API_KEY and MISTRAL_API_KEY.strip():
-        print(f"Tentative de connexion à l'API Mistral (clé principale, modèle: {MISTRAL_MODEL})...")
-        result = call_mistral_api(prompt, MISTRAL_API_KEY)
-        if result:
-            print("API Mistral (principale) : Succès - Réponse reçue")
-            return result
-        else:
-            print("API Mistral (principale) : Échec - Tentative avec clé de secours...")
+def lookup_llm_cache(prompt, temperature, max_tokens, json_mode=False, system=None):
+    """Retourne (clé de cache, réponse en cache ou None) ; la clé sert aussi à regrouper les appels en vol"""
+    model = MISTRAL_MODEL if MISTRAL_MODEL else "mistral-small-latest"
+    extra = ('json_object',) if json_mode else ()
+    if system:
+        # Le message système fait partie de la requête : une autre version des consignes, une autre clé
+        extra += ('system', system)
+    cache_key = make_cache_key(model, prompt, temperature, max_tokens, *extra)
+    if llm_cache is None:
+        return cache_key, None
+    cached = llm_cache.get(cache_key)
+    if cached:
+        print("Cache IA : réponse servie depuis le cache")
+    return cache_key, cached
+
+def call_key_pool(prompt, temperature, max_tokens, timeout=8, json_mode=False, deadline=None, system=None):
+    """Un appel Mistral réparti sur le pool de clés (hedging, bascule) - Retourne un MistralReply ou None"""
+    deadline = ensure_deadline(deadline)
+    # Clés déjà essayées pour ce prompt (une clé en échec n'est pas réessayée)
+    tried = set()
+    reply = None
     
-    # Essayer la clé de secours si la principale a échoué
-    if MISTRAL_API_KEY_BACKUP and MISTRAL_API_KEY_BACKUP.strip():
-        print(f"Tentative de connexion à l'API Mistral (clé de secours, modèle: {MISTRAL_MODEL})...")
-        result = call_mistral_api(prompt, MISTRAL_API_KEY_BACKUP)
-        if result:
-            print("API Mistral (secours) : Succès - Réponse reçue")
-            return result
-        else:
-            print("API Mistral (secours) : Échec")
+    if MISTRAL_HEDGING and len(key_pool) >= 2:
+        # Mode hedgé : une deuxième clé démarre si la première dépasse le seuil de latence
+        print(f"Tentative de connexion à l'API Mistral (mode hedgé, seuil: {hedger.hedge_delay():.2f}s)...")
+        reply, source = hedger.call(
+            lambda cancel: call_next_key(prompt, temperature, max_tokens, tried, timeout, json_mode, deadline, system,
+                                         cancel),
+            lambda cancel: call_next_key(prompt, temperature, max_tokens, tried, timeout, json_mode, deadline, system,
+                                         cancel),
+        )
+        if reply:
+            print(f"API Mistral : Réponse {'principale' if source == 'primary' else 'de secours'} reçue en premier")
+    
+    # Répartition pondérée : chaque clé disponible est essayée au plus une fois
+    while not reply and len(tried) < len(key_pool):
+        if not deadline.can_attempt():
+            print(f"API Mistral : plus assez de temps pour une nouvelle tentative ({deadline})")
+            break
+        print(f"Tentative de connexion à l'API Mistral (modèle: {MISTRAL_MODEL})...")
+        before = len(tried)
+        reply = call_next_key(prompt, temperature, max_tokens, tried, timeout, json_mode, deadline, system)
+        if len(tried) == before:
+            # Plus aucune clé disponible (disjoncteurs ouverts ou limite de concurrence atteinte)
+            break
+    
+    return reply or None
+
+def call_ai_api(prompt, temperature=0.7, max_tokens=1200, timeout=8, json_mode=False, validate=None, call_type=None,
+                deadline=None, system=None):
+    """Appelle l'API Mistral en répartissant les appels sur le pool de clés - Version améliorée
+
+    max_tokens est un plafond : pour un call_type donné, la valeur envoyée suit les
+    longueurs de réponse observées (token_budget) et une réponse tronquée est refaite
+    avec le plafond complet.
+    validate(result) -> bool : seules les réponses validées sont mises en cache, pour
+    qu'une nouvelle tentative après une réponse non conforme reparte vers l'API.
+    deadline : échéance de la requête ; aucun appel n'est lancé s'il ne peut plus aboutir à temps.
+    system : message système (consignes fixes), envoyé avant le prompt.
+    """
+    deadline = ensure_deadline(deadline)
+    # Un prompt identique déjà traité récemment est servi depuis le cache
+    cache_key, cached = lookup_llm_cache(prompt, temperature, max_tokens, json_mode, system)
+    if cached:
+        return cached
     
-    # Aucune clé configurée ou toutes ont échoué
-    if not MISTRAL_API_KEY or not MISTRAL_API_KEY.strip():
+    if len(key_pool) == 0:
         print("Aucune clé API Mistral configurée")
         print("   Sur Vercel : Allez dans Settings > Environment Variables")
-        print("   Ajoutez MISTRAL_API_KEY et MISTRAL_API_KEY_BACKUP")
-    else:
-        print("Toutes les clés API Mistral ont échoué")
+        print("   Ajoutez MISTRAL_API_KEY et MISTRAL_API_KEY_BACKUP (ou MISTRAL_API_KEYS)")
+        return None
+    
+    # Même prompt déjà en vol (autre requête, double clic) : un seul appel Mistral, résultat partagé
+    return llm_flight.do(
+        cache_key,
+        lambda: fetch_ai_response(prompt, temperature, max_tokens, timeout, json_mode, validate, call_type,
+                                  deadline, cache_key, system),
+        timeout=deadline.remaining(),
+        lookup=lambda: llm_cache.get(cache_key) if llm_cache is not None else None,
+    )
+
+def fetch_ai_response(prompt, temperature, max_tokens, timeout, json_mode, validate, call_type, deadline, cache_key,
+                      system=None):
+    """Appel Mistral effectif de call_ai_api (max_tokens adaptatif, reprise si tronqué, mise en cache)"""
+    budget = token_budget.max_tokens_for(call_type, max_tokens)
+    reply = call_key_pool(prompt, temperature, budget, timeout, json_mode, deadline, system)
+    if reply:
+        token_budget.record(call_type, reply.usage, reply.finish_reason)
+        if reply.finish_reason == FINISH_LENGTH and budget < max_tokens and deadline.can_attempt():
+            # Plafond adaptatif trop juste pour cette réponse : une seule reprise avec le plafond complet
+            print(f"Réponse tronquée à {budget} tokens : nouvelle tentative avec max_tokens={max_tokens}")
+            token_budget.record_retry(call_type)
+            retry = call_key_pool(prompt, temperature, max_tokens, timeout, json_mode, deadline, system)
+            if retry:
+                token_budget.record(call_type, retry.usage, retry.finish_reason)
+                reply = retry
     
+    if reply:
+        result = reply.content
+        if llm_cache is not None and reply.finish_reason != FINISH_LENGTH and (validate is None or validate(result)):
+            llm_cache.set(cache_key, result)
+        return result
+    
+    print("Toutes les clés API Mistral disponibles ont échoué")
     return None
 
-def transform_objective_to_smart(objective_text, objective_number=None, total_objectives=None):
-    """Transforme un objectif simple en format SMART avec l'IA - Traitement individuel et spécifique"""
+def stream_ai_api(prompt, temperature=0.7, max_tokens=1200, call_type=None, deadline=None, system=None,
+                  validate=None):
+    """Générateur des fragments de texte de la réponse (Mistral stream=True)
+    
+    La réponse complète est assemblée ici pour être mise en cache (si validate l'accepte). Une autre clé
+    n'est essayée que si aucun fragment n'a encore été transmis. Le texte déjà
+    affiché ne pouvant pas être refait, le flux garde le plafond max_tokens complet
+    (la consommation est tout de même comptabilisée). À l'échéance de la requête,
+    le flux s'arrête : le texte partiel reste affiché mais n'est pas mis en cache.
+    """
+    deadline = ensure_deadline(deadline)
+    cache_key, cached = lookup_llm_cache(prompt, temperature, max_tokens, system=system)
+    if cached:
+        yield cached
+        return
     
-    # Contexte pour personnaliser le traitement
-    context_info = ""
-    if objective_number and total_objectives:
-        context_info = f"Cet objectif est le numéro {objective_number} sur {total_objectives} objectifs définis par cette personne. "
-        if objective_number == 1:
-            context_info += "C'est le premier objectif, donc probablement le plus prioritaire. "
-        elif objective_number == total_objectives:
-            context_info += "C'est le dernier objectif défini. "
+    tried = set()
+    parts = []
+    meta = {}  # usage et finish_reason de fin de flux
+    error = ERROR_OTHER
+    while not parts and len(tried) < len(key_pool):
+        if not deadline.can_attempt():
+            print(f"API Mistral : plus assez de temps pour lancer le flux ({deadline})")
+            break
+        pooled = key_pool.acquire(exclude=tried, timeout=deadline.wait_budget(2.0))
+        if pooled is None:
+            break
+        tried.add(pooled.api_key)
+        error, retry_after = ERROR_OTHER, None
+        stream_timeouts = deadline.timeouts(8)
+        try:
+            if not rate_limiter.acquire(pooled.api_key, max_wait=deadline.wait_budget(rate_limiter.max_wait)):
+                print(f"API Mistral ({pooled.label}) : Débit local atteint - requête non envoyée")
+                error = ERROR_THROTTLED
+                continue
+            payload = build_mistral_payload(prompt, temperature, max_tokens, system=system)
+            payload['stream'] = True
+            response = mistral_pool.post(pooled.api_key, MISTRAL_API_URL, json=payload,
+                                         timeout=stream_timeouts, stream=True)
+            with response:
+                if response.status_code != 200:
+                    reply = read_mistral_response(response, pooled.api_key, pooled.label)
+                    error, retry_after = reply.error, reply.retry_after
+                    continue
+                rate_limiter.observe(pooled.api_key, response.headers)
+                for delta in iter_stream_deltas(response.iter_lines(), meta):
+                    parts.append(delta)
+                    yield delta
+                    if deadline.expired():
+                        break
+            if deadline.expired() and meta.get('finish_reason') is None:
+                # Échéance atteinte en plein flux : la fonction serait coupée par la plateforme
+                print(f"API Mistral ({pooled.label}) : Échéance de la requête atteinte - flux interrompu")
+                error = ERROR_CANCELLED
+                break
+            error = None if parts else ERROR_OTHER
+            if parts:
+                token_budget.record(call_type, meta.get('usage'), meta.get('finish_reason'))
+            print(f"API Mistral ({pooled.label}) : Flux terminé ({len(''.join(parts))} caractères)")
+        except GeneratorExit:
+            # Le navigateur a fermé la connexion : la requête est abandonnée
+            error = ERROR_CANCELLED
+            raise
+        except requests.exceptions.Timeout:
+            print(f"API Mistral ({pooled.label}) : Timeout pendant le flux")
+            # Timeout raccourci par l'échéance de la requête : la clé n'est pas pénalisée
+            error = ERROR_CANCELLED if stream_timeouts[1] < 8 else ERROR_TIMEOUT
+        except requests.exceptions.RequestException as e:
+            print(f"API Mistral ({pooled.label}) : Erreur de connexion pendant le flux: {str(e)}")
+            error = ERROR_OTHER
+        finally:
+            key_pool.release(pooled, error, retry_after)
     
-    prompt = f"""Tu es un coach expert en développement personnel et en définition d'objectifs. {context_info}Une personne a écrit cet objectif spécifique :
+    full_text = ''.join(parts).strip()
+    if (full_text and error is None and llm_cache is not None and meta.get('finish_reason') != FINISH_LENGTH
+            and (validate is None or validate(full_text))):
+        llm_cache.set(cache_key, full_text)
 
-"{objective_text}"
+# Appels par objectif : une nouvelle tentative seulement si la réponse ne respecte pas le schéma
+SMART_MAX_ATTEMPTS = 2
 
-RÈGLES ABSOLUES :
-1. Traite CET objectif de manière UNIQUE et SPÉCIFIQUE. Chaque objectif est différent.
-2. Analyse-le en profondeur selon son domaine (professionnel, personnel, santé, finances, éducation, etc.).
-3. Génère TOUJOURS des réponses COMPLÈTES et DÉTAILLÉES. JAMAIS de "À définir", "Non défini", ou valeurs vides.
-4. Sois créatif, précis et actionnable. Chaque champ doit contenir au moins 2-3 phrases détaillées.
+def is_valid_smart_json(result):
+    """Réponse conforme au schéma SMART ? (seules celles-ci sont mises en cache)"""
+    return parse_smart_json(result)[0] is not None
 
-Transforme cet objectif en format SMART (Spécifique, Mesurable, Atteignable, Pertinent, Temporel) de manière professionnelle, motivante et TRÈS SPÉCIFIQUE à cet objectif précis.
+def check_smart_response(result, attempt):
+    """Valide une réponse en mode JSON - Retourne l'objectif SMART ou None (raison du rejet journalisée)"""
+    smart_obj, errors = parse_smart_json(result)
+    if smart_obj:
+        validation_stats.add('valid')
+        return smart_obj
+    if result:
+        validation_stats.add('invalid')
+        print(f"Tentative {attempt + 1} : réponse non conforme au schéma SMART ({'; '.join(errors[:3])})")
+    return None
+
+def plan_smart_repair(result, objective_text):
+    """(prompt de réparation, champs déjà obtenus, champs manquants) ou None si une réparation ne suffit pas
 
-CRITIQUE : Réponds UNIQUEMENT avec un JSON valide. Pas de texte avant, pas de texte après, pas de markdown, pas de backticks, pas de ```. Commence directement par {{ et termine par }}. Format exact :
+    Sans "goal" exploitable, ou avec plus de SMART_REPAIR_MAX_FIELDS champs manquants,
+    la réponse est trop pauvre : une nouvelle réponse complète est préférable.
+    """
+    fields, missing = partial_smart_fields(result)
+    if 'goal' not in fields or not 0 < len(missing) <= SMART_REPAIR_MAX_FIELDS:
+        return None
+    prompt = build_smart_repair_prompt(objective_text, fields, missing)
+    return prompt, fields, missing
 
-{{
-    "goal": "Objectif principal reformulé de manière claire, inspirante et précise - adapté spécifiquement à CET objectif. Minimum 10 mots.",
-    "specific": "Description détaillée et précise : qui, quoi, où, comment, pourquoi. Sois très concret et spécifique à CET objectif. Détaille les actions précises. Minimum 20 mots avec exemples concrets.",
-    "measurable": "Indicateurs de succès concrets avec chiffres, pourcentages, quantités. Comment saura-t-on que CET objectif est réussi ? Métriques précises avec valeurs numériques. Minimum 20 mots.",
-    "achievable": "Pourquoi CET objectif est réaliste et atteignable ? Quelles ressources, compétences, soutiens sont disponibles pour CET objectif spécifique ? Détaille les moyens concrets. Minimum 20 mots.",
-    "relevant": "Pourquoi CET objectif est important et aligné avec les valeurs et aspirations ? Quel impact spécifique aura-t-il sur la vie de cette personne ? Minimum 20 mots.",
-    "time_bound": "Date limite précise et échéances intermédiaires pour CET objectif en 2026. Quand exactement sera-t-il atteint en 2026 ? Jalons clairs avec dates spécifiques (jour/mois/2026). Minimum 20 mots. IMPORTANT : Toutes les dates doivent être en 2026.",
-    "analysis": "Analyse motivante en 5-7 phrases SPÉCIFIQUE à cet objectif : points forts de CET objectif, conseils pratiques personnalisés pour le réussir, étapes clés à suivre, risques à éviter, ressources à mobiliser. Minimum 50 mots."
-}}
+def merge_smart_repair(result, fields, missing):
+    """Fusionne les champs de la réparation avec les champs déjà obtenus - objectif SMART conforme ou None"""
+    repaired, _ = partial_smart_fields(result)
+    merged = dict(fields)
+    merged.update((field, repaired[field]) for field in missing if field in repaired)
+    if validate_smart_object(merged):
+        validation_stats.add('repair_failed')
+        return None
+    validation_stats.add('repaired')
+    print(f"Objectif SMART : champ(s) {', '.join(missing)} complété(s) par réparation")
+    return clean_smart_object(merged)
 
-EXEMPLES DE BONNES RÉPONSES :
-- "specific": "Je vais améliorer ma santé en faisant 30 minutes de sport 3 fois par semaine (lundi, mercredi, vendredi) le matin avant le travail, en suivant un programme d'entraînement personnalisé avec un coach."
-- "measurable": "Je mesurerai mon succès par : perte de 5 kg en 3 mois, capacité à courir 5 km sans s'arrêter, réduction de 10 points de tension artérielle, et amélioration de mon niveau d'énergie de 30%."
-- "time_bound": "Objectif final : 31 décembre 2026. Jalons 2026 : - 1er mars 2026 : perte de 2 kg - 1er juin 2026 : perte de 4 kg - 1er septembre 2026 : perte de 5 kg - 31 décembre 2026 : maintien du poids et forme optimale."
+def repair_smart_response(result, objective_text, deadline, system=SMART_SYSTEM_PROMPT):
+    """Redemande seulement les champs manquants d'une réponse SMART incomplète - objectif SMART ou None"""
+    plan = plan_smart_repair(result, objective_text)
+    if plan is None or not deadline.can_attempt():
+        return None
+    prompt, fields, missing = plan
+    repair = call_ai_api(prompt, max_tokens=SMART_REPAIR_FIELD_TOKENS * len(missing), json_mode=True,
+                         validate=lambda text: all(field in partial_smart_fields(text)[0] for field in missing),
+                         call_type=f'smart_repair_{len(missing)}', deadline=deadline, system=system)
+    return merge_smart_repair(repair, fields, missing)
 
-IMPORTANT : Nous sommes en 2026. Toutes les dates doivent être en 2026. L'année de référence est 2026.
+def transform_objective_to_smart(objective_text, objective_number=None, total_objectives=None, deadline=None):
+    """Transforme un objectif simple en format SMART avec l'IA - Traitement individuel et spécifique"""
+    cached = cached_smart_objective(objective_text)
+    if cached:
+        return cached
+    deadline = ensure_deadline(deadline)
+    # Même objectif déjà en cours de traitement (doublon dans la liste, double clic) : résultat partagé
+    smart_obj = objective_flight.do(
+        objective_cache.key_for(objective_text) or objective_text,
+        lambda: generate_smart_objective(objective_text, objective_number, total_objectives, deadline),
+        timeout=deadline.remaining(),
+    )
+    return dict(smart_obj) if smart_obj else salvage_smart_response(None, objective_text)
 
-Sois très concret, précis, motivant et actionnable. Utilise des exemples chiffrés et des dates précises EN 2026. Adapte ton analyse à la nature spécifique de CET objectif. RAPPEL : Nous sommes en 2026, toutes les dates doivent être en 2026. Réponds UNIQUEMENT le JSON, rien d'autre."""
+def generate_smart_objective(objective_text, objective_number, total_objectives, deadline):
+    """Appels Mistral de transform_objective_to_smart (tentatives, puis récupération des champs lisibles)"""
+    # Cadrage selon la position de l'objectif : seulement en cas d'absence du cache
+    prompt = build_smart_prompt(objective_text, objective_number, total_objectives)
+    # Domaine reconnu : message système court propre au domaine, consommation comptée à part (call_type)
+    domain, system, call_type = smart_route(objective_text)
+    started = time.perf_counter()
     
-    # Essayer jusqu'à 2 fois pour obtenir une réponse complète
-    max_attempts = 2
+    # Mode JSON de Mistral + validation du schéma : pas de second appel si la première réponse est conforme
     result = None
+    smart_obj = None
+    for attempt in range(SMART_MAX_ATTEMPTS):
+        if attempt and not deadline.can_attempt():
+            print(f"Objectif SMART : pas de nouvelle tentative, échéance trop proche ({deadline})")
+            break
+        result = call_ai_api(prompt, json_mode=True, validate=is_valid_smart_json, call_type=call_type,
+                             deadline=deadline, system=system)
+        if not result:
+            # Aucune clé n'a répondu : la bascule entre clés a déjà été faite par call_ai_api
+            break
+        smart_obj = check_smart_response(result, attempt)
+        if not smart_obj and not attempt:
+            # Quelques champs manquants : les redemander seuls coûte bien moins qu'une nouvelle réponse complète
+            smart_obj = repair_smart_response(result, objective_text, deadline, system)
+        if smart_obj:
+            remember_smart_objective(objective_text, smart_obj)
+            break
     
-    for attempt in range(max_attempts):
-        result = call_ai_api(prompt)
-        if result and result.strip():
-            # Vérifier que la réponse contient du contenu substantiel
-            if len(result.strip()) > 50:  # Au moins 50 caractères
-                break
-        # Si c'est la dernière tentative, on continue quand même
-        if attempt < max_attempts - 1:
-            print(f"Tentative {attempt + 1} : réponse trop courte ou vide, nouvelle tentative...")
-    
+    observe_smart_route(domain, started)
+    return smart_obj or salvage_smart_response(result, objective_text)
+
+def cached_smart_objective(objective_text):
+    """Objectif SMART déjà obtenu pour un texte équivalent (casse, accents, ponctuation, position)
+    ou, à défaut, pour un objectif très proche (index de similarité) - sinon None"""
+    smart_obj = objective_cache.get(objective_text)
+    if smart_obj:
+        print("Cache des objectifs : objectif SMART servi depuis le cache")
+        return smart_obj
+    if similarity_index is not None:
+        match = similarity_index.best(objective_text, SIMILARITY_THRESHOLD)
+        if match:
+            score, source_text, smart_obj = match
+            print(f"Index de similarité : objectif proche de \"{source_text}\" (score {score:.2f}) - objectif SMART réutilisé")
+            return adapt_smart_object(smart_obj, source_text, objective_text)
+    return None
+
+def remember_smart_objective(objective_text, smart_obj):
+    """Enregistre un objectif SMART validé dans le cache des objectifs et l'index de similarité"""
+    objective_cache.set(objective_text, smart_obj)
+    if similarity_index is None:
+        return
+    similarity_index.add(objective_text, dict(smart_obj))
+    if SIMILARITY_INDEX_PATH and similarity_index.inserts % SIMILARITY_INDEX_SAVE_EVERY == 0:
+        save_similarity_index_in_background()
+
+_similarity_save_lock = threading.Lock()
+
+def save_similarity_index_in_background():
+    """Sauvegarde sur un thread dédié : l'écriture du .npz n'allonge pas la requête (ignorée si une est en cours)"""
+    if _similarity_save_lock.locked():
+        return
+    threading.Thread(target=save_similarity_index, name='similarity-index-save', daemon=True).start()
+
+def save_similarity_index():
+    """Sauvegarde l'index de similarité (toutes les SIMILARITY_INDEX_SAVE_EVERY insertions et à l'arrêt)"""
+    if similarity_index is None or not SIMILARITY_INDEX_PATH or not len(similarity_index):
+        return
+    with _similarity_save_lock:
+        try:
+            similarity_index.save(SIMILARITY_INDEX_PATH)
+        except Exception as e:
+            print(f"Index de similarité : sauvegarde impossible ({e})")
+
+atexit.register(save_similarity_index)
+
+def salvage_smart_response(result, objective_text):
+    """Dernier recours après des réponses non conformes : récupère les champs lisibles et complète les autres"""
     if not result or not result.strip():
         # Vérifier si Mistral est configuré pour afficher un message approprié
-        mistral_configured = MISTRAL_API_KEY and MISTRAL_API_KEY.strip()
+        mistral_configured = len(key_pool) > 0
         
         error_msg = "L'IA n'a pas pu traiter cet objectif automatiquement."
         if not mistral_configured:
@@ -272,73 +767,16 @@ Sois très concret, précis, motivant et actionnable. Utilise des exemples chiff
             "analysis": error_msg
         }
     
-    # Nettoyer la réponse : enlever markdown, backticks, etc.
-    cleaned_result = result.strip()
-    
-    # Enlever les backticks et "json" si présents
-    cleaned_result = re.sub(r'```json\s*', '', cleaned_result, flags=re.IGNORECASE)
-    cleaned_result = re.sub(r'```\s*', '', cleaned_result)
-    cleaned_result = cleaned_result.strip()
-    
-    # Méthode 1: Chercher un JSON complet entre accolades (gère les JSON multilignes)
-    # On cherche le premier { et on trouve le } correspondant
-    start_idx = cleaned_result.find('{')
-    if start_idx != -1:
-        # Compter les accolades pour trouver la fin
-        brace_count = 0
-        end_idx = start_idx
-        for i in range(start_idx, len(cleaned_result)):
-            if cleaned_result[i] == '{':
-                brace_count += 1
-            elif cleaned_result[i] == '}':
-                brace_count -= 1
-                if brace_count == 0:
-                    end_idx = i + 1
-                    break
-        
-        if end_idx > start_idx:
-            json_str = cleaned_result[start_idx:end_idx]
-            try:
-                parsed = json.loads(json_str)
-                if isinstance(parsed, dict) and 'goal' in parsed:
-                    return parsed
-            except (json.JSONDecodeError, ValueError) as e:
-                pass
-    
-    # Méthode 2: Essayer de parser directement
-    try:
-        parsed = json.loads(cleaned_result)
-        if isinstance(parsed, dict) and 'goal' in parsed:
-            return parsed
-    except (json.JSONDecodeError, ValueError):
-        pass
-    
-    # Méthode 3: Extraire les champs individuellement avec regex améliorée
-    # Gère les chaînes avec échappement et multilignes
-    def extract_json_field(text, field_name):
-        # Pattern pour capturer la valeur d'un champ JSON (gère les échappements)
-        pattern = rf'"{field_name}"\s*:\s*"((?:[^"\\]|\\.)*)"'
-        match = re.search(pattern, text, re.DOTALL)
-        if match:
-            # Décoder les échappements JSON
-            value = match.group(1).replace('\\"', '"').replace('\\n', '\n').replace('\\t', '\t')
-            return value
-        return None
+    validation_stats.add('salvaged')
     
-    goal = extract_json_field(cleaned_result, 'goal')
-    if goal:
-        # Extraire tous les champs
-        specific = extract_json_field(cleaned_result, 'specific')
-        measurable = extract_json_field(cleaned_result, 'measurable')
-        achievable = extract_json_field(cleaned_result, 'achievable')
-        relevant = extract_json_field(cleaned_result, 'relevant')
-        time_bound = extract_json_field(cleaned_result, 'time_bound')
-        analysis = extract_json_field(cleaned_result, 'analysis')
-        
-        # Vérifier que les champs ne sont pas vides ou trop courts
+    # Extraction tolérante en une passe (markdown, texte autour, guillemets non échappés, troncature)
+    extracted = extract_json_object(result).value
+    fields = extracted if isinstance(extracted, dict) else {}
+    goal = fields.get('goal')
+    if isinstance(goal, str) and goal.strip():
         # Si un champ est vide ou trop court, on génère un contenu basé sur l'objectif
         def ensure_field(field_value, field_name, objective_text):
-            if not field_value or len(field_value.strip()) < 10:
+            if not isinstance(field_value, str) or len(field_value.strip()) < 10:
                 # Générer un contenu basique mais structuré
                 if field_name == 'specific':
                     return f"Objectif spécifique : {objective_text}. À préciser avec plus de détails sur les actions concrètes à entreprendre."
@@ -354,38 +792,10 @@ Sois très concret, précis, motivant et actionnable. Utilise des exemples chiff
                     return f"Analyse de l'objectif : {objective_text}. Points à considérer : définir les étapes clés, identifier les ressources nécessaires, anticiper les défis potentiels."
             return field_value
         
-        return {
-            "goal": goal if goal and len(goal.strip()) >= 5 else objective_text,
-            "specific": ensure_field(specific, 'specific', objective_text),
-            "measurable": ensure_field(measurable, 'measurable', objective_text),
-            "achievable": ensure_field(achievable, 'achievable', objective_text),
-            "relevant": ensure_field(relevant, 'relevant', objective_text),
-            "time_bound": ensure_field(time_bound, 'time_bound', objective_text),
-            "analysis": ensure_field(analysis, 'analysis', objective_text)
-        }
-    
-    # Dernier recours : si on trouve au moins "goal", on utilise ce qu'on peut
-    if '"goal"' in cleaned_result or "'goal'" in cleaned_result:
-        # L'IA a essayé de faire du JSON mais c'est mal formaté
-        # On extrait ce qu'on peut et on génère le reste
-        goal_extracted = extract_json_field(cleaned_result, 'goal') or objective_text
-        specific_extracted = extract_json_field(cleaned_result, 'specific')
-        measurable_extracted = extract_json_field(cleaned_result, 'measurable')
-        achievable_extracted = extract_json_field(cleaned_result, 'achievable')
-        relevant_extracted = extract_json_field(cleaned_result, 'relevant')
-        time_bound_extracted = extract_json_field(cleaned_result, 'time_bound')
-        analysis_extracted = extract_json_field(cleaned_result, 'analysis')
-        
-        # Générer des contenus structurés même si incomplets
-        return {
-            "goal": goal_extracted if goal_extracted and len(goal_extracted.strip()) >= 5 else objective_text,
-            "specific": specific_extracted if specific_extracted and len(specific_extracted.strip()) >= 10 else f"Objectif spécifique : {objective_text}. À préciser avec des détails concrets sur les actions à entreprendre.",
-            "measurable": measurable_extracted if measurable_extracted and len(measurable_extracted.strip()) >= 10 else f"Métriques à définir pour mesurer le succès de : {objective_text}. Déterminer des indicateurs quantifiables (chiffres, pourcentages, quantités).",
-            "achievable": achievable_extracted if achievable_extracted and len(achievable_extracted.strip()) >= 10 else f"Évaluer la faisabilité de : {objective_text}. Identifier les ressources, compétences et soutiens nécessaires pour atteindre cet objectif.",
-            "relevant": relevant_extracted if relevant_extracted and len(relevant_extracted.strip()) >= 10 else f"Justifier l'importance de : {objective_text}. Aligner avec les valeurs, aspirations et objectifs de vie personnels.",
-            "time_bound": time_bound_extracted if time_bound_extracted and len(time_bound_extracted.strip()) >= 10 else f"Calendrier à définir pour : {objective_text}. Fixer des dates précises en 2026 (jour/mois/2026) et des jalons intermédiaires pour 2026.",
-            "analysis": analysis_extracted if analysis_extracted and len(analysis_extracted.strip()) >= 20 else f"Analyse de l'objectif : {objective_text}. Points à considérer : définir les étapes clés, identifier les ressources nécessaires, anticiper les défis potentiels, et planifier les actions concrètes."
-        }
+        smart_obj = {"goal": goal if len(goal.strip()) >= 5 else objective_text}
+        for field in SMART_FIELDS[1:]:
+            smart_obj[field] = ensure_field(fields.get(field), field, objective_text)
+        return smart_obj
     
     # Aucun JSON trouvé - Générer un objectif SMART structuré basé sur le texte original
     return {
@@ -398,44 +808,108 @@ Sois très concret, précis, motivant et actionnable. Utilise des exemples chiff
         "analysis": f"Analyse de l'objectif : {objective_text}. Pour réussir cet objectif, il est important de : 1) Définir des étapes clés concrètes, 2) Identifier les ressources nécessaires, 3) Anticiper les défis potentiels, 4) Planifier les actions concrètes, 5) Suivre régulièrement la progression."
     }
 
-def generate_ikigai_analysis(what_you_love, what_you_are_good_at, what_world_needs, what_you_can_be_paid_for):
-    """Génère une analyse IKIGAI avec l'IA à partir de réponses simples - Version optimisée pour rapidité"""
-    prompt = f"""Tu es un coach expert en IKIGAI (raison d'être) et développement personnel. Analyse ces réponses pour révéler l'IKIGAI de cette personne. Sois concis mais complet :
-
-CE QUE J'AIME : {what_you_love}
-
-CE EN QUOI JE SUIS DOUÉ : {what_you_are_good_at}
+# ============================================
+# MODE GROUPÉ : plusieurs objectifs par appel
+# ============================================
+# Le message système est partagé avec le prompt individuel ; l'IA renvoie un
+# tableau JSON "objectives" indexé par objective_id. Les objectifs absents ou incomplets de la
+# réponse sont refaits un par un avec le prompt individuel.
 
-CE DONT LE MONDE A BESOIN : {what_world_needs}
+def parse_smart_batch_response(result, batch):
+    """Extrait de la réponse groupée les objectifs SMART complets : {numéro: objectif}
 
-CE POUR QUOI JE PEUX ÊTRE PAYÉ : {what_you_can_be_paid_for}
-
-Structure ta réponse de manière claire et inspirante :
+    Un objet est retenu seulement si son objective_id fait partie du lot et s'il
+    respecte le schéma SMART ; les autres seront refaits individuellement.
+    """
+    expected = {idx for idx, _ in batch}
+    if not result or not result.strip():
+        return {}
 
-## TON IKIGAI (Raison d'Être)
+    extracted = extract_json_object(result)
+    items = extracted.value.get('objectives') if isinstance(extracted.value, dict) else None
+    if not isinstance(items, list):
+        return {}
+    if 'truncated' in extracted.recoveries:
+        # Le dernier objet a été coupé par max_tokens : il sera refait individuellement
+        items = items[:-1]
 
-[Identifie l'intersection unique de ces 4 éléments. Formule un IKIGAI personnalisé et inspirant en 2-3 phrases]
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            idx = int(item.get('objective_id'))
+        except (TypeError, ValueError):
+            continue
+        if idx not in expected or idx in parsed:
+            continue
+        if not validate_smart_object(item):
+            parsed[idx] = clean_smart_object(item)
+    return parsed
 
-## ANALYSE ET INSIGHTS
+def iter_batches(objectives_with_index, batch_size):
+    """Découpe [(numéro, objectif), ...] en lots de batch_size"""
+    for start in range(0, len(objectives_with_index), batch_size):
+        yield objectives_with_index[start:start + batch_size]
 
-[Analyse les connexions entre ces 4 éléments. Qu'est-ce qui ressort ? Quelles sont les opportunités ?]
+def split_cached_batch(batch):
+    """Sépare un lot en ({numéro: objectif SMART en cache}, objectifs restant à traiter)"""
+    cached = {}
+    remaining = []
+    for idx, obj_text in batch:
+        smart_obj = cached_smart_objective(obj_text)
+        if smart_obj:
+            cached[idx] = smart_obj
+        else:
+            remaining.append((idx, obj_text))
+    return cached, remaining
 
-## RECOMMANDATIONS CONCRÈTES
+def store_smart_batch(batch, parsed):
+    """Met en cache les objectifs complets d'un lot"""
+    for idx, obj_text in batch:
+        if idx in parsed:
+            remember_smart_objective(obj_text, parsed[idx])
 
-[3-5 recommandations actionnables pour vivre son IKIGAI au quotidien]
+def transform_objectives_batch(batch, total_objectives, deadline=None):
+    """Traite un lot d'objectifs en un seul appel - Retourne {numéro: objectif SMART} (objectifs complets seulement)"""
+    cached, batch = split_cached_batch(batch)
+    if not batch:
+        return cached
+    prompt = build_smart_batch_prompt(batch, total_objectives)
+    result = call_ai_api(prompt, max_tokens=SMART_BATCH_ITEM_TOKENS * len(batch), timeout=SMART_BATCH_TIMEOUT,
+                         json_mode=True, validate=lambda result: len(parse_smart_batch_response(result, batch)) == len(batch),
+                         call_type=f'smart_batch_{len(batch)}', deadline=deadline, system=SMART_SYSTEM_PROMPT)
+    parsed = parse_smart_batch_response(result, batch)
+    if len(parsed) < len(batch):
+        missing = [idx for idx, _ in batch if idx not in parsed]
+        print(f"Lot {[idx for idx, _ in batch]} : objectif(s) {missing} absent(s) ou incomplet(s), traitement individuel")
+    store_smart_batch(batch, parsed)
+    parsed.update(cached)
+    return parsed
 
-## PISTES D'ACTION POUR 2026
+# Analyse IKIGAI plus courte : remplacée par l'analyse de repli (et donc jamais mise en cache)
+IKIGAI_MIN_LENGTH = 50
 
-[3-5 actions concrètes à entreprendre en 2026 pour aligner sa vie avec son IKIGAI]
+def is_valid_ikigai_analysis(result):
+    """Réponse IKIGAI exploitable ? (seules celles-ci sont mises en cache)"""
+    return bool(result) and len(result.strip()) >= IKIGAI_MIN_LENGTH
 
-Sois inspirant, concret, motivant et actionnable. Utilise un ton positif et encourageant. RAPPEL : Nous sommes en 2026, toutes les actions et dates doivent être pour l'année 2026."""
+def generate_ikigai_analysis(what_you_love, what_you_are_good_at, what_world_needs, what_you_can_be_paid_for,
+                             deadline=None):
+    """Génère une analyse IKIGAI avec l'IA à partir de réponses simples - Version optimisée pour rapidité"""
+    prompt = build_ikigai_prompt(what_you_love, what_you_are_good_at, what_world_needs, what_you_can_be_paid_for)
     
     # Appel à l'API Mistral (avec clé principale et secours)
-    result = call_ai_api(prompt)
+    result = call_ai_api(prompt, validate=is_valid_ikigai_analysis, call_type='ikigai', deadline=deadline,
+                         system=IKIGAI_SYSTEM_PROMPT)
     
-    if not result or len(result.strip()) < 50:
+    return finalize_ikigai_analysis(result, what_you_love, what_you_are_good_at, what_world_needs, what_you_can_be_paid_for)
+
+def finalize_ikigai_analysis(result, what_you_love, what_you_are_good_at, what_world_needs, what_you_can_be_paid_for):
+    """Retourne l'analyse de l'IA, ou une analyse structurée de repli si la réponse est absente"""
+    if not is_valid_ikigai_analysis(result):
         # Vérifier si Mistral est configuré pour afficher un message approprié
-        mistral_configured = MISTRAL_API_KEY and MISTRAL_API_KEY.strip()
+        mistral_configured = len(key_pool) > 0
         
         config_note = ""
         if not mistral_configured:
@@ -466,415 +940,292 @@ Ces quatre éléments se complètent et révèlent des opportunités intéressan
     
     return result.strip()
 
-def clean_text_for_pdf(text):
-    """Nettoie le texte pour éviter les erreurs dans le PDF - Version améliorée"""
-    if not text:
-        return ""
-    import re
-    # Convertir en string
-    text = str(text)
-    
-    # Supprimer les null bytes et caractères de contrôle
-    text = ''.join(char for char in text if ord(char) >= 32 or char in '\n\t')
-    text = text.replace('\x00', '')
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
-    
-    # Nettoyer les balises markdown (en plusieurs passes pour éviter les conflits)
-    # D'abord les blocs de code
-    text = re.sub(r'```[\w]*\n.*?```', '', text, flags=re.DOTALL)  # Supprimer les blocs de code complets
-    text = re.sub(r'```', '', text)  # Supprimer les ``` restants
-    
-    # Ensuite les gras et italiques (ordre important)
-    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)  # **texte** -> texte (gras markdown)
-    text = re.sub(r'__(.+?)__', r'\1', text)  # __texte__ -> texte (gras markdown alternatif)
-    text = re.sub(r'\*(.+?)\*', r'\1', text)  # *texte* -> texte (italique markdown, mais attention aux astérisques seuls)
-    text = re.sub(r'_(.+?)_', r'\1', text)  # _texte_ -> texte (italique markdown)
-    
-    # Nettoyer les titres markdown
-    text = re.sub(r'##+\s*(.+?)(?:\n|$)', r'\1\n', text)  # ## Titre -> Titre
-    text = re.sub(r'#+\s*(.+?)(?:\n|$)', r'\1\n', text)  # # Titre -> Titre
-    
-    # Nettoyer le code inline
-    text = re.sub(r'`(.+?)`', r'\1', text)  # `code` -> code
-    
-    # Nettoyer les listes markdown
-    text = re.sub(r'^\s*[-*+]\s+', '', text, flags=re.MULTILINE)  # Supprimer les puces de liste
-    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)  # Supprimer les numéros de liste
-    
-    # Échapper les caractères HTML/XML pour ReportLab
-    text = re.sub(r'&(?![a-zA-Z]+;)', '&amp;', text)
-    text = text.replace('<', '&lt;').replace('>', '&gt;')
-    
-    # Réinsérer uniquement les balises HTML nécessaires pour ReportLab
-    text = text.replace('&lt;b&gt;', '<b>').replace('&lt;/b&gt;', '</b>')
-    text = text.replace('&lt;i&gt;', '<i>').replace('&lt;/i&gt;', '</i>')
-    text = text.replace('&lt;br/&gt;', '<br/>').replace('&lt;br&gt;', '<br/>')
-    text = text.replace('&lt;p&gt;', '<p>').replace('&lt;/p&gt;', '</p>')
-    
-    # Nettoyer les espaces multiples
-    text = re.sub(r' +', ' ', text)
-    text = re.sub(r'\n{3,}', '\n\n', text)  # Max 2 retours à la ligne consécutifs
-    
-    return text.strip()
-
-def create_pdf(objectives_list, ikigai_data, filename='objectifs_annee.pdf'):
-    """Crée un PDF avec les objectifs SMART et IKIGAI - Version optimisée et robuste"""
-    buffer = io.BytesIO()
-    
-    # Marges équilibrées pour une meilleure présentation
-    doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                           leftMargin=0.7*inch, rightMargin=0.7*inch,
-                           topMargin=0.6*inch, bottomMargin=0.6*inch)
-    story = []
-    
-    # Styles améliorés pour une meilleure présentation
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
+# ============================================
+# PIPELINE ASYNCHRONE (asyncio + httpx)
+# ============================================
+# Même logique que la version synchrone, mais un seul thread peut garder des
+# centaines d'appels Mistral en vol : les objectifs partent tous en même temps,
+# bornés par un sémaphore.
+
+async def request_mistral_async(prompt, api_key, temperature=0.7, max_tokens=1200, timeout=8, json_mode=False,
+                                deadline=None, system=None):
+    """Version asynchrone de request_mistral (client httpx de la requête en cours)"""
+    if not api_key or api_key.strip() == "":
+        print("Clé API Mistral non configurée ou vide")
+        return MistralReply(error=ERROR_OTHER)
     
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=18,
-        textColor=colors.HexColor('#3498db'),
-        spaceAfter=15,
-        spaceBefore=20,
-        fontName='Helvetica-Bold'
-    )
+    key_type = key_pool.label_for(api_key)
+    connect_timeout, read_timeout = ensure_deadline(deadline).timeouts(timeout)
     
-    # En-tête avec logo et branding - taille améliorée
     try:
-        logo_path = os.path.join(os.path.dirname(__file__), 'static', 'logo_BuildNovaG.jpg')
-        if os.path.exists(logo_path):
-            logo = Image(logo_path, width=2*inch, height=0.8*inch)
-            logo.hAlign = 'CENTER'
-            story.append(logo)
-            story.append(Spacer(1, 0.1*inch))
-    except:
-        pass
-    
-    # BuildNovaG en or - style amélioré
-    story.append(Paragraph("<b>BuildNovaG</b>", ParagraphStyle(
-        'BrandStyleGold',
-        parent=styles['Heading1'],
-        fontSize=32,
-        textColor=colors.HexColor('#DAA520'),
-        spaceAfter=12,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )))
-    story.append(Spacer(1, 0.1*inch))
-    story.append(Paragraph("Objectifs-AI", ParagraphStyle(
-        'TaglineStyle',
-        parent=styles['Normal'],
-        fontSize=16,
-        textColor=colors.white,
-        spaceAfter=12,
-        alignment=TA_CENTER,
-        fontStyle='italic',
-        fontWeight='bold',
-        backColor=colors.HexColor('#667eea'),
-        borderPadding=5
-    )))
-    story.append(Spacer(1, 0.15*inch))
-    # "Heureuse Année 2026" avec fond dégradé blanc
-    new_year_table_data = [[Paragraph("<b>Heureuse Année 2026</b>", ParagraphStyle(
-        'NewYearStyle',
-        parent=styles['Normal'],
-        fontSize=18,
-        textColor=colors.HexColor('#e74c3c'),
-        alignment=TA_CENTER,
-        fontStyle='italic',
-        fontName='Helvetica-Bold',
-        fontWeight='bold'
-    ))]]
-    new_year_table = Table(new_year_table_data, colWidths=[6*inch], rowHeights=[0.5*inch])
-    new_year_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#ffffff')),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('LEFTPADDING', (0, 0), (-1, -1), 20),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 20),
-        ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.HexColor('#f8f9fa')]),
-    ]))
-    story.append(new_year_table)
-    story.append(Spacer(1, 0.2*inch))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Titre principal
-    story.append(Paragraph("Mes Objectifs pour l'Année 2026", title_style))
-    story.append(Spacer(1, 0.15*inch))
-    story.append(Paragraph(f"<i>Document généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}</i>", 
-                          ParagraphStyle('DateStyle', parent=styles['Normal'], alignment=TA_CENTER, textColor=colors.HexColor('#666'), fontSize=10)))
-    story.append(Spacer(1, 0.4*inch))
-    
-    # Section SMART - Traitement INDIVIDUEL et SPÉCIFIQUE pour chaque objectif
-    if objectives_list and len(objectives_list) > 0:
-        # En-tête de section avec nombre d'objectifs
-        total_obj = len(objectives_list)
-        section_title = f"Mes Objectifs SMART ({total_obj} objectif{'s' if total_obj > 1 else ''} traité{'s' if total_obj > 1 else ''} individuellement)"
-        story.append(Paragraph(section_title, heading_style))
-        story.append(Spacer(1, 0.3*inch))
-        
-        for idx, smart_data in enumerate(objectives_list, 1):
-            # Obtenir l'ID de l'objectif (utiliser objective_id si disponible)
-            obj_id = smart_data.get('objective_id', idx)
-            total_objs = len(objectives_list)
-            
-            # Séparation visuelle marquée entre les objectifs (sauf pour le premier)
-            if idx > 1:
-                story.append(Spacer(1, 0.4*inch))
-                # Ligne de séparation plus visible
-                separator_table = Table([['']], colWidths=[6*inch], rowHeights=[0.03*inch])
-                separator_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#667eea')),
-                    ('LINEBELOW', (0, 0), (-1, -1), 1, colors.HexColor('#667eea')),
-                ]))
-                story.append(separator_table)
-                story.append(Spacer(1, 0.4*inch))
-            
-            # Encadré pour chaque objectif avec fond coloré - TRAITEMENT INDIVIDUEL
-            goal_clean = clean_text_for_pdf(smart_data.get('goal', 'Objectif'))
-            original_text = smart_data.get('original_text', '')
-            
-            # En-tête de l'objectif avec fond coloré et numéro
-            obj_header_text = f"<b>OBJECTIF #{obj_id} / {total_objs}</b>"
-            if idx == 1:
-                obj_header_text += " <i>(Prioritaire)</i>"
-            
-            obj_header_data = [[Paragraph(obj_header_text, 
-                                         ParagraphStyle('ObjNum', parent=styles['Normal'], 
-                                                       fontSize=13, fontName='Helvetica-Bold',
-                                                       textColor=colors.white,
-                                                       alignment=TA_CENTER))]]
-            obj_header = Table(obj_header_data, colWidths=[6*inch], rowHeights=[0.45*inch])
-            obj_header.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#667eea')),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('TOPPADDING', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ]))
-            story.append(obj_header)
-            story.append(Spacer(1, 0.2*inch))
-            
-            # Titre de l'objectif (reformulé par l'IA)
-            story.append(Paragraph(f"<b>{goal_clean}</b>", 
-                                  ParagraphStyle('ObjTitle', parent=styles['Heading3'], fontSize=18, 
-                                                textColor=colors.HexColor('#2c3e50'), spaceAfter=12, spaceBefore=8,
-                                                fontName='Helvetica-Bold', alignment=TA_CENTER)))
-            
-            # Afficher le texte original si différent du goal reformulé
-            if original_text and original_text.strip() and original_text.strip() != goal_clean:
-                original_clean = clean_text_for_pdf(original_text)
-                story.append(Paragraph(f"<i>Objectif original : \"{original_clean}\"</i>", 
-                                      ParagraphStyle('OriginalText', parent=styles['Italic'], fontSize=9, 
-                                                    textColor=colors.HexColor('#666'), spaceAfter=15, 
-                                                    alignment=TA_CENTER)))
-            
-            story.append(Spacer(1, 0.25*inch))
-            
-            # Tableau SMART amélioré - utiliser Paragraph pour gérer les retours à la ligne
-            def prepare_table_cell(text):
-                """Prépare une cellule de tableau avec Paragraph pour gérer les retours à la ligne"""
-                text = clean_text_for_pdf(text)
-                if not text or text.strip() == '':
-                    # Au lieu de "Non défini", générer un texte structuré basé sur l'objectif
-                    goal_for_context = clean_text_for_pdf(smart_data.get('goal', smart_data.get('original_text', 'Objectif')))
-                    return Paragraph(f'À compléter pour : {goal_for_context[:50]}...', 
-                                    ParagraphStyle('CellText', parent=styles['Normal'], fontSize=9, 
-                                                  textColor=colors.HexColor('#999'), fontStyle='italic'))
-                # Remplacer les retours à la ligne par <br/>
-                text = text.replace('\n', '<br/>')
-                return Paragraph(text, ParagraphStyle('CellText', parent=styles['Normal'], fontSize=10, leading=12))
-            
-            smart_table_data = [
-                [Paragraph('<b>Critère</b>', ParagraphStyle('HeaderText', parent=styles['Normal'], fontSize=11, fontName='Helvetica-Bold')), 
-                 Paragraph('<b>Détails</b>', ParagraphStyle('HeaderText', parent=styles['Normal'], fontSize=11, fontName='Helvetica-Bold'))],
-                [Paragraph('<b>S - Spécifique</b>', ParagraphStyle('LabelText', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold')), 
-                 prepare_table_cell(smart_data.get('specific', 'Non défini'))],
-                [Paragraph('<b>M - Mesurable</b>', ParagraphStyle('LabelText', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold')), 
-                 prepare_table_cell(smart_data.get('measurable', 'Non défini'))],
-                [Paragraph('<b>A - Atteignable</b>', ParagraphStyle('LabelText', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold')), 
-                 prepare_table_cell(smart_data.get('achievable', 'Non défini'))],
-                [Paragraph('<b>R - Pertinent</b>', ParagraphStyle('LabelText', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold')), 
-                 prepare_table_cell(smart_data.get('relevant', 'Non défini'))],
-                [Paragraph('<b>T - Temporel</b>', ParagraphStyle('LabelText', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold')), 
-                 prepare_table_cell(smart_data.get('time_bound', 'Non défini'))],
-            ]
-            
-            smart_table = Table(smart_table_data, colWidths=[1.8*inch, 4.2*inch], repeatRows=1)
-            # Style amélioré pour meilleure lisibilité
-            smart_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#e8f4f8')),  # Colonne gauche avec fond léger
-                ('BACKGROUND', (1, 1), (-1, -1), colors.white),  # Colonne droite blanche
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#dee2e6')),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 8),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-                ('TOPPADDING', (0, 1), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),  # Alternance de couleurs
-            ]))
-            story.append(smart_table)
-            
-            # Analyse améliorée - texte complet SPÉCIFIQUE à cet objectif dans une boîte
-            if smart_data.get('analysis'):
-                story.append(Spacer(1, 0.25*inch))
-                analysis_text = clean_text_for_pdf(smart_data.get('analysis', ''))
-                # Remplacer les retours à la ligne par <br/>
-                analysis_text = analysis_text.replace('\n', '<br/>')
-                
-                # Boîte pour l'analyse avec fond coloré - Analyse SPÉCIFIQUE de cet objectif
-                analysis_title = f"<b>Analyse Spécifique de l'Objectif #{obj_id}:</b>"
-                full_analysis = f"{analysis_title}<br/><br/>{analysis_text}"
-                analysis_box_data = [[Paragraph(full_analysis, ParagraphStyle(
-                    'AnalysisText', parent=styles['Normal'], fontSize=10, 
-                    textColor=colors.HexColor('#495057'),
-                    leading=13))]]
-                analysis_box = Table(analysis_box_data, colWidths=[6*inch])
-                analysis_box.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fff9e6')),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 15),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-                    ('TOPPADDING', (0, 0), (-1, -1), 12),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                    ('GRID', (0, 0), (-1, -1), 1.5, colors.HexColor('#ffd700')),
-                ]))
-                story.append(analysis_box)
-            
-            # Espacement final après chaque objectif - TRAITEMENT INDIVIDUEL
-            story.append(Spacer(1, 0.4*inch))
-            
-            # Note de traitement individuel pour chaque objectif (sauf le dernier)
-            if idx < len(objectives_list):
-                note_text = f"<i>Objectif #{obj_id} traité individuellement par l'IA</i>"
-                story.append(Paragraph(note_text, ParagraphStyle(
-                    'ObjNote', parent=styles['Italic'], fontSize=8, 
-                    textColor=colors.HexColor('#999'), alignment=TA_CENTER, spaceAfter=15)))
-            
-            # Saut de page après chaque objectif (sauf le dernier) si on a plusieurs objectifs
-            # Cela permet à chaque objectif d'avoir sa propre page pour un meilleur traitement individuel
-            if idx < len(objectives_list) and len(objectives_list) > 1:
-                story.append(PageBreak())
-        
-        # Saut de page seulement si on a aussi une section IKIGAI
-        if ikigai_data and (ikigai_data.get('what_you_love') or ikigai_data.get('what_you_are_good_at')):
-            story.append(PageBreak())
-    
-    # Section IKIGAI - Style amélioré
-    if ikigai_data and (ikigai_data.get('what_you_love') or ikigai_data.get('what_you_are_good_at')):
-        story.append(Paragraph("Mon IKIGAI", heading_style))
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Tableau IKIGAI amélioré - utiliser Paragraph pour gérer les retours à la ligne
-        def prepare_table_cell(text):
-            """Prépare une cellule de tableau avec Paragraph pour gérer les retours à la ligne"""
-            text = clean_text_for_pdf(text)
-            if not text or text.strip() == '':
-                return Paragraph('Non défini', ParagraphStyle('CellText', parent=styles['Normal'], fontSize=10))
-            # Remplacer les retours à la ligne par <br/>
-            text = text.replace('\n', '<br/>')
-            return Paragraph(text, ParagraphStyle('CellText', parent=styles['Normal'], fontSize=10, leading=12))
-        
-        ikigai_table_data = [
-            [Paragraph('<b>Élément</b>', ParagraphStyle('HeaderText', parent=styles['Normal'], fontSize=11, fontName='Helvetica-Bold')), 
-             Paragraph('<b>Détails</b>', ParagraphStyle('HeaderText', parent=styles['Normal'], fontSize=11, fontName='Helvetica-Bold'))],
-            [Paragraph('Ce que j\'aime', ParagraphStyle('LabelText', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold')), 
-             prepare_table_cell(ikigai_data.get('what_you_love', 'Non défini'))],
-            [Paragraph('Ce en quoi je suis doué', ParagraphStyle('LabelText', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold')), 
-             prepare_table_cell(ikigai_data.get('what_you_are_good_at', 'Non défini'))],
-            [Paragraph('Ce dont le monde a besoin', ParagraphStyle('LabelText', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold')), 
-             prepare_table_cell(ikigai_data.get('what_world_needs', 'Non défini'))],
-            [Paragraph('Ce pour quoi je peux être payé', ParagraphStyle('LabelText', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold')), 
-             prepare_table_cell(ikigai_data.get('what_you_can_be_paid_for', 'Non défini'))],
-        ]
-        
-        ikigai_table = Table(ikigai_table_data, colWidths=[2*inch, 4*inch], repeatRows=1)
-        ikigai_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e74c3c')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('TOPPADDING', (0, 0), (-1, 0), 8),
-            ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#ffe8e8')),  # Colonne gauche avec fond rose léger
-            ('BACKGROUND', (1, 1), (-1, -1), colors.white),  # Colonne droite blanche
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#dee2e6')),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 1), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#fff5f5')]),  # Alternance de couleurs
-        ]))
-        story.append(ikigai_table)
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Analyse IKIGAI améliorée - texte complet sans limitation
-        if ikigai_data.get('analysis'):
-            analysis_text = clean_text_for_pdf(ikigai_data.get('analysis', ''))
-            # Remplacer les retours à la ligne par <br/>
-            analysis_text = analysis_text.replace('\n', '<br/>')
-            
-            story.append(Paragraph("<b>Analyse IKIGAI:</b>", ParagraphStyle(
-                'IKIGAITitle', parent=styles['Heading4'], fontSize=11, 
-                textColor=colors.HexColor('#2c3e50'), spaceAfter=5, fontName='Helvetica-Bold')))
-            
-            story.append(Paragraph(analysis_text, ParagraphStyle(
-                'IKIGAIText',
-                parent=styles['Normal'],
-                fontSize=10,
-                textColor=colors.HexColor('#495057'),
-                leftIndent=10,
-                spaceAfter=8,
-                leading=13
-            )))
-    
-    # Footer amélioré
-    story.append(Spacer(1, 0.4*inch))
-    story.append(Paragraph("<i>Document généré par BuildNovaG Objectifs-AI</i>", 
-                          ParagraphStyle('FooterStyle', parent=styles['Italic'], alignment=TA_CENTER, fontSize=10, textColor=colors.HexColor('#999'))))
-    story.append(Spacer(1, 0.15*inch))
-    story.append(Paragraph("<b>www.buildnovag.fr</b>", 
-                          ParagraphStyle('FooterLink', parent=styles['Normal'], alignment=TA_CENTER, fontSize=11, textColor=colors.HexColor('#667eea'), fontName='Helvetica-Bold')))
-    
-    # Génération optimisée avec gestion d'erreurs robuste
+        payload = build_mistral_payload(prompt, temperature, max_tokens, json_mode, system)
+        response = await current_async_client().post(api_key, MISTRAL_API_URL, json=payload,
+                                                      timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+        return read_mistral_response(response, api_key, key_type)
+    
+    except httpx.TimeoutException:
+        if read_timeout < timeout:
+            print(f"API Mistral ({key_type}) : Échéance de la requête atteinte ({read_timeout:.1f}s) - appel abandonné")
+            return MistralReply(error=ERROR_CANCELLED)
+        print(f"API Mistral ({key_type}) : Timeout - L'API prend trop de temps à répondre")
+        return MistralReply(error=ERROR_TIMEOUT)
+    
+    except httpx.HTTPError as e:
+        print(f"API Mistral ({key_type}) : Erreur de connexion: {str(e)}")
+        return MistralReply(error=ERROR_OTHER)
+
+async def call_next_key_async(prompt, temperature, max_tokens, tried, timeout=8, json_mode=False, deadline=None,
+                              system=None):
+    """Version asynchrone de call_next_key"""
+    deadline = ensure_deadline(deadline)
+    if not deadline.can_attempt():
+        return None
+    pooled = await key_pool.acquire_async(exclude=tried, timeout=deadline.wait_budget(2.0))
+    if pooled is None:
+        return None
+    tried.add(pooled.api_key)
+    reply = MistralReply(error=ERROR_OTHER)
     try:
-        doc.build(story)
-    except Exception as e:
-        # En cas d'erreur, logger et réessayer
-        print(f"Erreur génération PDF: {e}")
-        import traceback
-        traceback.print_exc()
-        raise Exception(f"Impossible de générer le PDF: {str(e)}")
+        if await rate_limiter.acquire_async(pooled.api_key, max_wait=deadline.wait_budget(rate_limiter.max_wait)):
+            reply = await request_mistral_async(prompt, pooled.api_key, temperature, max_tokens, timeout, json_mode,
+                                                deadline, system)
+        else:
+            print(f"API Mistral ({pooled.label}) : Débit local atteint - requête non envoyée")
+            reply = MistralReply(error=ERROR_THROTTLED)
+    except asyncio.CancelledError:
+        reply = MistralReply(error=ERROR_CANCELLED)
+        raise
+    finally:
+        key_pool.release(pooled, reply.error, reply.retry_after)
+    if reply:
+        print(f"API Mistral ({pooled.label}) : Succès - Réponse reçue")
+    else:
+        print(f"API Mistral ({pooled.label}) : Échec")
+    return reply
+
+async def call_key_pool_async(prompt, temperature, max_tokens, timeout=8, json_mode=False, deadline=None,
+                              system=None):
+    """Version asynchrone de call_key_pool"""
+    deadline = ensure_deadline(deadline)
+    tried = set()
+    reply = None
+    
+    if MISTRAL_HEDGING and len(key_pool) >= 2:
+        reply, _ = await hedger.call_async(
+            lambda: call_next_key_async(prompt, temperature, max_tokens, tried, timeout, json_mode, deadline, system),
+            lambda: call_next_key_async(prompt, temperature, max_tokens, tried, timeout, json_mode, deadline, system),
+        )
+    
+    while not reply and len(tried) < len(key_pool):
+        if not deadline.can_attempt():
+            print(f"API Mistral : plus assez de temps pour une nouvelle tentative ({deadline})")
+            break
+        before = len(tried)
+        reply = await call_next_key_async(prompt, temperature, max_tokens, tried, timeout, json_mode, deadline,
+                                          system)
+        if len(tried) == before:
+            break
+    
+    return reply or None
+
+async def call_ai_api_async(prompt, temperature=0.7, max_tokens=1200, timeout=8, json_mode=False, validate=None, call_type=None,
+                            deadline=None, system=None):
+    """Version asynchrone de call_ai_api (cache, pool de clés, hedging, débit, max_tokens adaptatif, échéance)"""
+    deadline = ensure_deadline(deadline)
+    cache_key, cached = lookup_llm_cache(prompt, temperature, max_tokens, json_mode, system)
+    if cached:
+        return cached
+    
+    if len(key_pool) == 0:
+        print("Aucune clé API Mistral configurée")
+        return None
+    
+    return await llm_flight.do_async(
+        cache_key,
+        lambda: fetch_ai_response_async(prompt, temperature, max_tokens, timeout, json_mode, validate, call_type,
+                                        deadline, cache_key, system),
+        timeout=deadline.remaining(),
+        lookup=lambda: llm_cache.get(cache_key) if llm_cache is not None else None,
+    )
+
+async def fetch_ai_response_async(prompt, temperature, max_tokens, timeout, json_mode, validate, call_type, deadline,
+                                  cache_key, system=None):
+    """Version asynchrone de fetch_ai_response"""
+    budget = token_budget.max_tokens_for(call_type, max_tokens)
+    reply = await call_key_pool_async(prompt, temperature, budget, timeout, json_mode, deadline, system)
+    if reply:
+        token_budget.record(call_type, reply.usage, reply.finish_reason)
+        if reply.finish_reason == FINISH_LENGTH and budget < max_tokens and deadline.can_attempt():
+            print(f"Réponse tronquée à {budget} tokens : nouvelle tentative avec max_tokens={max_tokens}")
+            token_budget.record_retry(call_type)
+            retry = await call_key_pool_async(prompt, temperature, max_tokens, timeout, json_mode, deadline, system)
+            if retry:
+                token_budget.record(call_type, retry.usage, retry.finish_reason)
+                reply = retry
+    
+    if reply:
+        result = reply.content
+        if llm_cache is not None and reply.finish_reason != FINISH_LENGTH and (validate is None or validate(result)):
+            llm_cache.set(cache_key, result)
+        return result
+    
+    print("Toutes les clés API Mistral disponibles ont échoué")
+    return None
+
+async def repair_smart_response_async(result, objective_text, deadline, system=SMART_SYSTEM_PROMPT):
+    """Version asynchrone de repair_smart_response"""
+    plan = plan_smart_repair(result, objective_text)
+    if plan is None or not deadline.can_attempt():
+        return None
+    prompt, fields, missing = plan
+    repair = await call_ai_api_async(prompt, max_tokens=SMART_REPAIR_FIELD_TOKENS * len(missing), json_mode=True,
+                                     validate=lambda text: all(field in partial_smart_fields(text)[0] for field in missing),
+                                     call_type=f'smart_repair_{len(missing)}', deadline=deadline, system=system)
+    return merge_smart_repair(repair, fields, missing)
+
+async def transform_objective_to_smart_async(objective_text, objective_number=None, total_objectives=None, deadline=None):
+    """Version asynchrone de transform_objective_to_smart"""
+    cached = cached_smart_objective(objective_text)
+    if cached:
+        return cached
+    deadline = ensure_deadline(deadline)
+    smart_obj = await objective_flight.do_async(
+        objective_cache.key_for(objective_text) or objective_text,
+        lambda: generate_smart_objective_async(objective_text, objective_number, total_objectives, deadline),
+        timeout=deadline.remaining(),
+    )
+    return dict(smart_obj) if smart_obj else salvage_smart_response(None, objective_text)
+
+async def generate_smart_objective_async(objective_text, objective_number, total_objectives, deadline):
+    """Version asynchrone de generate_smart_objective"""
+    prompt = build_smart_prompt(objective_text, objective_number, total_objectives)
+    domain, system, call_type = smart_route(objective_text)
+    started = time.perf_counter()
     
-    buffer.seek(0)
+    result = None
+    smart_obj = None
+    for attempt in range(SMART_MAX_ATTEMPTS):
+        if attempt and not deadline.can_attempt():
+            print(f"Objectif SMART : pas de nouvelle tentative, échéance trop proche ({deadline})")
+            break
+        result = await call_ai_api_async(prompt, json_mode=True, validate=is_valid_smart_json, call_type=call_type,
+                                         deadline=deadline, system=system)
+        if not result:
+            break
+        smart_obj = check_smart_response(result, attempt)
+        if not smart_obj and not attempt:
+            smart_obj = await repair_smart_response_async(result, objective_text, deadline, system)
+        if smart_obj:
+            remember_smart_objective(objective_text, smart_obj)
+            break
     
-    # Vérifier que le buffer contient des données
-    if buffer.getvalue() == b'':
-        raise Exception("Le PDF généré est vide")
+    observe_smart_route(domain, started)
+    return smart_obj or salvage_smart_response(result, objective_text)
+
+async def transform_objectives_batch_async(batch, total_objectives, deadline=None):
+    """Version asynchrone de transform_objectives_batch"""
+    cached, batch = split_cached_batch(batch)
+    if not batch:
+        return cached
+    prompt = build_smart_batch_prompt(batch, total_objectives)
+    result = await call_ai_api_async(prompt, max_tokens=SMART_BATCH_ITEM_TOKENS * len(batch), timeout=SMART_BATCH_TIMEOUT,
+                                     json_mode=True, validate=lambda result: len(parse_smart_batch_response(result, batch)) == len(batch),
+                                     call_type=f'smart_batch_{len(batch)}', deadline=deadline, system=SMART_SYSTEM_PROMPT)
+    parsed = parse_smart_batch_response(result, batch)
+    if len(parsed) < len(batch):
+        missing = [idx for idx, _ in batch if idx not in parsed]
+        print(f"Lot {[idx for idx, _ in batch]} : objectif(s) {missing} absent(s) ou incomplet(s), traitement individuel")
+    store_smart_batch(batch, parsed)
+    parsed.update(cached)
+    return parsed
+
+async def process_objectives_async(valid_objectives, deadline=None):
+    """Traite tous les objectifs en parallèle (un seul thread), bornés par ASYNC_MAX_CONCURRENCY"""
+    total_objectives = len(valid_objectives)
+    semaphore = asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
     
-    return buffer
+    async def process_single_objective(idx, obj_text):
+        async with semaphore:
+            try:
+                smart_obj = await transform_objective_to_smart_async(
+                    obj_text,
+                    objective_number=idx,
+                    total_objectives=total_objectives,
+                    deadline=deadline
+                )
+                smart_obj['objective_id'] = idx
+                smart_obj['original_text'] = obj_text
+                return smart_obj
+            except Exception as e:
+                print(f"Erreur lors du traitement de l'objectif #{idx}: {e}")
+                return fallback_smart_objective(idx, obj_text)
+    
+    async def process_batch(batch):
+        if len(batch) == 1:
+            return [await process_single_objective(*batch[0])]
+        async with semaphore:
+            try:
+                parsed = await transform_objectives_batch_async(batch, total_objectives, deadline)
+            except Exception as e:
+                print(f"Erreur lors du traitement du lot {[idx for idx, _ in batch]}: {e}")
+                parsed = {}
+        results = []
+        for idx, obj_text in batch:
+            if idx in parsed:
+                parsed[idx]['objective_id'] = idx
+                parsed[idx]['original_text'] = obj_text
+                results.append(parsed[idx])
+        # Objectifs absents ou incomplets du lot : un appel par objectif, en parallèle
+        results.extend(await asyncio.gather(*(
+            process_single_objective(idx, obj_text)
+            for idx, obj_text in batch if idx not in parsed
+        )))
+        return results
+    
+    objectives_with_index = list(enumerate(valid_objectives, 1))
+    async with async_mistral_client(max_connections=ASYNC_MAX_CONCURRENCY):
+        batches = await asyncio.gather(*(
+            process_batch(batch)
+            for batch in iter_batches(objectives_with_index, SMART_BATCH_SIZE)
+        ))
+    return sorted((smart_obj for batch in batches for smart_obj in batch),
+                  key=lambda smart_obj: smart_obj['objective_id'])
+
+async def generate_ikigai_analysis_async(what_you_love, what_you_are_good_at, what_world_needs, what_you_can_be_paid_for,
+                                         deadline=None):
+    """Version asynchrone de generate_ikigai_analysis"""
+    prompt = build_ikigai_prompt(what_you_love, what_you_are_good_at, what_world_needs, what_you_can_be_paid_for)
+    async with async_mistral_client(max_connections=1):
+        result = await call_ai_api_async(prompt, validate=is_valid_ikigai_analysis, call_type='ikigai',
+                                         deadline=deadline, system=IKIGAI_SYSTEM_PROMPT)
+    return finalize_ikigai_analysis(result, what_you_love, what_you_are_good_at, what_world_needs, what_you_can_be_paid_for)
+
+def fallback_smart_objective(idx, obj_text):
+    """Objectif SMART basique mais structuré, utilisé quand le traitement par l'IA a échoué"""
+    return {
+        "objective_id": idx,
+        "original_text": obj_text,
+        "goal": obj_text,
+        "specific": f"Objectif spécifique : {obj_text}. À préciser avec des détails concrets sur qui, quoi, où, comment, pourquoi. Détailler les actions précises à entreprendre.",
+        "measurable": f"Métriques à définir pour mesurer le succès de : {obj_text}. Déterminer des indicateurs quantifiables avec des chiffres, pourcentages ou quantités précises.",
+        "achievable": f"Évaluer la faisabilité de : {obj_text}. Identifier les ressources, compétences, soutiens et moyens disponibles pour atteindre cet objectif de manière réaliste.",
+        "relevant": f"Justifier l'importance de : {obj_text}. Aligner avec les valeurs personnelles, aspirations et objectifs de vie. Définir l'impact positif attendu.",
+        "time_bound": f"Calendrier à définir pour : {obj_text}. Fixer des dates précises en 2026 (jour/mois/2026) pour l'objectif final et des jalons intermédiaires pour suivre la progression tout au long de 2026.",
+        "analysis": f"Analyse de l'objectif : {obj_text}. Pour réussir cet objectif, il est important de : 1) Définir des étapes clés concrètes, 2) Identifier les ressources nécessaires, 3) Anticiper les défis potentiels, 4) Planifier les actions concrètes, 5) Suivre régulièrement la progression. Note : L'IA n'a pas pu traiter cet objectif automatiquement, veuillez compléter les détails manuellement."
+    }
+
+# PDF : flux binaires sauf PDF_ASCII85 ; rendu dans un pool de processus préchauffés, démarré au premier PDF,
+# file bornée (503 au-delà)
+PDF_ASCII85 = getattr(config, 'PDF_ASCII85', False)
+configure_pdf_output(PDF_ASCII85)
+pdf_pool = PdfRenderPool(
+    workers=getattr(config, 'PDF_POOL_WORKERS', 2),
+    max_queue=getattr(config, 'PDF_POOL_QUEUE', 8),
+    timeout=getattr(config, 'PDF_POOL_TIMEOUT', 30.0),
+    ascii85=PDF_ASCII85,
+    spool_threshold=getattr(config, 'PDF_SPOOL_THRESHOLD', 256 * 1024),
+)
+atexit.register(pdf_pool.shutdown)
 
 @app.route('/')
 def index():
@@ -885,23 +1236,39 @@ def index():
     response.headers['Expires'] = '0'
     return response
 
-@app.route('/api/process-objectives', methods=['POST'])
-def process_objectives():
-    """Transforme les objectifs bruts en format SMART - Traitement individuel et spécifique pour chaque objectif"""
-    data = request.json
-    objectives = data.get('objectives', [])
-    
-    if not objectives:
-        return jsonify({'error': 'Aucun objectif fourni'}), 400
-    
-    # Filtrer les objectifs vides
-    valid_objectives = [obj.strip() for obj in objectives if obj.strip()]
-    
-    if not valid_objectives:
-        return jsonify({'error': 'Aucun objectif valide fourni'}), 400
-    
+@app.route('/api/stats', methods=['GET'])
+def stats():
+    """Compteurs de performance du processus (connexions HTTP, cache IA, pool de clés, débit, validation, tokens, hedging, PDF)"""
+    return jsonify({
+        'http_pool': mistral_pool.stats(),
+        'llm_cache': llm_cache.stats() if llm_cache is not None else None,
+        'objective_cache': objective_cache.stats(),
+        'single_flight': {'llm': llm_flight.stats(), 'objectives': objective_flight.stats()},
+        'jobs': _job_runner.store.counts() if _job_runner is not None else None,
+        'similarity_index': similarity_index.stats() if similarity_index is not None else None,
+        'key_pool': key_pool.stats(),
+        'rate_limiter': rate_limiter.stats(),
+        'smart_validation': validation_stats.snapshot(),
+        'prompt_templates': TEMPLATE_TOKENS,
+        'domains': dict(domain_classifier.stats(), templates=DOMAIN_TEMPLATE_TOKENS) if domain_classifier is not None else None,
+        'token_usage': token_budget.stats(),
+        'pdf_pool': pdf_pool.stats(),
+        'hedging': dict(hedger.stats.snapshot(), enabled=bool(MISTRAL_HEDGING),
+                        current_delay=round(hedger.hedge_delay(), 3))
+    })
+
+def wants_ndjson():
+    """Le client demande-t-il une réponse NDJSON (?stream=ndjson ou Accept: application/x-ndjson) ?"""
+    return (request.args.get('stream') == 'ndjson'
+            or 'application/x-ndjson' in request.headers.get('Accept', ''))
+
+def iter_smart_objectives(valid_objectives, deadline=None):
+    """Produit (index, objectif SMART) dans l'ordre où les objectifs se terminent
+
+    Utilisé par /api/process-objectives (réponse JSON ou NDJSON) et par les tâches
+    en arrière-plan (jobs).
+    """
     total_objectives = len(valid_objectives)
-    smart_objectives = []
     
     # Fonction pour traiter un objectif individuellement
     def process_single_objective(idx_obj_tuple):
@@ -911,7 +1278,8 @@ def process_objectives():
             smart_obj = transform_objective_to_smart(
                 obj_text, 
                 objective_number=idx, 
-                total_objectives=total_objectives
+                total_objectives=total_objectives,
+                deadline=deadline
             )
             
             # Ajouter un identifiant unique pour chaque objectif
@@ -927,49 +1295,123 @@ def process_objectives():
             traceback.print_exc()
             
             # Générer un objectif SMART basique mais structuré
-            return (idx, {
-                "objective_id": idx,
-                "original_text": obj_text,
-                "goal": obj_text,
-                "specific": f"Objectif spécifique : {obj_text}. À préciser avec des détails concrets sur qui, quoi, où, comment, pourquoi. Détailler les actions précises à entreprendre.",
-                "measurable": f"Métriques à définir pour mesurer le succès de : {obj_text}. Déterminer des indicateurs quantifiables avec des chiffres, pourcentages ou quantités précises.",
-                "achievable": f"Évaluer la faisabilité de : {obj_text}. Identifier les ressources, compétences, soutiens et moyens disponibles pour atteindre cet objectif de manière réaliste.",
-                "relevant": f"Justifier l'importance de : {obj_text}. Aligner avec les valeurs personnelles, aspirations et objectifs de vie. Définir l'impact positif attendu.",
-                "time_bound": f"Calendrier à définir pour : {obj_text}. Fixer des dates précises en 2026 (jour/mois/2026) pour l'objectif final et des jalons intermédiaires pour suivre la progression tout au long de 2026.",
-                "analysis": f"Analyse de l'objectif : {obj_text}. Pour réussir cet objectif, il est important de : 1) Définir des étapes clés concrètes, 2) Identifier les ressources nécessaires, 3) Anticiper les défis potentiels, 4) Planifier les actions concrètes, 5) Suivre régulièrement la progression. Note : L'IA n'a pas pu traiter cet objectif automatiquement, veuillez compléter les détails manuellement."
-            })
-    
-    # Traitement PARALLÈLE pour accélérer (max 3 threads pour éviter de surcharger l'API)
-    max_workers = min(3, total_objectives)  # Maximum 3 objectifs en parallèle
+            return (idx, fallback_smart_objective(idx, obj_text))
+    
+    # Traitement PARALLÈLE pour accélérer ; le débit global vers l'API est borné par rate_limiter
+    max_workers = min(OBJECTIVES_MAX_WORKERS, total_objectives)
     objectives_with_index = [(idx, obj_text) for idx, obj_text in enumerate(valid_objectives, 1)]
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Soumettre toutes les tâches
-        future_to_index = {executor.submit(process_single_objective, obj_data): obj_data[0] 
-                          for obj_data in objectives_with_index}
+    def process_one(obj_data):
+        return [process_single_objective(obj_data)]
+    
+    def process_batch(batch):
+        # Lot traité en un appel : seuls les objectifs complets sont retournés
+        results = []
+        for idx, smart_obj in transform_objectives_batch(batch, total_objectives, deadline).items():
+            smart_obj['objective_id'] = idx
+            smart_obj['original_text'] = valid_objectives[idx - 1]
+            results.append((idx, smart_obj))
+        return results
+    
+    def iter_results():
+        """Produit (index, objectif SMART) dans l'ordre où les objectifs se terminent"""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Soumettre toutes les tâches : un lot par appel en mode groupé, sinon un objectif par appel
+            future_to_batch = {}
+            for batch in iter_batches(objectives_with_index, SMART_BATCH_SIZE):
+                if len(batch) > 1:
+                    future_to_batch[executor.submit(process_batch, batch)] = batch
+                else:
+                    future_to_batch[executor.submit(process_one, batch[0])] = batch
+            
+            # Collecter les résultats au fur et à mesure
+            while future_to_batch:
+                done, _ = wait(future_to_batch, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = future_to_batch.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        print(f"Erreur critique pour l'objectif #{batch[0][0]}: {e}")
+                        if len(batch) > 1:
+                            # Lot en erreur : chaque objectif est refait individuellement
+                            results = []
+                        else:
+                            # Créer un objectif par défaut en cas d'erreur critique
+                            idx, obj_text = batch[0]
+                            results = [(idx, fallback_smart_objective(idx, obj_text))]
+                    
+                    yield from results
+                    
+                    # Objectifs absents ou incomplets d'un lot : nouvelle tentative, un appel par objectif
+                    returned = {idx for idx, _ in results}
+                    for obj_data in batch:
+                        if obj_data[0] not in returned:
+                            future_to_batch[executor.submit(process_one, obj_data)] = [obj_data]
+    
+    yield from iter_results()
+
+def wants_job():
+    """Le client demande-t-il un traitement en arrière-plan (?mode=job ou Prefer: respond-async) ?
+
+    Mode tâche désactivé (JOB_MODE_ENABLED) : demande ignorée, traitement dans la requête (JSON ou NDJSON)
+    plutôt qu'un identifiant de tâche qui ne serait jamais exécutée.
+    """
+    if not JOB_MODE_ENABLED:
+        return False
+    return (request.args.get('mode') == 'job'
+            or 'respond-async' in request.headers.get('Prefer', ''))
+
+def submit_objectives_job(valid_objectives):
+    """Met le traitement des objectifs en file et retourne l'identifiant de la tâche"""
+    def run(emit):
+        # Pas d'échéance de requête : chaque appel Mistral reste borné par son propre timeout
+        for idx, smart_obj in iter_smart_objectives(valid_objectives):
+            emit(idx, smart_obj)
+    return get_job_runner().submit(len(valid_objectives), run)
+
+@app.route('/api/process-objectives', methods=['POST'])
+def process_objectives():
+    """Transforme les objectifs bruts en format SMART - Traitement individuel et spécifique pour chaque objectif"""
+    data = request.json
+    objectives = data.get('objectives', [])
+    
+    if not objectives:
+        return jsonify({'error': 'Aucun objectif fourni'}), 400
+    
+    # Filtrer les objectifs vides
+    valid_objectives = [obj.strip() for obj in objectives if obj.strip()]
+    
+    if not valid_objectives:
+        return jsonify({'error': 'Aucun objectif valide fourni'}), 400
+    
+    # Mode tâche : réponse immédiate avec l'identifiant, résultats à suivre sur /api/jobs/<id>
+    if wants_job():
+        job_id = submit_objectives_job(valid_objectives)
+        status_url = url_for('job_status', job_id=job_id)
+        return jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'total': len(valid_objectives),
+            'status_url': status_url
+        }), 202, {'Location': status_url}
+    
+    # Échéance commune à tous les objectifs : passé ce délai, chacun reçoit son objectif de repli
+    deadline = new_request_deadline()
+    
+    # Mode streaming : une ligne NDJSON par objectif, envoyée dès qu'il est terminé
+    if wants_ndjson():
+        def generate():
+            for _, smart_obj in iter_smart_objectives(valid_objectives, deadline):
+                yield json.dumps(smart_obj, ensure_ascii=False) + "\n"
         
-        # Collecter les résultats au fur et à mesure
-        results = {}
-        for future in as_completed(future_to_index):
-            try:
-                idx, smart_obj = future.result()
-                results[idx] = smart_obj
-            except Exception as e:
-                idx = future_to_index[future]
-                print(f"Erreur critique pour l'objectif #{idx}: {e}")
-                # Créer un objectif par défaut en cas d'erreur critique
-                obj_text = valid_objectives[idx - 1]
-                results[idx] = {
-                    "objective_id": idx,
-                    "original_text": obj_text,
-                    "goal": obj_text,
-                    "specific": f"Objectif spécifique : {obj_text}. À préciser avec des détails concrets.",
-                    "measurable": f"Métriques à définir pour : {obj_text}.",
-                    "achievable": f"Évaluer la faisabilité de : {obj_text}.",
-                    "relevant": f"Justifier l'importance de : {obj_text}.",
-                    "time_bound": f"Calendrier à définir pour : {obj_text}.",
-                    "analysis": f"Analyse de l'objectif : {obj_text}. Erreur lors du traitement."
-                }
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/x-ndjson',
+            headers={'X-Accel-Buffering': 'no'}
+        )
+    
+    results = dict(iter_smart_objectives(valid_objectives, deadline))
     
     # Trier les résultats par index pour maintenir l'ordre
     smart_objectives = [results[idx] for idx in sorted(results.keys())]
@@ -980,16 +1422,106 @@ def process_objectives():
         'message': f'{len(smart_objectives)} objectif(s) traité(s) individuellement'
     })
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """État d'une tâche de traitement des objectifs et objectifs SMART déjà produits (dans l'ordre)"""
+    if not JOB_MODE_ENABLED:
+        return jsonify({'error': 'Mode tâche désactivé sur ce serveur (JOB_MODE_ENABLED)'}), 501
+    job = get_job_runner().store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Tâche inconnue ou expirée'}), 404
+    smart_objectives = job.pop('results')
+    return jsonify(dict(
+        job,
+        objectives=smart_objectives,
+        message=f"{job['completed']}/{job['total']} objectif(s) traité(s)"
+    ))
+
 @app.route('/api/analyze-ikigai', methods=['POST'])
 def analyze_ikigai():
     """Génère l'analyse IKIGAI à partir des réponses simples"""
     data = request.json
     analysis = generate_ikigai_analysis(
+        data.get('what_you_love', ''),
+        data.get('what_you_are_good_at', ''),
+        data.get('what_world_needs', ''),
+        data.get('what_you_can_be_paid_for', ''),
+        deadline=new_request_deadline()
+    )
+    return jsonify({'analysis': analysis})
+
+def sse_event(event, data):
+    """Formate un événement Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/api/analyze-ikigai/stream', methods=['POST'])
+def analyze_ikigai_stream():
+    """Analyse IKIGAI diffusée au fil de l'eau (SSE) : un événement 'token' par fragment, puis 'done'"""
+    data = request.json or {}
+    answers = (
         data.get('what_you_love', ''),
         data.get('what_you_are_good_at', ''),
         data.get('what_world_needs', ''),
         data.get('what_you_can_be_paid_for', '')
     )
+    prompt = build_ikigai_prompt(*answers)
+    deadline = new_request_deadline()
+    
+    def generate():
+        parts = []
+        for delta in stream_ai_api(prompt, call_type='ikigai', deadline=deadline, system=IKIGAI_SYSTEM_PROMPT,
+                                   validate=is_valid_ikigai_analysis):
+            parts.append(delta)
+            yield sse_event('token', {'text': delta})
+        # Texte complet (ou analyse de repli) : c'est lui que le navigateur garde pour le PDF
+        analysis = finalize_ikigai_analysis(''.join(parts), *answers)
+        yield sse_event('done', {'analysis': analysis})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'X-Accel-Buffering': 'no'}  # Désactiver la mise en tampon des proxys
+    )
+
+@app.route('/api/async/process-objectives', methods=['POST'])
+async def process_objectives_async_route():
+    """Version asynchrone de /api/process-objectives : tous les objectifs partent en même temps"""
+    if httpx is None:
+        return jsonify({'error': 'Pipeline asynchrone indisponible (httpx non installé)'}), 501
+    
+    data = request.json
+    objectives = data.get('objectives', [])
+    
+    if not objectives:
+        return jsonify({'error': 'Aucun objectif fourni'}), 400
+    
+    valid_objectives = [obj.strip() for obj in objectives if obj.strip()]
+    
+    if not valid_objectives:
+        return jsonify({'error': 'Aucun objectif valide fourni'}), 400
+    
+    smart_objectives = await process_objectives_async(valid_objectives, new_request_deadline())
+    
+    return jsonify({
+        'objectives': smart_objectives,
+        'total_processed': len(smart_objectives),
+        'message': f'{len(smart_objectives)} objectif(s) traité(s) individuellement'
+    })
+
+@app.route('/api/async/analyze-ikigai', methods=['POST'])
+async def analyze_ikigai_async_route():
+    """Version asynchrone de /api/analyze-ikigai"""
+    if httpx is None:
+        return jsonify({'error': 'Pipeline asynchrone indisponible (httpx non installé)'}), 501
+    
+    data = request.json
+    analysis = await generate_ikigai_analysis_async(
+        data.get('what_you_love', ''),
+        data.get('what_you_are_good_at', ''),
+        data.get('what_world_needs', ''),
+        data.get('what_you_can_be_paid_for', ''),
+        deadline=new_request_deadline()
+    )
     return jsonify({'analysis': analysis})
 
 @app.route('/api/generate-pdf', methods=['POST'])
@@ -1006,34 +1538,34 @@ def generate_pdf():
         if not objectives and not ikigai_data:
             return jsonify({'error': 'Aucune donnée à générer. Veuillez d\'abord définir des objectifs ou compléter l\'IKIGAI.'}), 400
         
-        # Générer le PDF
-        pdf_buffer = create_pdf(objectives, ikigai_data)
-        
-        # Vérifier que le buffer contient des données
-        if not pdf_buffer:
-            return jsonify({'error': 'Le PDF généré est vide'}), 500
+        # Générer le PDF (pool de processus : file pleine -> 503 + Retry-After)
+        try:
+            pdf = pdf_pool.render(objectives, ikigai_data)
+        except PdfPoolFull as e:
+            response = jsonify({'error': 'Trop de PDF en cours de génération. Veuillez réessayer dans quelques secondes.'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        except PdfPoolTimeout as e:
+            return jsonify({'error': str(e)}), 504
         
-        # Obtenir la taille avant de seek pour éviter de relire
-        pdf_data = pdf_buffer.getvalue()
-        if pdf_data == b'':
+        if not pdf.size:
+            pdf.discard()
             return jsonify({'error': 'Le PDF généré est vide'}), 500
         
-        # Créer un nouveau buffer en mémoire pour la réponse
-        response_buffer = io.BytesIO(pdf_data)
-        response_buffer.seek(0)
-        
-        # Créer la réponse avec headers optimisés
-        response = send_file(
-            response_buffer,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name='mes_objectifs_annee.pdf'
-        )
+        # Créer la réponse sans recopier le document : bytes du rendu tels quels (send_file sur un BytesIO
+        # en ferait une copie), ou fichier temporaire envoyé par blocs puis supprimé à la fin de la réponse
+        # (pas de send_file : sa réponse direct_passthrough n'appelle pas les fonctions de call_on_close)
+        if pdf.data is not None:
+            response = Response(pdf.data, mimetype='application/pdf')
+        else:
+            response = Response(wrap_file(request.environ, pdf.open()), mimetype='application/pdf')
+            response.call_on_close(pdf.discard)
         
         # Ajouter des headers pour forcer le téléchargement et optimiser
         response.headers['Content-Disposition'] = 'attachment; filename=mes_objectifs_annee.pdf'
         response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Length'] = str(len(pdf_data))
+        response.headers['Content-Length'] = str(pdf.size)
         # Désactiver la mise en cache pour éviter les problèmes
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response.headers['Pragma'] = 'no-cache'
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'extraction JSON sur un corpus de réponses mal formées
+
+Pour chaque réponse de bench_json_corpus.json : chemin de récupération
+utilisé par json_extract, nombre de champs SMART récupérés et temps moyen
+d'analyse, comparés à l'ancienne chaîne (comptage d'accolades caractère par
+caractère, json.loads, puis une expression régulière non compilée par champ).
+
+Usage : python bench_json_extract.py [--repeat 2000]
+"""
+
+import argparse
+import json
+import re
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from json_extract import extract_json_object
+from smart_schema import SMART_FIELDS
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_json_corpus.json')
+
+
+def legacy_parse(result):
+    """Ancienne analyse de parse_smart_response (sans les valeurs de repli)"""
+    cleaned_result = result.strip()
+    cleaned_result = re.sub(r'```json\s*', '', cleaned_result, flags=re.IGNORECASE)
+    cleaned_result = re.sub(r'```\s*', '', cleaned_result)
+    cleaned_result = cleaned_result.strip()
+
+    start_idx = cleaned_result.find('{')
+    if start_idx != -1:
+        brace_count = 0
+        end_idx = start_idx
+        for i in range(start_idx, len(cleaned_result)):
+            if cleaned_result[i] == '{':
+                brace_count += 1
+            elif cleaned_result[i] == '}':
+                brace_count -= 1
+                if brace_count == 0:
+                    end_idx = i + 1
+                    break
+        if end_idx > start_idx:
+            try:
+                parsed = json.loads(cleaned_result[start_idx:end_idx])
+                if isinstance(parsed, dict) and 'goal' in parsed:
+                    return parsed, 'braces'
+            except ValueError:
+                pass
+
+    try:
+        parsed = json.loads(cleaned_result)
+        if isinstance(parsed, dict) and 'goal' in parsed:
+            return parsed, 'loads'
+    except ValueError:
+        pass
+
+    fields = {}
+    for field_name in SMART_FIELDS:
+        match = re.search(rf'"{field_name}"\s*:\s*"((?:[^"\\]|\\.)*)"', cleaned_result, re.DOTALL)
+        if match:
+            fields[field_name] = match.group(1).replace('\\"', '"').replace('\\n', '\n').replace('\\t', '\t')
+    if fields.get('goal'):
+        return fields, 'regex'
+    return None, 'failed'
+
+
+def new_parse(result):
+    extracted = extract_json_object(result)
+    value = extracted.value
+    if isinstance(value, dict) and isinstance(value.get('objectives'), list) and value['objectives']:
+        value = value['objectives'][0]
+    return (value if isinstance(value, dict) else None), extracted.path
+
+
+def count_fields(value):
+    if not isinstance(value, dict):
+        return 0
+    return sum(1 for field in SMART_FIELDS
+               if isinstance(value.get(field), str) and len(value[field].strip()) >= 5)
+
+
+def time_parse(parse, text, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parse(text)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--corpus', default=CORPUS_PATH)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding='utf-8') as handle:
+        corpus = json.load(handle)
+
+    print(f"{'réponse':<28} {'chemin':<22} {'champs':>7} {'µs':>8} │ {'ancien':<8} {'champs':>7} {'µs':>8}")
+    totals = {'new': 0.0, 'legacy': 0.0, 'new_fields': 0, 'legacy_fields': 0}
+    for case in corpus:
+        text = case['text']
+        value, path = new_parse(text)
+        legacy_value, legacy_path = legacy_parse(text)
+        new_us = time_parse(new_parse, text, args.repeat)
+        legacy_us = time_parse(legacy_parse, text, args.repeat)
+        fields, legacy_fields = count_fields(value), count_fields(legacy_value)
+        totals['new'] += new_us
+        totals['legacy'] += legacy_us
+        totals['new_fields'] += fields
+        totals['legacy_fields'] += legacy_fields
+        print(f"{case['name']:<28} {path:<22} {fields:>5}/7 {new_us:>8.1f} │ "
+              f"{legacy_path:<8} {legacy_fields:>5}/7 {legacy_us:>8.1f}")
+
+    print(f"{'total':<28} {'':<22} {totals['new_fields']:>7} {totals['new']:>8.1f} │ "
+          f"{'':<8} {totals['legacy_fields']:>7} {totals['legacy']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
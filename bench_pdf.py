@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la génération du PDF (create_pdf)
+
+Pour plusieurs nombres d'objectifs : durée de génération (médiane sur --repeat
+essais), coût marginal par objectif, pic mémoire Python (tracemalloc) et nombre
+de styles ReportLab (ParagraphStyle / TableStyle) créés pendant la génération.
+
+--route : pic mémoire d'une requête complète POST /api/generate-pdf dans le
+processus de l'application (requête, rendu s'il est local, réponse envoyée par
+blocs comme par le serveur), et mémoire retenue pendant l'envoi de la réponse
+(bornée par PDF_SPOOL_THRESHOLD). Le pool de processus suit PDF_POOL_WORKERS.
+
+Usage : python bench_pdf.py [--objectives 1,5,20] [--repeat 5]
+        PDF_POOL_WORKERS=0 python bench_pdf.py --route --objectives 5,50,200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(__file__))
+
+from reportlab.lib import styles as rl_styles
+from reportlab.platypus import tables as rl_tables
+
+import app as app_module
+from mock_mistral_server import fake_content, fake_smart_object
+
+OBJECTIVES = ["Courir un semi-marathon", "Apprendre l'espagnol", "Économiser 10 000 euros",
+              "Lancer mon entreprise de design", "Lire 24 livres"]
+
+
+def payload(count):
+    objectives = [dict(fake_smart_object(OBJECTIVES[number % len(OBJECTIVES)]),
+                       original_text=OBJECTIVES[number % len(OBJECTIVES)]) for number in range(count)]
+    ikigai = {
+        'what_you_love': "La cuisine, la randonnée et transmettre",
+        'what_you_are_good_at': "Organiser, expliquer simplement, écrire",
+        'what_world_needs': "Une alimentation plus saine et locale",
+        'what_you_can_be_paid_for': "Ateliers de cuisine, rédaction de contenus",
+        'analysis': fake_content("IKIGAI"),
+    }
+    return objectives, ikigai
+
+
+class StyleCounter:
+    """Compte les ParagraphStyle / TableStyle construits (instrumentation du benchmark)"""
+
+    def __init__(self):
+        self.paragraph_styles = 0
+        self.table_styles = 0
+
+    def __enter__(self):
+        self._paragraph_init = rl_styles.ParagraphStyle.__init__
+        self._table_init = rl_tables.TableStyle.__init__
+        counter = self
+
+        def paragraph_init(style, *args, **kwargs):
+            counter.paragraph_styles += 1
+            counter._paragraph_init(style, *args, **kwargs)
+
+        def table_init(style, *args, **kwargs):
+            counter.table_styles += 1
+            counter._table_init(style, *args, **kwargs)
+
+        rl_styles.ParagraphStyle.__init__ = paragraph_init
+        rl_tables.TableStyle.__init__ = table_init
+        return self
+
+    def __exit__(self, *exc):
+        rl_styles.ParagraphStyle.__init__ = self._paragraph_init
+        rl_tables.TableStyle.__init__ = self._table_init
+
+
+def measure(count, repeat):
+    objectives, ikigai = payload(count)
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        app_module.create_pdf(objectives, ikigai)
+        durations.append(time.perf_counter() - started)
+
+    with StyleCounter() as counter:
+        tracemalloc.start()
+        buffer = app_module.create_pdf(objectives, ikigai)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        'objectives': count,
+        'seconds': statistics.median(durations),
+        'peak_bytes': peak,
+        'paragraph_styles': counter.paragraph_styles,
+        'table_styles': counter.table_styles,
+        'pdf_bytes': len(buffer.getbuffer()),
+    }
+
+
+def measure_route(count):
+    objectives, ikigai = payload(count)
+    client = app_module.app.test_client()
+    body = {'objectives': objectives, 'ikigai': ikigai}
+    client.post('/api/generate-pdf', json=body).close()  # Démarrage du pool, thème
+    tracemalloc.start()
+    response = client.post('/api/generate-pdf', json=body)
+    # Rendu terminé : mémoire retenue jusqu'à la fin de l'envoi
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    sent = 0
+    for chunk in response.response:  # Corps lu par blocs puis libéré, comme par le serveur WSGI
+        sent += len(chunk)
+    response.close()
+    _, send_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'objectives': count, 'status': response.status_code, 'pdf_bytes': sent,
+            'peak_bytes': max(peak, send_peak), 'held_bytes': max(held, send_peak)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--objectives', default='1,5,20')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--route', action='store_true', help="pic mémoire d'une requête /api/generate-pdf")
+    args = parser.parse_args()
+    counts = [int(value) for value in args.objectives.split(',')]
+
+    if args.route:
+        print(f"{'objectifs':>9} {'statut':>7} {'PDF':>9} {'pic mémoire':>12} {'pic / PDF':>10} {'envoi':>9}")
+        for count in counts:
+            result = measure_route(count)
+            print(f"{result['objectives']:>9} {result['status']:>7} {result['pdf_bytes'] / 1024:>7.0f}Ko "
+                  f"{result['peak_bytes'] / 1024:>10.0f}Ko {result['peak_bytes'] / max(1, result['pdf_bytes']):>9.1f}x "
+                  f"{result['held_bytes'] / 1024:>7.0f}Ko")
+        return
+
+    # Premier PDF (construction des éléments partagés, imports paresseux de ReportLab) mesuré à part
+    objectives, ikigai = payload(1)
+    with StyleCounter() as counter:
+        started = time.perf_counter()
+        app_module.create_pdf(objectives, ikigai)
+        first = time.perf_counter() - started
+    print(f"premier PDF : {first * 1000:.1f} ms, {counter.paragraph_styles} ParagraphStyle, "
+          f"{counter.table_styles} TableStyle")
+
+    results = [measure(count, args.repeat) for count in counts]
+    print(f"{'objectifs':>9} {'durée (ms)':>11} {'pic mémoire':>12} {'ParagraphStyle':>15} {'TableStyle':>11} {'PDF':>9}")
+    for result in results:
+        print(f"{result['objectives']:>9} {result['seconds'] * 1000:>11.1f} {result['peak_bytes'] / 1024:>10.0f}Ko "
+              f"{result['paragraph_styles']:>15} {result['table_styles']:>11} {result['pdf_bytes'] / 1024:>7.0f}Ko")
+    if len(results) > 1:
+        low, high = results[0], results[-1]
+        extra = high['objectives'] - low['objectives']
+        print(f"par objectif : {(high['seconds'] - low['seconds']) / extra * 1000:.2f} ms, "
+              f"{(high['peak_bytes'] - low['peak_bytes']) / extra / 1024:.0f} Ko de pic, "
+              f"{(high['paragraph_styles'] - low['paragraph_styles']) / extra:.1f} ParagraphStyle, "
+              f"{(high['table_styles'] - low['table_styles']) / extra:.1f} TableStyle")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'index de similarité des objectifs (similarity_index)
+
+Construit un index de N objectifs synthétiques (verbe x complément x précision),
+puis mesure : débit d'insertion, latence d'une recherche top-k (p50 / p95 / p99),
+mémoire des vecteurs et temps de sauvegarde / rechargement .npz. Quelques
+paires réalistes montrent les scores obtenus face au seuil configuré.
+
+Usage : python bench_similarity_index.py [--entries 100000] [--queries 500] [--dim 512]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from similarity_index import SimilarityIndex, available
+
+VERBS = ["Apprendre", "Améliorer", "Commencer", "Développer", "Pratiquer", "Terminer", "Lancer",
+         "Organiser", "Réduire", "Augmenter", "Découvrir", "Préparer", "Maîtriser", "Créer"]
+SUBJECTS = ["l'espagnol", "la guitare", "mon entreprise", "un potager", "la course à pied", "le yoga",
+            "mon réseau professionnel", "ma consommation de sucre", "mon épargne", "un blog de cuisine",
+            "la photographie", "un semi-marathon", "mes finances personnelles", "le japonais",
+            "la méditation", "un projet associatif", "la natation", "mon sommeil", "la lecture",
+            "un podcast", "le piano", "ma posture", "le dessin", "un site web"]
+DETAILS = ["", "cette année", "avec mes enfants", "le week-end", "chaque matin", "en ligne",
+           "avec un coach", "pour le plaisir", "en équipe", "sans me décourager", "à mon rythme",
+           "dans ma ville", "pendant les vacances", "avant l'été", "progressivement"]
+
+PAIRS = [
+    ("Courir un marathon", "Courir mon premier marathon"),
+    ("Apprendre le piano", "Apprendre à jouer du piano"),
+    ("Trouver un nouveau travail", "Trouver un travail"),
+    ("Perdre du poids", "Perdre du poids cette année"),
+    ("Perdre du poids", "Perdre du poids rapidement"),
+    ("Courir un marathon", "Courir un semi-marathon"),
+    ("Apprendre l'espagnol", "Apprendre l'italien"),
+    ("Économiser 5000 euros", "Économiser 3000 euros"),
+    ("Travailler", "Travailler plus"),
+    ("Manger sainement", "Manger plus sainement"),
+]
+
+
+def synthetic_objectives(count, seed):
+    rng = random.Random(seed)
+    seen = set()
+    while len(seen) < count:
+        text = f"{rng.choice(VERBS)} {rng.choice(SUBJECTS)} {rng.choice(DETAILS)} {rng.randint(1, 400)} fois".strip()
+        seen.add(text)
+    return list(seen)
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=0.9)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if not available():
+        print("NumPy n'est pas installé : pip install -r requirements.txt")
+        return
+
+    index = SimilarityIndex(dim=args.dim, max_entries=args.entries, reference_year=2026)
+    for source, candidate in PAIRS:
+        pair_index = SimilarityIndex(dim=args.dim, reference_year=2026)
+        pair_index.add(source, {})
+        score = pair_index.search(candidate)[0][0]
+        served = 'réutilisé' if pair_index.best(candidate, args.threshold) else 'appel Mistral'
+        print(f"{score:5.2f}  {source!r:32} ~ {candidate!r:36} -> {served}")
+
+    objectives = synthetic_objectives(args.entries, args.seed)
+    started = time.perf_counter()
+    for text in objectives:
+        index.add(text, {'goal': text})
+    insert_seconds = time.perf_counter() - started
+    print(f"\n{len(index)} entrées, dimension {args.dim} : insertion {len(index) / insert_seconds:,.0f} objectifs/s, "
+          f"vecteurs {index.stats()['memory_bytes'] / 1024 / 1024:.1f} Mo")
+
+    rng = random.Random(args.seed + 1)
+    queries = [rng.choice(objectives) + " vraiment" for _ in range(args.queries)]
+    vectorize_ms, search_ms = [], []
+    for query in queries:
+        started = time.perf_counter()
+        index.vectorize(query)
+        vectorize_ms.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        index.search(query, args.top_k)
+        search_ms.append((time.perf_counter() - started) * 1000)
+    print(f"{'':<22} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for label, samples in (("vectorisation", vectorize_ms), (f"recherche top-{args.top_k}", search_ms)):
+        print(f"{label:<22} {percentile(samples, 50):>8.3f} {percentile(samples, 95):>8.3f} {percentile(samples, 99):>8.3f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'similarity_index.npz')
+        started = time.perf_counter()
+        index.save(path)
+        save_seconds = time.perf_counter() - started
+        size = os.path.getsize(path)
+        reloaded = SimilarityIndex(dim=args.dim, max_entries=args.entries, reference_year=2026)
+        started = time.perf_counter()
+        reloaded.load(path)
+        load_seconds = time.perf_counter() - started
+    print(f"sauvegarde {save_seconds:.2f}s ({size / 1024 / 1024:.1f} Mo), rechargement {load_seconds:.2f}s "
+          f"({len(reloaded)} entrées)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark du mode groupé (SMART_BATCH_SIZE) contre le traitement objectif par objectif
+
+L'API Mistral est simulée (aucun appel réseau) : la latence d'un appel suit
+latence fixe + tokens du prompt / débit de lecture + tokens générés / débit
+de génération, et un taux de perte retire des objets des réponses groupées
+pour exercer la reprise individuelle.
+
+Usage : python bench_smart_batch.py [--objectives 8] [--batch-sizes 1,2,4,8] [--drop 0.1]
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as app_module
+
+OBJECTIVES = [
+    "Courir un semi-marathon",
+    "Apprendre l'espagnol",
+    "Économiser 10 000 euros",
+    "Lancer mon entreprise de design",
+    "Lire 24 livres",
+    "Passer plus de temps avec ma famille",
+    "Obtenir une promotion au travail",
+    "Perdre 8 kg",
+    "Apprendre la guitare",
+    "Faire un voyage au Japon",
+]
+
+
+def estimate_tokens(text):
+    """Approximation grossière : ~4 caractères par token"""
+    return max(1, len(text) // 4)
+
+
+def fake_smart_object(objective_text):
+    """Objet SMART de longueur réaliste (~550 tokens générés)"""
+    filler = ("Étapes concrètes, indicateurs chiffrés et jalons datés en 2026 pour "
+              f"« {objective_text} », avec les ressources à mobiliser. ")
+    return {
+        'goal': f"Réussir à {objective_text.lower()} d'ici décembre 2026",
+        'specific': filler * 4,
+        'measurable': filler * 4,
+        'achievable': filler * 3,
+        'relevant': filler * 3,
+        'time_bound': filler * 4,
+        'analysis': filler * 6,
+    }
+
+
+class SimulatedMistral:
+    """Remplace app.call_ai_api : répond au prompt individuel ou groupé avec une latence simulée"""
+
+    def __init__(self, base_latency, prefill_rate, decode_rate, speedup, drop_rate, seed):
+        self.base_latency = base_latency
+        self.prefill_rate = prefill_rate
+        self.decode_rate = decode_rate
+        self.speedup = speedup
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.simulated_seconds = 0.0
+
+    def __call__(self, prompt, temperature=0.7, max_tokens=1200, timeout=8, json_mode=False, validate=None,
+                 call_type=None, deadline=None, system=None):
+        batch_ids = [int(idx) for idx in re.findall(r'^\[(\d+)\] "', prompt, flags=re.MULTILINE)]
+        if batch_ids:
+            items = []
+            for idx, text in re.findall(r'^\[(\d+)\] "(.*)"$', prompt, flags=re.MULTILINE):
+                with self._lock:
+                    dropped = self.random.random() < self.drop_rate
+                if not dropped:
+                    items.append(dict(objective_id=int(idx), **fake_smart_object(text)))
+            content = json.dumps({'objectives': items}, ensure_ascii=False)
+        else:
+            text = re.search(r'^Objectif : "(.*)"$', prompt, flags=re.MULTILINE).group(1)
+            content = json.dumps(fake_smart_object(text), ensure_ascii=False)
+
+        prompt_tokens = estimate_tokens((system or '') + prompt)
+        completion_tokens = estimate_tokens(content)
+        latency = (self.base_latency + prompt_tokens / self.prefill_rate
+                   + completion_tokens / self.decode_rate)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.simulated_seconds += latency
+        time.sleep(latency / self.speedup)
+        return content
+
+
+def run(objectives, batch_size, args):
+    simulated = SimulatedMistral(args.base_latency, args.prefill_rate, args.decode_rate,
+                                 args.speedup, args.drop, args.seed)
+    app_module.call_ai_api = simulated
+    app_module.llm_cache = None
+    # Chaque taille de lot repart sans objectifs déjà connus
+    app_module.objective_cache.backend = None
+    app_module.similarity_index = None
+    app_module.SMART_BATCH_SIZE = batch_size
+    app_module.REQUEST_DEADLINE = None  # Latences simulées : pas d'échéance de requête
+
+    client = app_module.app.test_client()
+    started = time.perf_counter()
+    response = client.post('/api/process-objectives', json={'objectives': objectives})
+    elapsed = (time.perf_counter() - started) * args.speedup
+    result = response.get_json()
+
+    complete = sum(1 for obj in result['objectives'] if 'Erreur' not in obj['analysis'])
+    return {
+        'batch_size': batch_size,
+        'calls': simulated.calls,
+        'prompt_tokens': simulated.prompt_tokens,
+        'completion_tokens': simulated.completion_tokens,
+        'wall_seconds': elapsed,
+        'complete': complete,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--objectives', type=int, default=8)
+    parser.add_argument('--batch-sizes', default='1,2,4,8')
+    parser.add_argument('--workers', type=int, default=app_module.OBJECTIVES_MAX_WORKERS)
+    parser.add_argument('--drop', type=float, default=0.1, help="probabilité qu'un objet manque dans une réponse groupée")
+    parser.add_argument('--base-latency', type=float, default=0.4, help='latence fixe par appel (s)')
+    parser.add_argument('--prefill-rate', type=float, default=4000.0, help='tokens de prompt lus par seconde')
+    parser.add_argument('--decode-rate', type=float, default=120.0, help='tokens générés par seconde')
+    parser.add_argument('--speedup', type=float, default=20.0, help='accélération du temps simulé')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    objectives = (OBJECTIVES * (args.objectives // len(OBJECTIVES) + 1))[:args.objectives]
+    app_module.OBJECTIVES_MAX_WORKERS = args.workers
+
+    print(f"{args.objectives} objectifs, {args.workers} workers, perte {args.drop:.0%} par objet groupé")
+    print(f"{'lot':>4} {'appels':>7} {'tokens prompt':>14} {'tokens générés':>15} {'durée (s)':>10} {'complets':>9}")
+    for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+        row = run(objectives, batch_size, args)
+        print(f"{row['batch_size']:>4} {row['calls']:>7} {row['prompt_tokens']:>14} "
+              f"{row['completion_tokens']:>15} {row['wall_seconds']:>10.2f} "
+              f"{row['complete']:>5}/{args.objectives}")
+
+
+if __name__ == '__main__':
+    main()
@@ -34,6 +34,130 @@ MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY", "")
 # Clé API Mistral de secours (utilisée si la principale échoue)
 MISTRAL_API_KEY_BACKUP = os.getenv("MISTRAL_API_KEY_BACKUP", "")
 
+# Pool de N clés (optionnel) : liste séparée par des virgules, avec un poids facultatif
+# Exemple : MISTRAL_API_KEYS=cle1:3,cle2,cle3:2  (remplace MISTRAL_API_KEY / MISTRAL_API_KEY_BACKUP)
+MISTRAL_API_KEYS = os.getenv("MISTRAL_API_KEYS", "")
+
 # Modèle Mistral à utiliser (gratuit)
 MISTRAL_MODEL = os.getenv("MISTRAL_MODEL", "mistral-small-latest")  # ou "mistral-tiny-latest" pour plus rapide
 
+# ============================================
+# PERFORMANCE DES APPELS MISTRAL
+# ============================================
+# Nombre maximum de connexions keep-alive conservées par clé API
+MISTRAL_POOL_MAXSIZE = int(os.getenv("MISTRAL_POOL_MAXSIZE", "10"))
+
+# Cache des réponses de l'IA : "memory" (par processus), "sqlite" (partagé entre workers) ou "off"
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+# Fichier SQLite du cache (par défaut dans le dossier temporaire, seul inscriptible sur Vercel)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "") or None
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))  # Durée de vie en secondes
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# Requêtes hedgées : si la clé principale dépasse ce percentile de latence (en %),
+# la même requête part sur la clé de secours et la première réponse gagne
+MISTRAL_HEDGING = os.getenv("MISTRAL_HEDGING", "0").lower() in ("1", "true", "yes")
+MISTRAL_HEDGE_PERCENTILE = float(os.getenv("MISTRAL_HEDGE_PERCENTILE", "90"))
+MISTRAL_HEDGE_DEFAULT_DELAY = float(os.getenv("MISTRAL_HEDGE_DEFAULT_DELAY", "2.5"))  # Avant assez de mesures
+MISTRAL_HEDGE_MIN_DELAY = float(os.getenv("MISTRAL_HEDGE_MIN_DELAY", "0.5"))
+
+# Pool de clés : appels simultanés max par clé et disjoncteurs (401, 429, timeouts)
+MISTRAL_KEY_MAX_CONCURRENCY = int(os.getenv("MISTRAL_KEY_MAX_CONCURRENCY", "4"))
+MISTRAL_BREAKER_COOLDOWN = float(os.getenv("MISTRAL_BREAKER_COOLDOWN", "30"))  # Après 429 / timeouts
+MISTRAL_BREAKER_AUTH_COOLDOWN = float(os.getenv("MISTRAL_BREAKER_AUTH_COOLDOWN", "300"))  # Après 401
+MISTRAL_BREAKER_TIMEOUT_THRESHOLD = int(os.getenv("MISTRAL_BREAKER_TIMEOUT_THRESHOLD", "2"))  # Timeouts consécutifs
+
+# Limiteur de débit par clé (seau à jetons) partagé entre threads et workers (fichier verrouillé)
+# Mettre MISTRAL_RATE_LIMIT_RPS=0 pour le désactiver ; à ajuster selon le plan Mistral
+MISTRAL_RATE_LIMIT_RPS = float(os.getenv("MISTRAL_RATE_LIMIT_RPS", "5"))
+MISTRAL_RATE_LIMIT_BURST = int(os.getenv("MISTRAL_RATE_LIMIT_BURST", "5"))
+MISTRAL_RATE_LIMIT_MAX_WAIT = float(os.getenv("MISTRAL_RATE_LIMIT_MAX_WAIT", "2"))  # Attente max d'un jeton (s)
+MISTRAL_RATE_LIMIT_SHARED = os.getenv("MISTRAL_RATE_LIMIT_SHARED", "1").lower() in ("1", "true", "yes")
+MISTRAL_RATE_LIMIT_DIR = os.getenv("MISTRAL_RATE_LIMIT_DIR", "") or None
+# Plafond d'un blocage imposé par les en-têtes Retry-After / ratelimit-* d'une réponse (s)
+MISTRAL_RATE_LIMIT_MAX_BLOCK = float(os.getenv("MISTRAL_RATE_LIMIT_MAX_BLOCK", "120"))
+
+# Nombre d'objectifs traités en parallèle par requête
+OBJECTIVES_MAX_WORKERS = int(os.getenv("OBJECTIVES_MAX_WORKERS", "3"))
+
+# Pipeline asynchrone (/api/async/...) : appels Mistral simultanés max par requête
+ASYNC_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", "100"))
+
+# Mode groupé : nombre d'objectifs envoyés dans un même appel Mistral (1 = un appel par objectif)
+# Les consignes ne sont envoyées qu'une fois par lot ; un lot produit N fois plus de texte,
+# d'où un timeout plus long (au-delà de 10s, nécessite le plan Vercel Pro)
+SMART_BATCH_SIZE = int(os.getenv("SMART_BATCH_SIZE", "1"))
+SMART_BATCH_ITEM_TOKENS = int(os.getenv("SMART_BATCH_ITEM_TOKENS", "1000"))  # max_tokens par objectif du lot
+SMART_BATCH_TIMEOUT = float(os.getenv("SMART_BATCH_TIMEOUT", "25"))  # Timeout d'un appel groupé (s)
+
+# max_tokens adaptatif : plafond = percentile des longueurs de réponse observées x marge
+# (jamais au-dessus du plafond de l'appel ; une réponse tronquée est refaite avec le plafond complet)
+MISTRAL_ADAPTIVE_MAX_TOKENS = os.getenv("MISTRAL_ADAPTIVE_MAX_TOKENS", "1").lower() in ("1", "true", "yes")
+MISTRAL_MAX_TOKENS_PERCENTILE = float(os.getenv("MISTRAL_MAX_TOKENS_PERCENTILE", "95"))
+MISTRAL_MAX_TOKENS_HEADROOM = float(os.getenv("MISTRAL_MAX_TOKENS_HEADROOM", "1.25"))
+MISTRAL_MAX_TOKENS_MIN = int(os.getenv("MISTRAL_MAX_TOKENS_MIN", "300"))
+
+# Échéance d'une requête : budget total (s) partagé par tous les appels Mistral qu'elle déclenche
+# Un appel qui n'a plus MISTRAL_MIN_ATTEMPT_TIME devant lui n'est pas lancé et la route renvoie son repli
+# (Vercel gratuit = 10s max : garder une marge ; 0 = sans limite)
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "9"))
+MISTRAL_MIN_ATTEMPT_TIME = float(os.getenv("MISTRAL_MIN_ATTEMPT_TIME", "1.5"))
+MISTRAL_CONNECT_TIMEOUT = float(os.getenv("MISTRAL_CONNECT_TIMEOUT", "3"))  # Plafond du timeout de connexion
+
+# Cache des objectifs SMART par texte normalisé (casse, accents, ponctuation, position ignorés)
+# Stocké dans le backend de LLM_CACHE_BACKEND ; l'année de référence (« en 2026 ») est aussi ignorée
+OBJECTIVE_CACHE = os.getenv("OBJECTIVE_CACHE", "1").lower() in ("1", "true", "yes")
+OBJECTIVE_CACHE_REFERENCE_YEAR = int(os.getenv("OBJECTIVE_CACHE_REFERENCE_YEAR", "2026"))
+
+# Index de similarité (NumPy, n-grammes de caractères) : au-dessus du seuil de similarité cosinus,
+# l'objectif SMART d'un objectif proche déjà traité est réutilisé sans appel à Mistral
+# (les objectifs dont les nombres diffèrent ne sont jamais rapprochés)
+SIMILARITY_INDEX = os.getenv("SIMILARITY_INDEX", "1").lower() in ("1", "true", "yes")
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.9"))
+SIMILARITY_INDEX_DIM = int(os.getenv("SIMILARITY_INDEX_DIM", "512"))  # Dimension des vecteurs (hachage)
+SIMILARITY_INDEX_MAX_ENTRIES = int(os.getenv("SIMILARITY_INDEX_MAX_ENTRIES", "5000"))  # Au-delà : éviction des plus anciens
+SIMILARITY_INDEX_PATH = os.getenv("SIMILARITY_INDEX_PATH", "") or None  # Fichier .npz (ex. /tmp/similarity_index.npz)
+SIMILARITY_INDEX_SAVE_EVERY = int(os.getenv("SIMILARITY_INDEX_SAVE_EVERY", "50"))  # Sauvegarde toutes les N insertions
+
+# Regroupement des appels identiques en vol : les requêtes simultanées pour le même prompt
+# (ou le même objectif) attendent le résultat du premier appel au lieu de rappeler Mistral.
+# Entre workers gunicorn, un bail SQLite est utilisé si LLM_CACHE_BACKEND=sqlite
+SINGLE_FLIGHT_SHARED = os.getenv("SINGLE_FLIGHT_SHARED", "1").lower() in ("1", "true", "yes")
+SINGLE_FLIGHT_LEASE_TTL = float(os.getenv("SINGLE_FLIGHT_LEASE_TTL", "30"))  # Bail d'un worker arrêté en plein appel (s)
+
+# Tâches en arrière-plan (POST /api/process-objectives?mode=job, suivi sur GET /api/jobs/<id>)
+# Nécessite un serveur qui reste actif après la réponse (gunicorn) : pas sur Vercel
+# 0 : mode tâche désactivé, ?mode=job / Prefer: respond-async ignorés (défaut sur Vercel : fonction suspendue
+# après la réponse, /tmp propre à chaque instance)
+JOB_MODE_ENABLED = os.getenv("JOB_MODE_ENABLED", "0" if os.getenv("VERCEL") else "1").lower() in ("1", "true", "yes")
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "2"))  # Tâches exécutées simultanément par worker
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "") or None  # Fichier SQLite (défaut : /tmp/my_ia_jobs.sqlite3)
+JOB_TTL = int(os.getenv("JOB_TTL", "3600"))  # Conservation des tâches (s)
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", "300"))  # Tâche sans signe de vie (en attente ou en cours) : considérée en échec (s)
+
+# Endpoint chat/completions (ex. serveur simulé local : http://127.0.0.1:8099/v1/chat/completions,
+# voir mock_mistral_server.py et load_test.py)
+MISTRAL_API_URL = os.getenv("MISTRAL_API_URL", "https://api.mistral.ai/v1/chat/completions")
+
+# Réponse SMART incomplète (quelques champs absents ou trop courts) : un court appel de réparation
+# redemande seulement ces champs au lieu de régénérer tout l'objectif
+SMART_REPAIR_MAX_FIELDS = int(os.getenv("SMART_REPAIR_MAX_FIELDS", "3"))  # Au-delà : nouvelle réponse complète
+SMART_REPAIR_FIELD_TOKENS = int(os.getenv("SMART_REPAIR_FIELD_TOKENS", "300"))  # max_tokens par champ redemandé
+
+# Routage par domaine : chaque objectif est classé localement (santé, finances, carrière...) par mots-clés
+# et reçoit un prompt SMART plus court propre à son domaine (0 : prompt générique pour tous, comparaison A/B)
+DOMAIN_ROUTING = os.getenv("DOMAIN_ROUTING", "1").lower() in ("1", "true", "yes")
+
+# PDF : flux binaires (logo JPEG inclus tel quel, pages compressées) ; 1 : flux encodés en ASCII85
+# comme auparavant (texte pur, ~20 % plus gros, encodage en Python pur : ~40 % du temps de génération)
+PDF_ASCII85 = os.getenv("PDF_ASCII85", "0").lower() in ("1", "true", "yes")
+
+# Génération des PDF dans un pool de processus préchauffés (ReportLab garde le GIL : hors du thread de la requête)
+# 0 : rendu sur le thread de la requête, comme avant (défaut sur Vercel, sans multiprocessing)
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", "0" if os.getenv("VERCEL") else "2"))
+PDF_POOL_QUEUE = int(os.getenv("PDF_POOL_QUEUE", "8"))  # PDF en attente en plus des rendus en cours ; au-delà : 503
+PDF_POOL_TIMEOUT = float(os.getenv("PDF_POOL_TIMEOUT", "30"))  # Durée maximale d'un rendu (s) ; au-delà : 504
+# Taille (octets) au-delà de laquelle un PDF rendu passe par un fichier temporaire envoyé par blocs
+# au lieu de rester en mémoire jusqu'à la fin de la réponse
+PDF_SPOOL_THRESHOLD = int(os.getenv("PDF_SPOOL_THRESHOLD", str(256 * 1024)))
@@ -0,0 +1,58 @@
+"""
+Échéance d'une requête HTTP, propagée à tous les appels Mistral qu'elle déclenche
+
+La route crée une Deadline (budget total, ex. 9 s sous la limite de 10 s de
+Vercel) et la passe explicitement à chaque couche. Les timeouts de connexion et
+de lecture sont calculés sur le temps restant, et une tentative qui n'a plus le
+temps d'aboutir n'est pas lancée : la route renvoie sa valeur de repli avant
+que la plateforme ne coupe la fonction.
+"""
+
+import math
+import time
+
+
+class Deadline:
+    """Échéance absolue (horloge monotone) ; seconds=None signifie sans limite"""
+
+    def __init__(self, seconds=None, min_attempt=1.5, connect_timeout=3.0):
+        self.seconds = seconds
+        self.min_attempt = min_attempt          # Temps minimum pour qu'un appel ait une chance d'aboutir
+        self.connect_timeout = connect_timeout  # Plafond du timeout de connexion
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self):
+        """Secondes restantes (math.inf sans limite)"""
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def can_attempt(self, minimum=None):
+        """Reste-t-il assez de temps pour lancer un appel ?"""
+        return self.remaining() >= (self.min_attempt if minimum is None else minimum)
+
+    def bound(self, seconds):
+        """Borne une attente par le temps restant"""
+        return min(seconds, self.remaining())
+
+    def wait_budget(self, cap):
+        """Attente acceptable avant un appel (clé ou jeton libre) : il doit rester min_attempt ensuite"""
+        return max(0.0, min(cap, self.remaining() - self.min_attempt))
+
+    def timeouts(self, read_cap):
+        """(timeout de connexion, timeout de lecture) tirés du temps restant, bornés par read_cap"""
+        read_timeout = self.bound(read_cap)
+        return min(self.connect_timeout, read_timeout), read_timeout
+
+    def __repr__(self):
+        if self.expires_at is None:
+            return "Deadline(sans limite)"
+        return f"Deadline(reste {self.remaining():.2f}s sur {self.seconds}s)"
+
+
+def ensure_deadline(deadline):
+    """La deadline fournie, ou une deadline sans limite (appels hors route : scripts, tests)"""
+    return deadline if deadline is not None else Deadline()
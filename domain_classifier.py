@@ -0,0 +1,134 @@
+"""
+Classification locale du domaine d'un objectif (santé, finances, carrière...)
+
+Avant l'appel à Mistral, l'objectif est rattaché à un domaine par mots-clés :
+le texte normalisé (casse et accents neutralisés) est comparé à une expression
+régulière par domaine, compilée une fois. Un mot-clé reconnaît le mot entier et
+son pluriel ; suivi de « * », il reconnaît tous les mots qui commencent ainsi
+(« econom* » couvre économiser, économies...). Quelques dizaines de
+microsecondes par objectif, sans modèle ni dépendance.
+
+Le domaine retenu est celui qui a le plus de mots reconnus ; sans mot reconnu,
+ou à égalité, l'objectif reste « general » et garde le prompt générique.
+
+Les décisions (nombre par domaine, temps de classification) et la latence des
+appels par domaine sont comptées pour mesurer l'effet des prompts spécialisés.
+"""
+
+import re
+import threading
+import time
+
+from objective_cache import fold_accents
+
+GENERAL = 'general'
+
+# Mots-clés (sans accents) par domaine ; « * » final : début de mot
+DOMAIN_KEYWORDS = {
+    'health': (
+        'sport*', 'courir', 'course a pied', 'marathon', 'semi marathon', 'trail', 'jogging', 'natation', 'nager',
+        'velo', 'muscu*', 'fitness', 'yoga', 'pilates', 'poids', 'maigrir', 'mincir', 'kilo*', 'kg', 'regime',
+        'manger', 'alimentation', 'nutrition', 'sucre', 'alcool', 'fumer', 'tabac', 'cigarette', 'sante',
+        'sommeil', 'dormir', 'en forme', 'marcher', 'pas par jour', 'entrainement', 'cardio', 'salle de sport',
+    ),
+    'finance': (
+        'econom*', 'epargn*', 'euro', 'argent', 'budget', 'dette', 'credit', 'emprunt', 'investi*', 'bourse',
+        'placement', 'patrimoine', 'immobilier', 'appartement', 'retraite', 'financ*', 'depense*', 'revenu',
+        'salaire', 'rembours*',
+    ),
+    'career': (
+        'travail', 'emploi', 'job', 'poste', 'promotion', 'carriere', 'entreprise', 'startup', 'freelance',
+        'client', 'chiffre d affaires', 'business', 'manager', 'reconversion', 'entretien d embauche', 'cv',
+        'reseau professionnel', 'linkedin', 'augmentation', 'projet professionnel', 'independant', 'collegue',
+    ),
+    'education': (
+        'etudier', 'etude', 'formation', 'diplome', 'certification', 'examen', 'concours', 'langue', 'anglais',
+        'espagnol', 'allemand', 'italien', 'japonais', 'chinois', 'portugais', 'lire', 'livre', 'lecture',
+        'cours en ligne', 'master', 'licence', 'universite', 'programmation', 'coder', 'bac',
+    ),
+    'relationships': (
+        'famille', 'enfant', 'parent', 'couple', 'conjoint', 'mari', 'femme', 'ami', 'amie', 'amitie', 'amour',
+        'relation', 'rencontre*', 'mariage', 'grands parents', 'proches', 'petits enfants',
+    ),
+    'wellbeing': (
+        'mediter', 'meditation', 'stress', 'anxiete', 'bien etre', 'bonheur', 'heureux', 'heureuse', 'gratitude',
+        'confiance en soi', 'ecran', 'reseaux sociaux', 'deconnect*', 'journal', 'respiration', 'equilibre',
+        'detente', 'zen', 'lacher prise',
+    ),
+    'leisure': (
+        'voyage*', 'voyager', 'guitare', 'piano', 'musique', 'chant', 'chanter', 'dessin', 'dessiner',
+        'peinture', 'peindre', 'photo*', 'cuisine', 'cuisiner', 'jardin*', 'potager', 'blog', 'podcast', 'roman',
+        'theatre', 'danse', 'danser', 'randonnee', 'vacances', 'japon', 'benevol*', 'associati*', 'loisir',
+    ),
+}
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def _compile(keywords):
+    """Expression d'un domaine : mots entiers (et pluriels en s / x), ou débuts de mots pour « xxx* »"""
+    # Les mots-clés les plus longs d'abord (« semi marathon » avant « marathon »)
+    alternatives = []
+    for keyword in sorted(keywords, key=len, reverse=True):
+        if keyword.endswith('*'):
+            alternatives.append(re.escape(keyword[:-1]) + r'\w*')
+        else:
+            alternatives.append(re.escape(keyword) + r'[sx]?\b')
+    return re.compile(r'\b(?:' + '|'.join(alternatives) + ')')
+
+
+_PATTERNS = {domain: _compile(keywords) for domain, keywords in DOMAIN_KEYWORDS.items()}
+
+
+def normalize_for_domain(text):
+    return ' ' + _NON_ALNUM.sub(' ', fold_accents((text or '').casefold())).strip() + ' '
+
+
+class DomainClassifier:
+    """Domaine d'un objectif par mots-clés, avec compteurs de décisions et latence par domaine"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.decisions = {}         # domaine -> nombre d'objectifs classés
+        self.classify_seconds = 0.0
+        self.calls = {}             # domaine -> nombre d'appels Mistral
+        self.call_seconds = {}      # domaine -> latence cumulée des appels
+
+    def classify(self, text):
+        """Domaine de l'objectif ('health', 'finance'... ou GENERAL si aucun domaine ne ressort)"""
+        started = time.perf_counter()
+        normalized = normalize_for_domain(text)
+        scores = {}
+        for domain, pattern in _PATTERNS.items():
+            hits = len(pattern.findall(normalized))
+            if hits:
+                scores[domain] = hits
+        domain = GENERAL
+        if scores:
+            best = max(scores.values())
+            leaders = [name for name, hits in scores.items() if hits == best]
+            if len(leaders) == 1:
+                domain = leaders[0]
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.decisions[domain] = self.decisions.get(domain, 0) + 1
+            self.classify_seconds += elapsed
+        return domain
+
+    def observe_call(self, domain, seconds):
+        """Enregistre la durée d'un traitement SMART (appels Mistral) pour ce domaine"""
+        with self._lock:
+            self.calls[domain] = self.calls.get(domain, 0) + 1
+            self.call_seconds[domain] = self.call_seconds.get(domain, 0.0) + seconds
+
+    def stats(self):
+        with self._lock:
+            classified = sum(self.decisions.values())
+            return {
+                'classified': classified,
+                'decisions': dict(self.decisions),
+                'avg_classify_us': round(self.classify_seconds / classified * 1e6, 1) if classified else 0.0,
+                'avg_call_seconds': {
+                    domain: round(self.call_seconds[domain] / count, 3) for domain, count in self.calls.items()
+                },
+            }
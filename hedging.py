@@ -0,0 +1,224 @@
+"""
+Requêtes "hedgées" entre deux clés Mistral
+
+Une première clé (la principale) est appelée. Si elle n'a pas répondu après un
+délai égal à un percentile de la latence observée, la même requête est lancée
+en parallèle sur une deuxième clé (la secours) : la première réponse valide
+gagne et l'autre est abandonnée.
+
+En asyncio, la requête perdante est réellement annulée. En synchrone, un appel
+HTTP bloquant (requests) ne peut pas être interrompu : la perdante reçoit une
+annulation (HedgeCancel) qui l'arrête si elle n'est pas encore partie (pas de
+clé ni de jeton du limiteur réservés) et libère aussitôt sa place de clé si
+elle est en vol. Une requête déjà envoyée va cependant jusqu'à sa réponse ou
+son timeout : elle occupe un thread du hedger et consomme le quota Mistral.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class LatencyTracker:
+    """Fenêtre glissante des latences observées (en secondes)"""
+
+    def __init__(self, window=200):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def count(self):
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, percent, default=None):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return default
+        rank = min(len(samples) - 1, max(0, int(round(percent / 100.0 * len(samples))) - 1))
+        return samples[rank]
+
+
+class HedgeStats:
+    """Compteurs pour régler le seuil : taux de hedge et taux de victoire de la clé de secours
+
+    primary_wins compte aussi les réponses obtenues avant le seuil ; backup_wins ne
+    compte que les courses réellement hedgées, les bascules après échec étant
+    comptées à part dans failovers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.primary_wins = 0
+        self.backup_wins = 0
+        self.failovers = 0
+        self.failures = 0
+
+    def add(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'hedged': self.hedged,
+                'primary_wins': self.primary_wins,
+                'backup_wins': self.backup_wins,
+                'failovers': self.failovers,
+                'failures': self.failures,
+                'hedge_rate': round(self.hedged / self.calls, 3) if self.calls else 0.0,
+                'backup_win_rate': round(self.backup_wins / self.hedged, 3) if self.hedged else 0.0,
+            }
+
+
+class HedgeCancel:
+    """Annulation coopérative d'un appel synchrone : is_set() avant chaque réservation,
+    on_cancel(callback) pour libérer tout de suite ce que l'appel retient"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks = []
+
+    def is_set(self):
+        with self._lock:
+            return self._cancelled
+
+    def on_cancel(self, callback):
+        """Appelle callback à l'annulation (immédiatement si elle a déjà eu lieu)"""
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class Hedger:
+    """Lance un appel principal puis, passé le seuil de latence, un appel de secours concurrent"""
+
+    def __init__(self, percentile=90, default_delay=2.5, min_delay=0.5, min_samples=20, max_workers=16):
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker()
+        self.stats = HedgeStats()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+
+    def hedge_delay(self):
+        """Délai avant de lancer la requête de secours"""
+        if self.latencies.count() < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, self.latencies.percentile(self.percentile, self.default_delay))
+
+    def _timed(self, call):
+        started = time.monotonic()
+        try:
+            result = call()
+        except Exception as e:
+            print(f"Requête hedgée : erreur inattendue: {e}")
+            return None
+        if result:
+            self.latencies.record(time.monotonic() - started)
+        return result
+
+    def call(self, primary_call, backup_call):
+        """Retourne (résultat, 'primary' | 'backup' | None)
+
+        primary_call / backup_call reçoivent un HedgeCancel, déclenché si l'autre appel gagne.
+        """
+        self.stats.add('calls')
+        cancels = {}
+        primary_cancel = HedgeCancel()
+        primary = self._executor.submit(self._timed, lambda: primary_call(primary_cancel))
+        cancels[primary] = primary_cancel
+        done, _ = wait([primary], timeout=self.hedge_delay())
+
+        if done and primary.result():
+            self.stats.add('primary_wins')
+            return primary.result(), 'primary'
+
+        # Principale trop lente (hedge) ou déjà en échec (bascule classique)
+        hedged = not done
+        self.stats.add('hedged' if hedged else 'failovers')
+        backup_cancel = HedgeCancel()
+        backup = self._executor.submit(self._timed, lambda: backup_call(backup_cancel))
+        cancels[backup] = backup_cancel
+        pending = {primary: 'primary', backup: 'backup'}
+
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                source = pending.pop(future)
+                result = future.result()
+                if result:
+                    for loser in pending:
+                        loser.cancel()  # Pas encore démarrée : retirée de la file
+                        cancels[loser].cancel()  # En cours : place de clé libérée, pas de nouvel envoi
+                    if hedged:
+                        self.stats.add(f'{source}_wins')
+                    return result, source
+
+        self.stats.add('failures')
+        return None, None
+
+    async def _timed_async(self, call):
+        started = time.monotonic()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Requête hedgée : erreur inattendue: {e}")
+            return None
+        if result:
+            self.latencies.record(time.monotonic() - started)
+        return result
+
+    async def call_async(self, primary_call, backup_call):
+        """Version asyncio de call : ici la requête perdante est réellement annulée"""
+        self.stats.add('calls')
+        primary = asyncio.ensure_future(self._timed_async(primary_call))
+        done, _ = await asyncio.wait([primary], timeout=self.hedge_delay())
+
+        if done and primary.result():
+            self.stats.add('primary_wins')
+            return primary.result(), 'primary'
+
+        hedged = not done
+        self.stats.add('hedged' if hedged else 'failovers')
+        backup = asyncio.ensure_future(self._timed_async(backup_call))
+        pending = {primary: 'primary', backup: 'backup'}
+
+        while pending:
+            done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                source = pending.pop(task)
+                result = task.result()
+                if result:
+                    for loser in pending:
+                        loser.cancel()
+                    if hedged:
+                        self.stats.add(f'{source}_wins')
+                    return result, source
+
+        self.stats.add('failures')
+        return None, None
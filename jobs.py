@@ -0,0 +1,202 @@
+"""
+Tâches en arrière-plan pour le traitement des objectifs (jobs)
+
+POST /api/process-objectives?mode=job répond tout de suite avec un identifiant
+de tâche ; un pool de threads traite les objectifs et enregistre chaque
+objectif SMART dès qu'il est prêt. GET /api/jobs/<id> renvoie l'état de la
+tâche et les résultats partiels.
+
+L'état est conservé dans un fichier SQLite (mode WAL), lisible par tous les
+workers gunicorn : la requête de suivi peut arriver sur un autre worker que
+celui qui exécute la tâche. Nécessite un serveur qui reste actif après la
+réponse (gunicorn) : sur Vercel, la fonction est suspendue dès la réponse.
+
+Le runner rafraîchit régulièrement (heartbeat) l'horodatage des tâches qu'il
+détient, en attente comme en cours : une tâche dont l'horodatage n'avance plus
+depuis stale_after (worker recyclé, processus suspendu) est rapportée en échec
+au lieu de rester « queued » ou « running » jusqu'à sa purge.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+def default_job_store_path():
+    """Emplacement par défaut du fichier des tâches (/tmp est le seul dossier inscriptible sur Vercel)"""
+    return os.path.join(tempfile.gettempdir(), 'my_ia_jobs.sqlite3')
+
+
+class JobStore:
+    """État des tâches et résultats partiels dans un fichier SQLite partagé entre processus"""
+
+    def __init__(self, path, ttl=3600, stale_after=300):
+        self.path = path
+        self.ttl = ttl                  # Durée de conservation d'une tâche terminée (s)
+        self.stale_after = stale_after  # Tâche sans signe de vie depuis ce délai : worker arrêté, tâche en échec
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " total INTEGER NOT NULL,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_results ("
+            " job_id TEXT NOT NULL,"
+            " item INTEGER NOT NULL,"
+            " result TEXT NOT NULL,"
+            " PRIMARY KEY (job_id, item))"
+        )
+        conn.commit()
+
+    def _connection(self):
+        # Une connexion par thread : sqlite3 n'autorise pas le partage par défaut
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, total):
+        """Enregistre une nouvelle tâche (en attente) et retourne son identifiant"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connection()
+        self._purge(conn, now)
+        conn.execute(
+            "INSERT INTO jobs (id, status, total, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, STATUS_QUEUED, total, now, now),
+        )
+        conn.commit()
+        return job_id
+
+    def _purge(self, conn, now):
+        """Supprime les tâches plus anciennes que ttl et leurs résultats"""
+        expired = [row[0] for row in conn.execute("SELECT id FROM jobs WHERE updated_at <= ?", (now - self.ttl,))]
+        for job_id in expired:
+            conn.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def set_status(self, job_id, status, error=None):
+        conn = self._connection()
+        conn.execute("UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                     (status, error, time.time(), job_id))
+        conn.commit()
+
+    def touch(self, job_ids):
+        """Signe de vie des tâches détenues par un runner (en attente ou en cours)"""
+        if not job_ids:
+            return
+        conn = self._connection()
+        now = time.time()
+        conn.executemany("UPDATE jobs SET updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                         [(now, job_id, STATUS_QUEUED, STATUS_RUNNING) for job_id in job_ids])
+        conn.commit()
+
+    def add_result(self, job_id, item, result):
+        """Enregistre le résultat d'un élément (l'horodatage sert aussi de signe de vie)"""
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO job_results (job_id, item, result) VALUES (?, ?, ?)",
+                     (job_id, item, json.dumps(result, ensure_ascii=False)))
+        conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+        conn.commit()
+
+    def get(self, job_id):
+        """État de la tâche et résultats déjà produits (triés par élément), ou None si inconnue"""
+        conn = self._connection()
+        row = conn.execute("SELECT status, total, error, created_at, updated_at FROM jobs WHERE id = ?",
+                           (job_id,)).fetchone()
+        if row is None:
+            return None
+        status, total, error, created_at, updated_at = row
+        if status in (STATUS_QUEUED, STATUS_RUNNING) and time.time() - updated_at > self.stale_after:
+            error = ("Tâche interrompue (aucun progrès)" if status == STATUS_RUNNING
+                     else "Tâche jamais démarrée (worker arrêté)")
+            status = STATUS_FAILED
+        results = [json.loads(result) for (result,) in conn.execute(
+            "SELECT result FROM job_results WHERE job_id = ? ORDER BY item", (job_id,))]
+        return {
+            'job_id': job_id,
+            'status': status,
+            'total': total,
+            'completed': len(results),
+            'error': error,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'results': results,
+        }
+
+    def counts(self):
+        """Nombre de tâches par état"""
+        return dict(self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class JobRunner:
+    """Pool de threads qui exécute les tâches : run(emit) appelle emit(élément, résultat) pour chaque résultat
+
+    Un thread de heartbeat rafraîchit toutes les heartbeat secondes (par défaut stale_after / 3)
+    les tâches en attente ou en cours de ce runner.
+    """
+
+    def __init__(self, store, max_workers=2, heartbeat=None):
+        self.store = store
+        self.heartbeat = heartbeat or max(1.0, store.stale_after / 3.0)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._active = set()  # Tâches en attente ou en cours dans ce processus
+        self._heartbeat_thread = None
+
+    def submit(self, total, run):
+        """Crée la tâche, la met en file et retourne son identifiant"""
+        job_id = self.store.create(total)
+        with self._lock:
+            self._active.add(job_id)
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(target=self._beat, name='job-heartbeat', daemon=True)
+                self._heartbeat_thread.start()
+        self._executor.submit(self._run, job_id, run)
+        return job_id
+
+    def _beat(self):
+        while True:
+            time.sleep(self.heartbeat)
+            with self._lock:
+                job_ids = list(self._active)
+            try:
+                self.store.touch(job_ids)
+            except sqlite3.Error as e:
+                print(f"Tâches : heartbeat impossible - {e}")
+
+    def _run(self, job_id, run):
+        try:
+            self.store.set_status(job_id, STATUS_RUNNING)
+            try:
+                run(lambda item, result: self.store.add_result(job_id, item, result))
+            except Exception as e:
+                print(f"Tâche {job_id} : erreur - {e}")
+                self.store.set_status(job_id, STATUS_FAILED, str(e))
+                return
+            self.store.set_status(job_id, STATUS_DONE)
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
@@ -0,0 +1,181 @@
+"""
+Extraction tolérante d'un objet JSON dans une réponse de l'IA
+
+Une seule passe sur le texte, par jetons (expressions précompilées) et non
+caractère par caractère. Elle ignore le texte et les balises ``` autour de
+l'objet, échappe les guillemets et les retours à la ligne non échappés dans
+les chaînes, et referme proprement une réponse tronquée (max_tokens atteint).
+Le texte réparé est décodé une seule fois par json.loads.
+
+Chaque récupération appliquée est notée dans ExtractResult.recoveries :
+- 'fence'     : balises ``` autour du JSON
+- 'prose'     : texte avant ou après l'objet
+- 'quotes'    : guillemets internes non échappés
+- 'control'   : retours à la ligne / tabulations bruts dans une chaîne
+- 'escape'    : échappement invalide (\\% par exemple)
+- 'trailing_comma' : virgule avant } ou ]
+- 'truncated' : réponse coupée, chaînes et accolades refermées
+"""
+
+import json
+import re
+
+# Dans une chaîne : texte ordinaire, échappement, guillemet, caractère de contrôle
+_IN_STRING = re.compile(r'[^"\\\x00-\x1f]+|\\.?|"|[\x00-\x1f]', re.DOTALL)
+# Hors chaîne : tout sauf la structure, ou un caractère de structure
+_OUTSIDE = re.compile(r'[^"{}\[\],:]+|["{}\[\],:]')
+# Ce qui peut suivre un guillemet fermant : sinon c'est un guillemet interne non échappé
+_AFTER_CLOSING_QUOTE = re.compile(r'\s*(?:[:}\]]|,\s*["{\[\]}\d\-tfn]|$)')
+_TRAILING_COMMA = re.compile(r',\s*$')
+_FENCE = re.compile(r'```')
+
+_CONTROL_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t'}
+_CLOSERS = {'{': '}', '[': ']'}
+_VALID_ESCAPES = frozenset('"\\/bfnrtu')
+
+
+class ExtractResult:
+    """Valeur décodée (ou None) et liste des récupérations appliquées"""
+
+    __slots__ = ('value', 'recoveries')
+
+    def __init__(self, value=None, recoveries=()):
+        self.value = value
+        self.recoveries = tuple(recoveries)
+
+    @property
+    def path(self):
+        """Nom du chemin de récupération ('strict' si le texte était déjà du JSON valide)"""
+        if self.value is None:
+            return 'failed'
+        return '+'.join(self.recoveries) if self.recoveries else 'strict'
+
+    def __bool__(self):
+        return self.value is not None
+
+
+def _repair(text, start):
+    """Parcourt le texte depuis la première accolade et retourne (JSON réparé, récupérations, fin)"""
+    out = []
+    recoveries = []
+    stack = []
+    in_string = False
+    is_key = False
+    key_start = None  # Position dans out de la clé en cours (pour retirer une clé orpheline)
+    expecting_key = False
+    pos = start
+    length = len(text)
+
+    while pos < length:
+        if in_string:
+            match = _IN_STRING.match(text, pos)
+            token = match.group()
+            pos = match.end()
+            if token == '"':
+                if is_key or _AFTER_CLOSING_QUOTE.match(text, pos):
+                    in_string = False
+                    out.append('"')
+                else:
+                    out.append('\\"')
+                    if 'quotes' not in recoveries:
+                        recoveries.append('quotes')
+            elif token[0] == '\\':
+                if token[1:] and token[1] in _VALID_ESCAPES:
+                    out.append(token)
+                else:
+                    # Échappement invalide (ou barre finale) : la barre oblique devient littérale
+                    out.append('\\\\' + token[1:])
+                    if 'escape' not in recoveries:
+                        recoveries.append('escape')
+            elif token < ' ':
+                out.append(_CONTROL_ESCAPES.get(token, ' '))
+                if 'control' not in recoveries:
+                    recoveries.append('control')
+            else:
+                out.append(token)
+            continue
+
+        match = _OUTSIDE.match(text, pos)
+        token = match.group()
+        pos = match.end()
+        if token == '"':
+            in_string = True
+            is_key = bool(stack) and stack[-1] == '{' and expecting_key
+            if is_key:
+                key_start = len(out)
+            out.append('"')
+        elif token in '{[':
+            stack.append(token)
+            expecting_key = token == '{'
+            out.append(token)
+        elif token in '}]':
+            if not stack:
+                break
+            if _TRAILING_COMMA.search(''.join(out[-2:])):
+                # Virgule finale tolérée par l'IA mais pas par json.loads
+                while out and out[-1].strip() in ('', ','):
+                    if out.pop().strip() == ',':
+                        break
+                recoveries.append('trailing_comma')
+            out.append(_CLOSERS[stack.pop()])
+            expecting_key = False
+            if not stack:
+                return ''.join(out), recoveries, pos
+        elif token == ',':
+            expecting_key = bool(stack) and stack[-1] == '{'
+            out.append(token)
+        elif token == ':':
+            expecting_key = False
+            key_start = None
+            out.append(token)
+        else:
+            out.append(token)
+
+    # Fin du texte avant la fermeture de l'objet : réponse tronquée
+    recoveries.append('truncated')
+    if in_string:
+        if is_key:
+            del out[key_start:]
+        else:
+            out.append('"')
+    elif key_start is not None and stack and stack[-1] == '{':
+        # Clé complète mais sans valeur
+        del out[key_start:]
+    repaired = ''.join(out).rstrip()
+    if repaired.endswith(':'):
+        repaired += ' null'
+    repaired = _TRAILING_COMMA.sub('', repaired)
+    repaired += ''.join(_CLOSERS[opener] for opener in reversed(stack))
+    return repaired, recoveries, length
+
+
+def extract_json_object(text):
+    """Premier objet JSON du texte, réparé si besoin - Retourne un ExtractResult"""
+    if not text:
+        return ExtractResult()
+
+    # Chemin rapide : JSON déjà valide (cas normal en mode JSON)
+    stripped = text.strip()
+    if stripped.startswith('{'):
+        try:
+            return ExtractResult(json.loads(stripped))
+        except ValueError:
+            pass
+
+    start = text.find('{')
+    if start == -1:
+        return ExtractResult()
+
+    repaired, recoveries, end = _repair(text, start)
+    before, after = text[:start], text[end:]
+    prefix = []
+    if _FENCE.search(before) or _FENCE.search(after):
+        prefix.append('fence')
+    if _FENCE.sub('', before).strip().lower().rstrip(':').strip() not in ('', 'json') or _FENCE.sub('', after).strip():
+        prefix.append('prose')
+
+    try:
+        value = json.loads(repaired)
+    except ValueError:
+        return ExtractResult(None, prefix + recoveries)
+    return ExtractResult(value, prefix + recoveries)
@@ -0,0 +1,228 @@
+"""
+Pool de clés API Mistral
+
+Chaque clé a un poids (répartition round-robin pondérée "lisse"), une limite
+d'appels simultanés et un disjoncteur : après une erreur 401 ou 429 (ou des
+timeouts répétés) la clé est mise de côté pendant un temps de refroidissement,
+puis une seule requête d'essai est autorisée (semi-ouvert) avant de la rétablir.
+"""
+
+import asyncio
+import threading
+import time
+
+from mistral_client import key_fingerprint
+
+# Types d'échec remontés par request_mistral (app.py)
+ERROR_AUTH = 'auth'              # 401
+ERROR_RATE_LIMIT = 'rate_limit'  # 429
+ERROR_TIMEOUT = 'timeout'
+ERROR_THROTTLED = 'throttled'    # Aucun jeton du limiteur local : la requête n'est pas partie
+ERROR_CANCELLED = 'cancelled'    # Annulée volontairement (perdante d'un hedge, échéance de la requête)
+ERROR_OTHER = 'other'            # 400, 5xx, réponse vide, erreur réseau...
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Disjoncteur d'une clé : fermé -> ouvert -> semi-ouvert -> fermé"""
+
+    def __init__(self, cooldown=30.0, auth_cooldown=300.0, timeout_threshold=2):
+        self.cooldown = cooldown
+        self.auth_cooldown = auth_cooldown
+        self.timeout_threshold = timeout_threshold
+        self.state = STATE_CLOSED
+        self.consecutive_timeouts = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        self.times_opened = 0
+
+    def allows(self, now):
+        """La clé peut-elle recevoir une requête maintenant ?"""
+        if self.state == STATE_OPEN and now >= self.open_until:
+            self.state = STATE_HALF_OPEN
+            self.trial_in_flight = False
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_HALF_OPEN:
+            return not self.trial_in_flight
+        return False
+
+    def on_acquire(self):
+        if self.state == STATE_HALF_OPEN:
+            self.trial_in_flight = True
+
+    def open(self, now, duration):
+        self.state = STATE_OPEN
+        self.open_until = max(self.open_until, now + duration)
+        self.trial_in_flight = False
+        self.times_opened += 1
+
+    def record(self, error_kind, now, retry_after=None):
+        if error_kind is None:
+            self.state = STATE_CLOSED
+            self.consecutive_timeouts = 0
+            self.trial_in_flight = False
+            return
+
+        if error_kind == ERROR_AUTH:
+            self.open(now, self.auth_cooldown)
+        elif error_kind == ERROR_RATE_LIMIT:
+            self.open(now, retry_after if retry_after else self.cooldown)
+        elif error_kind == ERROR_TIMEOUT:
+            self.consecutive_timeouts += 1
+            if self.consecutive_timeouts >= self.timeout_threshold or self.state == STATE_HALF_OPEN:
+                self.open(now, self.cooldown)
+        elif self.state == STATE_HALF_OPEN:
+            # L'essai a échoué pour une autre raison : on libère l'essai sans pénaliser la clé
+            self.trial_in_flight = False
+
+
+class PooledKey:
+    """Une clé du pool avec son état de répartition"""
+
+    def __init__(self, api_key, label, weight=1, max_concurrency=4, breaker=None):
+        self.api_key = api_key
+        self.label = label
+        self.weight = max(1, int(weight))
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.breaker = breaker or CircuitBreaker()
+        self.in_flight = 0
+        self.current_weight = 0
+        self.successes = 0
+        self.failures = 0
+
+
+def parse_api_keys(raw):
+    """Lit une liste "cle1:3,cle2,cle3:2" en [(clé, poids), ...]"""
+    keys = []
+    for item in (raw or '').replace('\n', ',').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        key, _, weight = item.partition(':')
+        try:
+            weight = int(weight) if weight.strip() else 1
+        except ValueError:
+            weight = 1
+        if key.strip():
+            keys.append((key.strip(), weight))
+    return keys
+
+
+class KeyPool:
+    """Répartit les appels entre les clés disponibles (poids, limite de concurrence, disjoncteur)"""
+
+    def __init__(self, keys, max_concurrency=4, cooldown=30.0, auth_cooldown=300.0, timeout_threshold=2):
+        self._condition = threading.Condition()
+        self.keys = []
+        seen = set()
+        for api_key, weight in keys:
+            if api_key in seen:
+                continue
+            seen.add(api_key)
+            self.keys.append(PooledKey(
+                api_key,
+                label=f"clé {len(self.keys) + 1}",
+                weight=weight,
+                max_concurrency=max_concurrency,
+                breaker=CircuitBreaker(cooldown, auth_cooldown, timeout_threshold),
+            ))
+        self._by_key = {pooled.api_key: pooled for pooled in self.keys}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def label_for(self, api_key):
+        pooled = self._by_key.get((api_key or '').strip())
+        return pooled.label if pooled else "clé hors pool"
+
+    def _select(self, exclude, now):
+        """Round-robin pondéré lisse (à la nginx) parmi les clés disponibles"""
+        candidates = [
+            pooled for pooled in self.keys
+            if pooled.api_key not in exclude
+            and pooled.in_flight < pooled.max_concurrency
+            and pooled.breaker.allows(now)
+        ]
+        if not candidates:
+            return None
+        total = sum(pooled.weight for pooled in candidates)
+        for pooled in candidates:
+            pooled.current_weight += pooled.weight
+        chosen = max(candidates, key=lambda pooled: pooled.current_weight)
+        chosen.current_weight -= total
+        return chosen
+
+    def _usable(self, exclude, now):
+        """Reste-t-il une clé qui pourrait se libérer (disjoncteur non ouvert) ?"""
+        return any(
+            pooled.api_key not in exclude and pooled.breaker.allows(now)
+            for pooled in self.keys
+        )
+
+    def has_usable(self, exclude=()):
+        with self._condition:
+            return self._usable(exclude, time.time())
+
+    def acquire(self, exclude=(), timeout=2.0):
+        """Réserve une clé ; attend au plus `timeout` secondes qu'une place se libère"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.time()
+                chosen = self._select(exclude, now)
+                if chosen is not None:
+                    chosen.in_flight += 1
+                    chosen.breaker.on_acquire()
+                    return chosen
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._usable(exclude, now):
+                    return None
+                self._condition.wait(remaining)
+
+    async def acquire_async(self, exclude=(), timeout=2.0, poll_interval=0.05):
+        """Comme acquire, sans bloquer la boucle d'événements"""
+        deadline = time.monotonic() + timeout
+        while True:
+            chosen = self.acquire(exclude, timeout=0)
+            if chosen is not None:
+                return chosen
+            if time.monotonic() >= deadline or not self.has_usable(exclude):
+                return None
+            await asyncio.sleep(poll_interval)
+
+    def release(self, pooled, error_kind=None, retry_after=None):
+        """Libère la clé et met à jour son disjoncteur selon le résultat de l'appel"""
+        with self._condition:
+            pooled.in_flight = max(0, pooled.in_flight - 1)
+            pooled.breaker.record(error_kind, time.time(), retry_after)
+            if error_kind is None:
+                pooled.successes += 1
+            elif error_kind != ERROR_CANCELLED:
+                pooled.failures += 1
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            now = time.time()
+            return [
+                {
+                    'key': pooled.label,
+                    'fingerprint': key_fingerprint(pooled.api_key),
+                    'weight': pooled.weight,
+                    'in_flight': pooled.in_flight,
+                    'max_concurrency': pooled.max_concurrency,
+                    'state': STATE_HALF_OPEN
+                    if pooled.breaker.state == STATE_OPEN and now >= pooled.breaker.open_until
+                    else pooled.breaker.state,
+                    'open_for': round(max(0.0, pooled.breaker.open_until - now), 1)
+                    if pooled.breaker.state == STATE_OPEN else 0.0,
+                    'times_opened': pooled.breaker.times_opened,
+                    'successes': pooled.successes,
+                    'failures': pooled.failures,
+                }
+                for pooled in self.keys
+            ]
@@ -0,0 +1,237 @@
+"""
+Cache des réponses de l'IA (adressé par contenu)
+
+La clé est une empreinte SHA-256 du modèle, du prompt, de la température et de
+max_tokens : deux prompts identiques octet par octet partagent la même réponse.
+
+Deux backends :
+- MemoryLLMCache : en mémoire du processus (LRU + TTL + borne mémoire)
+- SqliteLLMCache : fichier SQLite en mode WAL, partagé par tous les workers gunicorn
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(model, prompt, temperature, max_tokens, *extra):
+    """Empreinte stable des paramètres qui déterminent la réponse du modèle"""
+    material = json.dumps([model, prompt, temperature, max_tokens, *extra],
+                          ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class _CacheCounters:
+    """Compteurs succès / échecs / évictions, partagés entre threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def add(self, name, count=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class MemoryLLMCache:
+    """Cache LRU en mémoire avec durée de vie et borne en octets"""
+
+    backend = 'memory'
+
+    def __init__(self, ttl=3600, max_entries=1000, max_bytes=20 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clé -> (valeur, taille, expiration)
+        self._bytes = 0
+        self.counters = _CacheCounters()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters.add('misses')
+                return None
+            value, size, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._bytes -= size
+                self.counters.add('expirations')
+                self.counters.add('misses')
+                return None
+            self._entries.move_to_end(key)
+        self.counters.add('hits')
+        return value
+
+    def set(self, key, value):
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size, time.time() + self.ttl)
+            self._bytes += size
+
+            evicted = 0
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, old_size, _) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                evicted += 1
+        if evicted:
+            self.counters.add('evictions', evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            entries = len(self._entries)
+            size = self._bytes
+        return dict(self.counters.snapshot(), backend=self.backend, entries=entries, bytes=size)
+
+
+class SqliteLLMCache:
+    """Cache LRU persistant dans un fichier SQLite (WAL), partagé entre processus
+
+    LRU approximatif : un succès ne réécrit last_access que s'il date de plus de
+    touch_interval secondes ; les autres lectures ne prennent pas le verrou
+    d'écriture partagé par tous les workers.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path, ttl=3600, max_entries=1000, max_bytes=20 * 1024 * 1024, touch_interval=60.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self.counters = _CacheCounters()
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache(last_access)")
+        conn.commit()
+
+    def _connection(self):
+        # Une connexion par thread : sqlite3 n'autorise pas le partage par défaut
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute("SELECT value, expires_at, last_access FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.counters.add('misses')
+            return None
+        value, expires_at, last_access = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+            self.counters.add('expirations')
+            self.counters.add('misses')
+            return None
+        if now - last_access >= self.touch_interval:
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+        self.counters.add('hits')
+        return value
+
+    def set(self, key, value):
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, value, size, now + self.ttl, now),
+        )
+        evicted = self._evict(conn, now)
+        conn.commit()
+        if evicted:
+            self.counters.add('evictions', evicted)
+
+    def _evict(self, conn, now):
+        """Supprime les entrées expirées puis les moins récemment utilisées au-delà des bornes"""
+        conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        evicted = 0
+        if count <= self.max_entries and total <= self.max_bytes:
+            return evicted
+        for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access ASC").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            evicted += 1
+        return evicted
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+
+    def stats(self):
+        count, total = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        return dict(self.counters.snapshot(), backend=self.backend, entries=count, bytes=total)
+
+
+def default_cache_path():
+    """Emplacement par défaut du fichier de cache (/tmp est le seul dossier inscriptible sur Vercel)"""
+    return os.path.join(tempfile.gettempdir(), 'my_ia_llm_cache.sqlite3')
+
+
+def create_llm_cache(backend='memory', path=None, ttl=3600, max_entries=1000, max_bytes=20 * 1024 * 1024):
+    """Construit le cache demandé ('memory', 'sqlite' ou 'off' pour le désactiver)"""
+    backend = (backend or 'off').strip().lower()
+    if backend == 'memory':
+        return MemoryLLMCache(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+    if backend == 'sqlite':
+        return SqliteLLMCache(path or default_cache_path(), ttl=ttl,
+                              max_entries=max_entries, max_bytes=max_bytes)
+    return None
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test de charge des routes principales : /api/process-objectives, /api/analyze-ikigai
+et /api/generate-pdf
+
+Envoie --requests requêtes par route avec --concurrency requêtes simultanées et
+affiche, par route : débit (requêtes/s), latences p50 / p95 / p99 / moyenne,
+codes HTTP et erreurs.
+
+Deux modes :
+- --url http://127.0.0.1:5000 : application déjà démarrée (gunicorn, python app.py)
+- --spawn : démarre en local le serveur Mistral simulé (mock_mistral_server.py)
+  et l'application Flask branchée dessus (aucun appel à la vraie API) ; les
+  options de latence et de pannes du serveur simulé sont acceptées
+
+Par défaut chaque requête porte des objectifs différents (les caches ne servent
+pas) ; --repeat réutilise le même jeu pour mesurer le chemin avec cache.
+
+Usage :
+    python load_test.py --spawn --concurrency 8 --requests 50 --latency-mean 1.0 --rate-429 0.05
+    python load_test.py --url http://127.0.0.1:5000 --endpoint pdf --concurrency 4 --requests 40
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mock_mistral_server
+
+ENDPOINTS = ('objectives', 'ikigai', 'pdf')
+
+OBJECTIVES = ["Courir un semi-marathon", "Apprendre l'espagnol", "Économiser pour un voyage",
+              "Lire un livre par mois", "Lancer un blog de cuisine"]
+
+
+def objectives_payload(number, args):
+    suffix = '' if args.repeat else f" (essai {number})"
+    return {'objectives': [text + suffix for text in OBJECTIVES[:args.objectives]]}
+
+
+def ikigai_payload(number, args):
+    suffix = '' if args.repeat else f" ({number})"
+    return {
+        'what_you_love': "La cuisine, la randonnée et transmettre" + suffix,
+        'what_you_are_good_at': "Organiser, expliquer simplement, écrire",
+        'what_world_needs': "Une alimentation plus saine et locale",
+        'what_you_can_be_paid_for': "Ateliers de cuisine, rédaction de contenus",
+    }
+
+
+def pdf_payload(number, args):
+    objectives = [dict(mock_mistral_server.fake_smart_object(text), original_text=text)
+                  for text in OBJECTIVES[:args.objectives]]
+    ikigai = dict(ikigai_payload(number, args), analysis=mock_mistral_server.fake_content("IKIGAI"))
+    return {'objectives': objectives, 'ikigai': ikigai}
+
+
+ROUTES = {
+    'objectives': ('/api/process-objectives', objectives_payload),
+    'ikigai': ('/api/analyze-ikigai', ikigai_payload),
+    'pdf': ('/api/generate-pdf', pdf_payload),
+}
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def run_endpoint(base_url, name, args):
+    """Envoie les requêtes d'une route et retourne ses mesures"""
+    path, make_payload = ROUTES[name]
+    payloads = [make_payload(number, args) for number in range(args.requests)]
+    local = threading.local()
+    latencies, statuses, errors = [], {}, []
+    lock = threading.Lock()
+
+    def send(payload):
+        # Une session par thread : connexions keep-alive réutilisées, comme un vrai client
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            response = session.post(base_url + path, json=payload, timeout=args.timeout)
+            response.content
+            status = response.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status != 200:
+                errors.append(status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(send, payloads))
+    wall = time.perf_counter() - started
+    return {
+        'endpoint': name,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'statuses': statuses,
+        'rps': len(latencies) / wall if wall else 0.0,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'mean': sum(latencies) / len(latencies),
+    }
+
+
+def print_report(results, args):
+    print(f"\nConcurrence {args.concurrency}, {args.requests} requêtes par route")
+    print(f"{'route':<12} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'moy.':>8} {'erreurs':>8}  codes")
+    for result in results:
+        codes = ', '.join(f"{status}: {count}" for status, count in sorted(result['statuses'].items(), key=str))
+        print(f"{result['endpoint']:<12} {result['rps']:>8.2f} {result['p50']:>7.3f}s {result['p95']:>7.3f}s "
+              f"{result['p99']:>7.3f}s {result['mean']:>7.3f}s {result['errors']:>8}  {codes}")
+
+
+def spawn(args):
+    """Démarre le serveur Mistral simulé puis l'application branchée dessus ; retourne l'URL de l'application"""
+    mock = mock_mistral_server.start_in_thread('127.0.0.1', args.mock_port,
+                                               mock_mistral_server.settings_from_args(args))
+    print(f"Mistral simulé sur le port {mock.server_address[1]}")
+    # config.py lit l'environnement à l'import : à positionner avant d'importer app
+    os.environ['MISTRAL_API_URL'] = f"http://127.0.0.1:{mock.server_address[1]}/v1/chat/completions"
+    os.environ.setdefault('MISTRAL_API_KEYS', ','.join(f"cle-simulee-{number}" for number in range(args.keys)))
+    import logging
+    from werkzeug.serving import make_server
+    import app as app_module
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # Pas de ligne de journal par requête
+    server = make_server('127.0.0.1', args.app_port, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="URL de l'application déjà démarrée")
+    parser.add_argument('--spawn', action='store_true', help="démarre le serveur simulé et l'application")
+    parser.add_argument('--endpoint', default='all', choices=ENDPOINTS + ('all',))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=40, help='requêtes par route')
+    parser.add_argument('--objectives', type=int, default=3, choices=range(1, len(OBJECTIVES) + 1),
+                        help='objectifs par requête')
+    parser.add_argument('--repeat', action='store_true', help='même jeu de données à chaque requête (caches actifs)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='timeout client (s)')
+    parser.add_argument('--app-port', type=int, default=0, help='port de l\'application avec --spawn (0 = libre)')
+    parser.add_argument('--mock-port', type=int, default=0, help='port du serveur simulé avec --spawn (0 = libre)')
+    parser.add_argument('--keys', type=int, default=3, help='clés API simulées avec --spawn')
+    mock_mistral_server.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.spawn:
+        base_url = spawn(args)
+    elif args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        parser.error("--url ou --spawn est requis")
+
+    endpoints = ENDPOINTS if args.endpoint == 'all' else (args.endpoint,)
+    results = []
+    for name in endpoints:
+        print(f"{name} : {args.requests} requêtes...")
+        results.append(run_endpoint(base_url, name, args))
+    print_report(results, args)
+
+
+if __name__ == '__main__':
+    main()
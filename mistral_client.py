@@ -0,0 +1,260 @@
+"""
+Client HTTP mutualisé pour l'API Mistral
+
+Une session requests (keep-alive) par clé API, créée une seule fois par processus
+et partagée par tous les threads de traitement. Cela évite de refaire la
+résolution DNS, la connexion TCP et la négociation TLS à chaque appel.
+"""
+
+import contextvars
+import hashlib
+import json
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Client asynchrone optionnel (pipeline asyncio)
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class ConnectionStats:
+    """Compteurs thread-safe : requêtes envoyées et connexions réellement ouvertes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def snapshot(self):
+        with self._lock:
+            requests_count = self.requests
+            new_connections = self.new_connections
+        reused = max(0, requests_count - new_connections)
+        return {
+            'requests': requests_count,
+            'new_connections': new_connections,
+            'reused_connections': reused,
+            'reuse_rate': round(reused / requests_count, 3) if requests_count else 0.0,
+        }
+
+
+def _counting_pool_class(base_class, stats):
+    """Crée une classe de pool urllib3 qui compte les nouvelles connexions"""
+
+    class CountingConnectionPool(base_class):
+        def _new_conn(self):
+            stats.record_new_connection()
+            return super()._new_conn()
+
+    return CountingConnectionPool
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """Adaptateur requests qui alimente un ConnectionStats"""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, self.stats),
+            'https': _counting_pool_class(HTTPSConnectionPool, self.stats),
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        return super().send(request, **kwargs)
+
+
+class MistralReply:
+    """Résultat d'un appel Mistral : contenu ou type d'échec (utilisé par le pool de clés)"""
+
+    __slots__ = ('content', 'error', 'status_code', 'retry_after', 'usage', 'finish_reason')
+
+    def __init__(self, content=None, error=None, status_code=None, retry_after=None, usage=None, finish_reason=None):
+        self.content = content
+        self.error = error
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.usage = usage                  # Bloc usage de la réponse (tokens du prompt et générés)
+        self.finish_reason = finish_reason  # "length" : réponse coupée par max_tokens
+
+    def __bool__(self):
+        return bool(self.content)
+
+
+def iter_stream_deltas(lines, meta=None):
+    """Extrait les fragments de texte d'un flux SSE chat/completions (stream=True)
+
+    Si meta est un dict, il reçoit le bloc usage et le finish_reason envoyés en fin de flux.
+    """
+    for raw in lines:
+        if not raw:
+            continue
+        line = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+        if not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            break
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            continue
+        if meta is not None and chunk.get('usage'):
+            meta['usage'] = chunk['usage']
+        for choice in chunk.get('choices') or []:
+            if meta is not None and choice.get('finish_reason'):
+                meta['finish_reason'] = choice['finish_reason']
+            delta = (choice.get('delta') or {}).get('content')
+            if delta:
+                yield delta
+
+
+def key_fingerprint(api_key):
+    """Identifiant court et non réversible d'une clé API (pour les logs et les stats)"""
+    return hashlib.sha256(api_key.strip().encode('utf-8')).hexdigest()[:8]
+
+
+class MistralClientPool:
+    """Sessions HTTP keep-alive, une par clé API, partagées entre threads"""
+
+    def __init__(self, pool_maxsize=10):
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._stats = {}
+
+    def session_for(self, api_key):
+        """Retourne la session associée à la clé (créée au premier usage)"""
+        api_key = api_key.strip()
+        session = self._sessions.get(api_key)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(api_key)
+            if session is None:
+                stats = ConnectionStats()
+                adapter = CountingHTTPAdapter(
+                    stats,
+                    pool_connections=1,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=0,
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {api_key}",
+                })
+                self._stats[api_key] = stats
+                self._sessions[api_key] = session
+        return session
+
+    def post(self, api_key, url, **kwargs):
+        """POST via la session de la clé (connexion réutilisée si disponible)"""
+        return self.session_for(api_key).post(url, **kwargs)
+
+    def stats(self):
+        """Compteurs agrégés et par clé (les clés sont représentées par une empreinte)"""
+        with self._lock:
+            per_key = {key_fingerprint(key): stats.snapshot() for key, stats in self._stats.items()}
+
+        total_requests = sum(s['requests'] for s in per_key.values())
+        total_new = sum(s['new_connections'] for s in per_key.values())
+        total_reused = sum(s['reused_connections'] for s in per_key.values())
+        return {
+            'sessions': len(per_key),
+            'requests': total_requests,
+            'new_connections': total_new,
+            'reused_connections': total_reused,
+            'reuse_rate': round(total_reused / total_requests, 3) if total_requests else 0.0,
+            'per_key': per_key,
+        }
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._stats.clear()
+
+
+class AsyncMistralClient:
+    """Client HTTP asynchrone (httpx) partagé par toutes les tâches d'une boucle d'événements
+
+    Un seul pool de connexions keep-alive sert toutes les clés : l'en-tête
+    Authorization est passé à chaque requête.
+    """
+
+    def __init__(self, max_connections=100, max_keepalive=20):
+        if httpx is None:
+            raise RuntimeError("httpx n'est pas installé : pip install -r requirements.txt")
+        self.stats = ConnectionStats()
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+        )
+
+    async def post(self, api_key, url, json=None, timeout=8):
+        self.stats.record_request()
+        return await self._client.post(
+            url,
+            json=json,
+            timeout=timeout,
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {api_key.strip()}",
+            },
+        )
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+# Client asynchrone de la requête en cours (défini par async_mistral_client)
+_current_async_client = contextvars.ContextVar('mistral_async_client', default=None)
+
+
+class async_mistral_client:
+    """Contexte `async with` qui ouvre un AsyncMistralClient pour la boucle courante"""
+
+    def __init__(self, max_connections=100):
+        self.max_connections = max_connections
+        self._token = None
+        self.client = None
+
+    async def __aenter__(self):
+        self.client = AsyncMistralClient(max_connections=self.max_connections)
+        self._token = _current_async_client.set(self.client)
+        return self.client
+
+    async def __aexit__(self, *exc_info):
+        _current_async_client.reset(self._token)
+        await self.client.aclose()
+        return False
+
+
+def current_async_client():
+    """Client asynchrone actif ; lève une erreur hors d'un bloc async_mistral_client"""
+    client = _current_async_client.get()
+    if client is None:
+        raise RuntimeError("Aucun client asynchrone actif (utiliser `async with async_mistral_client()`)")
+    return client
+
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Serveur local qui imite l'endpoint chat/completions de Mistral (mesures hors ligne)
+
+- Latence tirée d'une distribution (fixed, uniform, normal, lognormal, exponential)
+  + un temps de génération proportionnel aux tokens produits (--tokens-per-second)
+- Injection d'erreurs : 429 (avec Retry-After), 401, 500 et timeouts (réponse
+  retenue --hang-seconds puis connexion fermée) ; une clé contenant « invalid »
+  reçoit toujours 401 ; --rate-partial retire deux champs des objectifs SMART
+  (exercice de la réparation des réponses incomplètes)
+- Réponses plausibles selon le prompt : objectif SMART (JSON), lot d'objectifs
+  ({"objectives": [...]}), analyse IKIGAI (markdown) ; max_tokens respecté
+  (réponse coupée, finish_reason = "length") et bloc usage renseigné
+- Flux SSE (stream=True) au rythme de génération
+- Enregistrement (--record FICHIER --upstream URL) : relaie les requêtes vers la
+  vraie API et enregistre les réponses en JSON Lines ; rejeu (--replay FICHIER) :
+  réponse enregistrée pour le même prompt, sinon une réponse du même type
+
+Usage :
+    python mock_mistral_server.py --port 8099 --latency lognormal --latency-mean 1.2 --rate-429 0.05
+    MISTRAL_API_URL=http://127.0.0.1:8099/v1/chat/completions MISTRAL_API_KEYS=cle1,cle2 python app.py
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SMART_FIELDS = ('goal', 'specific', 'measurable', 'achievable', 'relevant', 'time_bound', 'analysis')
+
+_BATCH_ITEM = re.compile(r'^\[(\d+)\] "(.*)"\s*$', re.MULTILINE)
+_OBJECTIVE = re.compile(r'^Objectif : "(.*)"$', re.MULTILINE)
+_REQUESTED_FIELD = re.compile(r'^\s*"(\w+)": "', re.MULTILINE)
+
+
+def estimate_tokens(text):
+    """Approximation : ~4 caractères par token"""
+    return max(1, len(text) // 4)
+
+
+def prompt_kind(prompt):
+    """Type de prompt : 'smart_batch', 'smart_repair', 'smart', 'ikigai' ou 'other'"""
+    if _BATCH_ITEM.search(prompt) and '"objectives"' in prompt:
+        return 'smart_batch'
+    if 'champs manquants' in prompt:
+        return 'smart_repair'
+    if '"goal"' in prompt:
+        return 'smart'
+    if 'IKIGAI' in prompt:
+        return 'ikigai'
+    return 'other'
+
+
+def prompt_digest(prompt):
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+def fake_smart_object(objective_text):
+    """Objectif SMART de longueur réaliste (~500 tokens)"""
+    filler = (f"Pour « {objective_text} », prévoir des étapes concrètes, un suivi hebdomadaire "
+              f"et des jalons datés en 2026 avec des indicateurs chiffrés. ")
+    return {
+        'goal': f"{objective_text} - objectif reformulé de manière claire et inspirante pour 2026",
+        'specific': filler * 3,
+        'measurable': filler * 3,
+        'achievable': filler * 3,
+        'relevant': filler * 3,
+        'time_bound': f"Échéance au 31/12/2026, jalons au 31/03/2026, 30/06/2026 et 30/09/2026. {filler}",
+        'analysis': filler * 5,
+    }
+
+
+def fake_content(prompt, partial=False):
+    """Réponse synthétique adaptée au type de prompt (partial : objectif SMART incomplet)"""
+    kind = prompt_kind(prompt)
+    if kind == 'smart_batch':
+        items = [dict(fake_smart_object(text), objective_id=int(idx)) for idx, text in _BATCH_ITEM.findall(prompt)]
+        return json.dumps({'objectives': items}, ensure_ascii=False)
+    if kind in ('smart', 'smart_repair'):
+        match = _OBJECTIVE.search(prompt)
+        smart_obj = fake_smart_object(match.group(1) if match else "Objectif")
+        if kind == 'smart_repair':
+            # Seulement les champs demandés (ceux du format attendu, après le contexte)
+            requested = _REQUESTED_FIELD.findall(prompt.rsplit('format exact', 1)[-1])
+            smart_obj = {field: smart_obj[field] for field in requested if field in smart_obj}
+        elif partial:
+            for field in ('time_bound', 'analysis'):
+                smart_obj.pop(field)
+        return json.dumps(smart_obj, ensure_ascii=False)
+    if kind == 'ikigai':
+        sections = ["## TON IKIGAI (Raison d'Être)", "## ANALYSE ET INSIGHTS",
+                    "## RECOMMANDATIONS CONCRÈTES", "## PISTES D'ACTION POUR 2026"]
+        paragraph = ("Tes passions, tes talents et les besoins du monde se rejoignent dans un projet "
+                     "concret et rémunérateur, à construire pas à pas tout au long de 2026. ")
+        return "\n\n".join(f"{title}\n\n{paragraph * 4}" for title in sections)
+    return "Bonjour ! " * 20
+
+
+class LatencyModel:
+    """Latence avant le premier token (distribution) + temps de génération"""
+
+    def __init__(self, distribution='lognormal', mean=0.8, sigma=0.4, minimum=0.0, maximum=30.0,
+                 tokens_per_second=0.0, seed=None):
+        self.distribution = distribution
+        self.mean = mean
+        self.sigma = sigma
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tokens_per_second = tokens_per_second
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def first_token(self):
+        with self._lock:
+            if self.distribution == 'fixed':
+                value = self.mean
+            elif self.distribution == 'uniform':
+                value = self.random.uniform(max(0.0, self.mean - self.sigma), self.mean + self.sigma)
+            elif self.distribution == 'normal':
+                value = self.random.gauss(self.mean, self.sigma)
+            elif self.distribution == 'exponential':
+                value = self.random.expovariate(1.0 / self.mean) if self.mean > 0 else 0.0
+            else:
+                # lognormal : médiane = mean, sigma = dispersion (queue longue réaliste)
+                value = self.random.lognormvariate(math.log(max(self.mean, 1e-6)), self.sigma)
+        return min(self.maximum, max(self.minimum, value))
+
+    def per_token(self):
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+
+class Recordings:
+    """Réponses enregistrées (JSON Lines) : par empreinte du prompt, et par type de prompt"""
+
+    def __init__(self, path=None, seed=None):
+        self.by_digest = {}
+        self.by_kind = {}
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        if path:
+            with open(path, encoding='utf-8') as handle:
+                for line in handle:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    def _index(self, entry):
+        self.by_digest[entry['prompt_sha256']] = entry['content']
+        self.by_kind.setdefault(entry['kind'], []).append(entry['content'])
+
+    def __len__(self):
+        return len(self.by_digest)
+
+    def find(self, prompt):
+        """Réponse enregistrée pour ce prompt, sinon pour le même type de prompt, sinon None"""
+        with self._lock:
+            content = self.by_digest.get(prompt_digest(prompt))
+            if content is None and self.by_kind.get(prompt_kind(prompt)):
+                content = self.random.choice(self.by_kind[prompt_kind(prompt)])
+            return content
+
+    def append(self, path, prompt, content):
+        entry = {'prompt_sha256': prompt_digest(prompt), 'kind': prompt_kind(prompt), 'content': content}
+        with self._lock:
+            self._index(entry)
+            with open(path, 'a', encoding='utf-8') as handle:
+                handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class MockSettings:
+    """Paramètres du serveur (partagés par tous les threads de requête)"""
+
+    def __init__(self, latency=None, rate_429=0.0, rate_401=0.0, rate_500=0.0, rate_timeout=0.0, rate_partial=0.0,
+                 hang_seconds=30.0, retry_after=1, recordings=None, record_path=None, upstream=None, seed=None):
+        self.latency = latency or LatencyModel(seed=seed)
+        self.rate_429 = rate_429
+        self.rate_401 = rate_401
+        self.rate_500 = rate_500
+        self.rate_timeout = rate_timeout
+        self.rate_partial = rate_partial
+        self.hang_seconds = hang_seconds
+        self.retry_after = retry_after
+        self.recordings = recordings or Recordings()
+        self.record_path = record_path
+        self.upstream = upstream
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def draw_fault(self, api_key):
+        """Panne injectée pour cette requête : 'auth', 'rate_limit', 'server', 'timeout' ou None"""
+        if 'invalid' in api_key:
+            return 'auth'
+        with self._lock:
+            roll = self.random.random()
+        for fault, rate in (('auth', self.rate_401), ('rate_limit', self.rate_429),
+                            ('server', self.rate_500), ('timeout', self.rate_timeout)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    def draw_partial(self):
+        with self._lock:
+            return self.random.random() < self.rate_partial
+
+
+class MockMistralHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    settings = None  # MockSettings, fixé par make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, dict(self.settings.counts, recordings=len(self.settings.recordings)))
+        else:
+            self._send_json(404, {'message': 'Not found'})
+
+    def do_POST(self):
+        settings = self.settings
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            settings.count('400')
+            self._send_json(400, {'message': 'Invalid JSON body'})
+            return
+        api_key = self.headers.get('Authorization', '').replace('Bearer ', '', 1)
+
+        fault = settings.draw_fault(api_key)
+        if fault:
+            settings.count(fault)
+        if fault == 'auth':
+            self._send_json(401, {'message': 'Unauthorized'})
+            return
+        if fault == 'rate_limit':
+            self._send_json(429, {'message': 'Requests rate limit exceeded'},
+                            {'Retry-After': str(settings.retry_after), 'ratelimitbysize-remaining': '0'})
+            return
+        if fault == 'server':
+            self._send_json(500, {'message': 'Internal server error'})
+            return
+        if fault == 'timeout':
+            # Aucune réponse : le client doit abandonner sur son timeout de lecture
+            time.sleep(settings.hang_seconds)
+            self.close_connection = True
+            return
+
+        # Message système (consignes) et message utilisateur, lus comme un seul texte
+        prompt = "\n\n".join(message.get('content', '') for message in body.get('messages') or [])
+        content = self._content_for(prompt, body, api_key)
+        if content is None:
+            settings.count('upstream_error')
+            self._send_json(502, {'message': 'Upstream error'})
+            return
+
+        max_tokens = int(body.get('max_tokens') or 4096)
+        finish_reason = 'stop'
+        if estimate_tokens(content) > max_tokens:
+            content = content[:max_tokens * 4]
+            finish_reason = 'length'
+        usage = {'prompt_tokens': estimate_tokens(prompt), 'completion_tokens': estimate_tokens(content)}
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+
+        time.sleep(settings.latency.first_token())
+        settings.count('ok')
+        if body.get('stream'):
+            self._stream(content, finish_reason, usage)
+            return
+        time.sleep(settings.latency.per_token() * usage['completion_tokens'])
+        self._send_json(200, {
+            'id': 'mock-' + prompt_digest(prompt)[:12],
+            'object': 'chat.completion',
+            'model': body.get('model', 'mistral-small-latest'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                         'finish_reason': finish_reason}],
+            'usage': usage,
+        })
+
+    def _content_for(self, prompt, body, api_key):
+        settings = self.settings
+        if settings.upstream:
+            content = self._fetch_upstream(body, api_key)
+            if content is not None and settings.record_path:
+                settings.recordings.append(settings.record_path, prompt, content)
+            return content
+        recorded = settings.recordings.find(prompt)
+        if recorded is not None:
+            settings.count('replayed')
+            return recorded
+        partial = prompt_kind(prompt) == 'smart' and settings.draw_partial()
+        if partial:
+            settings.count('partial')
+        return fake_content(prompt, partial)
+
+    def _fetch_upstream(self, body, api_key):
+        """Relaie la requête vers la vraie API (sans flux) et retourne le texte de la réponse"""
+        import requests
+        try:
+            response = requests.post(self.settings.upstream, json=dict(body, stream=False), timeout=60,
+                                     headers={'Authorization': f'Bearer {api_key}'})
+            response.raise_for_status()
+            return response.json()['choices'][0]['message']['content']
+        except Exception as e:
+            print(f"Relais vers {self.settings.upstream} impossible : {e}", file=sys.stderr)
+            return None
+
+    def _stream(self, content, finish_reason, usage):
+        """Flux SSE en transfert chunked : un fragment par mot, au rythme de génération"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write_event(payload):
+            data = f"data: {payload}\n\n".encode('utf-8')
+            self.wfile.write(b'%x\r\n' % len(data) + data + b'\r\n')
+            self.wfile.flush()
+
+        per_token = self.settings.latency.per_token()
+        try:
+            for word in re.findall(r'\S+\s*', content):
+                write_event(json.dumps({'choices': [{'index': 0, 'delta': {'content': word}}]}, ensure_ascii=False))
+                time.sleep(per_token * estimate_tokens(word))
+            write_event(json.dumps({'choices': [{'index': 0, 'delta': {}, 'finish_reason': finish_reason}],
+                                    'usage': usage}))
+            write_event('[DONE]')
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.settings.count('client_disconnected')
+
+
+def make_server(host='127.0.0.1', port=8099, settings=None):
+    """Serveur HTTP multi-thread (non démarré) ; settings : MockSettings"""
+    handler = type('ConfiguredMockMistralHandler', (MockMistralHandler,), {'settings': settings or MockSettings()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(host='127.0.0.1', port=8099, settings=None):
+    """Démarre le serveur dans un thread démon et le retourne (server.shutdown() pour l'arrêter)"""
+    server = make_server(host, port, settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_arguments(parser):
+    """Options du serveur (partagées avec load_test.py)"""
+    parser.add_argument('--latency', default='lognormal',
+                        choices=['fixed', 'uniform', 'normal', 'lognormal', 'exponential'])
+    parser.add_argument('--latency-mean', type=float, default=0.8, help='moyenne (médiane en lognormal), s')
+    parser.add_argument('--latency-sigma', type=float, default=0.4, help='dispersion de la distribution')
+    parser.add_argument('--latency-max', type=float, default=30.0)
+    parser.add_argument('--tokens-per-second', type=float, default=0.0,
+                        help='vitesse de génération simulée (0 = instantané)')
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-401', type=float, default=0.0)
+    parser.add_argument('--rate-500', type=float, default=0.0)
+    parser.add_argument('--rate-timeout', type=float, default=0.0)
+    parser.add_argument('--rate-partial', type=float, default=0.0, help='objectifs SMART avec deux champs absents')
+    parser.add_argument('--hang-seconds', type=float, default=30.0, help="durée d'une réponse en timeout")
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After des 429 (s)')
+    parser.add_argument('--replay', help='réponses enregistrées à rejouer (JSON Lines)')
+    parser.add_argument('--record', help='fichier JSON Lines où enregistrer les réponses de --upstream')
+    parser.add_argument('--upstream', help='vraie API à relayer (ex. https://api.mistral.ai/v1/chat/completions)')
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def settings_from_args(args):
+    latency = LatencyModel(args.latency, args.latency_mean, args.latency_sigma, maximum=args.latency_max,
+                           tokens_per_second=args.tokens_per_second, seed=args.seed)
+    return MockSettings(
+        latency=latency,
+        rate_429=args.rate_429,
+        rate_401=args.rate_401,
+        rate_500=args.rate_500,
+        rate_timeout=args.rate_timeout,
+        rate_partial=args.rate_partial,
+        hang_seconds=args.hang_seconds,
+        retry_after=args.retry_after,
+        recordings=Recordings(args.replay, seed=args.seed),
+        record_path=args.record,
+        upstream=args.upstream,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    add_arguments(parser)
+    args = parser.parse_args()
+    if args.record and not args.upstream:
+        parser.error("--record nécessite --upstream")
+
+    settings = settings_from_args(args)
+    server = make_server(args.host, args.port, settings)
+    print(f"Mistral simulé sur http://{args.host}:{args.port}/v1/chat/completions "
+          f"(latence {args.latency} {args.latency_mean}s, {len(settings.recordings)} réponses enregistrées)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Cache des objectifs SMART, indépendant de la position de l'objectif
+
+Le prompt SMART contient le numéro de l'objectif et le nombre total
+d'objectifs : le même texte à une autre position ne retrouve jamais la réponse
+dans le cache des prompts (llm_cache). Ce cache-ci est adressé par une forme
+normalisée du texte de l'objectif (casse, accents, ponctuation et espaces
+neutralisés, année de référence retirée) et conserve l'objectif SMART validé.
+Le cadrage propre à la position (numéro, texte d'origine) est appliqué par
+l'appelant après la consultation du cache.
+
+Les entrées sont stockées dans le backend de llm_cache (mémoire ou SQLite),
+sous des clés distinctes de celles des prompts.
+"""
+
+import json
+import re
+import threading
+import unicodedata
+
+from llm_cache import make_cache_key
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+# Préposition temporelle devant l'année : « en 2026 », « d'ici fin 2026 »...
+_YEAR_PREFIX = r"\b(?:en|pour|avant|courant|d ici(?: fin)?|fin|d ici a la fin de)\s+"
+
+
+def fold_accents(text):
+    """Retire les accents (é -> e, ç -> c) ; les ligatures œ / æ sont développées"""
+    decomposed = unicodedata.normalize('NFKD', text.replace('œ', 'oe').replace('æ', 'ae'))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def normalize_objective(text, reference_year=None):
+    """Forme canonique d'un objectif : « Perdre du poids en 2026 ! » -> « perdre du poids »
+
+    reference_year : année implicite de l'application ; mentionnée ou non, l'objectif
+    est le même (les autres années restent dans la clé). Elle n'est retirée qu'après
+    une préposition temporelle ou en fin de texte : ailleurs, c'est une quantité
+    (« économiser 2026 euros »).
+    """
+    normalized = _NON_ALNUM.sub(' ', fold_accents((text or '').casefold())).strip()
+    if reference_year:
+        year = int(reference_year)
+        normalized = re.sub(rf"{_YEAR_PREFIX}{year}\b|\b{year}$", ' ', normalized)
+        normalized = ' '.join(normalized.split())
+    return normalized
+
+
+class ObjectiveCache:
+    """Objectifs SMART validés, adressés par le texte normalisé de l'objectif"""
+
+    def __init__(self, backend, model, reference_year=None, namespace='smart_objective_v1'):
+        self.backend = backend
+        self.model = model
+        self.reference_year = reference_year
+        self.namespace = namespace  # À changer si le prompt SMART évolue (invalide les entrées)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def key_for(self, objective_text):
+        """Clé de l'objectif (None si le texte normalisé est vide)"""
+        normalized = normalize_objective(objective_text, self.reference_year)
+        if not normalized:
+            return None
+        return make_cache_key(self.model, normalized, None, None, self.namespace)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, objective_text):
+        """Copie de l'objectif SMART en cache, ou None"""
+        key = self.key_for(objective_text)
+        if self.backend is None or key is None:
+            return None
+        cached = self.backend.get(key)
+        if not cached:
+            self._count('misses')
+            return None
+        try:
+            smart_obj = json.loads(cached)
+        except ValueError:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return smart_obj
+
+    def set(self, objective_text, smart_obj):
+        """Enregistre un objectif SMART validé (sans les champs liés à la position)"""
+        key = self.key_for(objective_text)
+        if self.backend is None or key is None:
+            return
+        self.backend.set(key, json.dumps(smart_obj, ensure_ascii=False))
+        self._count('stores')
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,377 @@
+"""
+Génération du document PDF (objectifs SMART et IKIGAI)
+
+Module sans dépendance à l'application Flask : il est importé par les
+processus du pool de génération (pdf_pool.py), qui n'ont pas à charger
+app.py (clients Mistral, caches, index de similarité).
+
+Le document rendu n'est pas recopié jusqu'à la réponse : ReportLab écrit le
+PDF complet en un seul write dans un PdfSpool, qui garde cet objet bytes tel
+quel ou, au-delà de spool_threshold octets, l'écrit dans un fichier temporaire
+envoyé ensuite par blocs. La mémoire tenue par document jusqu'à la fin de la
+réponse est ainsi bornée par le seuil.
+"""
+
+import io
+import os
+import tempfile
+from datetime import datetime
+
+from reportlab import rl_config
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table
+
+from pdf_theme import draw_header, get_pdf_theme
+
+# Au-delà : document écrit dans un fichier temporaire plutôt que gardé en mémoire
+SPOOL_THRESHOLD = 256 * 1024
+
+
+def configure_pdf_output(ascii85=False):
+    """Encodage ASCII85 des flux du PDF (réglage global de ReportLab, désactivé par défaut)"""
+    rl_config.useA85 = 1 if ascii85 else 0
+
+
+def clean_text_for_pdf(text):
+    """Nettoie le texte pour éviter les erreurs dans le PDF - Version améliorée"""
+    if not text:
+        return ""
+    import re
+    # Convertir en string
+    text = str(text)
+    
+    # Supprimer les null bytes et caractères de contrôle
+    text = ''.join(char for char in text if ord(char) >= 32 or char in '\n\t')
+    text = text.replace('\x00', '')
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    
+    # Nettoyer les balises markdown (en plusieurs passes pour éviter les conflits)
+    # D'abord les blocs de code
+    text = re.sub(r'```[\w]*\n.*?```', '', text, flags=re.DOTALL)  # Supprimer les blocs de code complets
+    text = re.sub(r'```', '', text)  # Supprimer les ``` restants
+    
+    # Ensuite les gras et italiques (ordre important)
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)  # **texte** -> texte (gras markdown)
+    text = re.sub(r'__(.+?)__', r'\1', text)  # __texte__ -> texte (gras markdown alternatif)
+    text = re.sub(r'\*(.+?)\*', r'\1', text)  # *texte* -> texte (italique markdown, mais attention aux astérisques seuls)
+    text = re.sub(r'_(.+?)_', r'\1', text)  # _texte_ -> texte (italique markdown)
+    
+    # Nettoyer les titres markdown
+    text = re.sub(r'##+\s*(.+?)(?:\n|$)', r'\1\n', text)  # ## Titre -> Titre
+    text = re.sub(r'#+\s*(.+?)(?:\n|$)', r'\1\n', text)  # # Titre -> Titre
+    
+    # Nettoyer le code inline
+    text = re.sub(r'`(.+?)`', r'\1', text)  # `code` -> code
+    
+    # Nettoyer les listes markdown
+    text = re.sub(r'^\s*[-*+]\s+', '', text, flags=re.MULTILINE)  # Supprimer les puces de liste
+    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)  # Supprimer les numéros de liste
+    
+    # Échapper les caractères HTML/XML pour ReportLab
+    text = re.sub(r'&(?![a-zA-Z]+;)', '&amp;', text)
+    text = text.replace('<', '&lt;').replace('>', '&gt;')
+    
+    # Réinsérer uniquement les balises HTML nécessaires pour ReportLab
+    text = text.replace('&lt;b&gt;', '<b>').replace('&lt;/b&gt;', '</b>')
+    text = text.replace('&lt;i&gt;', '<i>').replace('&lt;/i&gt;', '</i>')
+    text = text.replace('&lt;br/&gt;', '<br/>').replace('&lt;br&gt;', '<br/>')
+    text = text.replace('&lt;p&gt;', '<p>').replace('&lt;/p&gt;', '</p>')
+    
+    # Nettoyer les espaces multiples
+    text = re.sub(r' +', ' ', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)  # Max 2 retours à la ligne consécutifs
+    
+    return text.strip()
+
+
+class RenderedPdf:
+    """Document rendu : contenu en mémoire (data) ou fichier temporaire (file, ou path écrit par un processus du pool)"""
+
+    def __init__(self, size, data=None, file=None, path=None):
+        self.size = size
+        self.data = data
+        self.file = file
+        self.path = path
+
+    def open(self):
+        """Fichier binaire positionné au début, à envoyer par blocs"""
+        if self.file is None:
+            self.file = open(self.path, 'rb')
+        self.file.seek(0)
+        return self.file
+
+    def discard(self):
+        """Ferme et supprime le fichier temporaire (après l'envoi, ou si le document n'est pas envoyé)"""
+        if self.file is not None:
+            self.file.close()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class PdfSpool:
+    """Destination de doc.build : en mémoire jusqu'à threshold octets, au-delà dans un fichier temporaire
+
+    named : fichier nommé, à rouvrir depuis un autre processus (rendu dans le pool)
+    """
+
+    def __init__(self, threshold=SPOOL_THRESHOLD, named=False):
+        self.threshold = threshold
+        self.named = named
+        self.size = 0
+        self.file = None
+        self._chunks = []
+
+    def write(self, data):
+        if not isinstance(data, bytes):
+            data = bytes(data)  # bytearray / memoryview réutilisables par l'appelant : copie
+        if self.file is None and self.size + len(data) > self.threshold:
+            if self.named:
+                self.file = tempfile.NamedTemporaryFile(prefix='objectifs_', suffix='.pdf', delete=False)
+            else:
+                self.file = tempfile.TemporaryFile(prefix='objectifs_', suffix='.pdf')
+            for chunk in self._chunks:
+                self.file.write(chunk)
+            self._chunks = []
+        if self.file is not None:
+            self.file.write(data)
+        else:
+            self._chunks.append(data)  # bytes immuable : gardé sans copie
+        self.size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.size
+
+    def result(self):
+        """Document écrit (RenderedPdf)"""
+        if self.file is None:
+            data = self._chunks[0] if len(self._chunks) == 1 else b''.join(self._chunks)
+            return RenderedPdf(self.size, data=data)
+        if self.named:
+            self.file.close()
+            return RenderedPdf(self.size, path=self.file.name)
+        return RenderedPdf(self.size, file=self.file)
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            if self.named:
+                os.unlink(self.file.name)
+        self._chunks = []
+
+
+def create_pdf(objectives_list, ikigai_data, filename='objectifs_annee.pdf', output=None):
+    """Crée un PDF avec les objectifs SMART et IKIGAI - Version optimisée et robuste
+
+    output : destination du document (PdfSpool...) ; par défaut un BytesIO rembobiné, retourné
+    """
+    buffer = output if output is not None else io.BytesIO()
+    
+    # Styles partagés, construits une seule fois par processus (pdf_theme.py)
+    theme = get_pdf_theme()
+    
+    # Marges équilibrées pour une meilleure présentation
+    doc = SimpleDocTemplate(buffer, pagesize=theme.page_size, **theme.margins)
+    story = []
+    
+    # En-tête (logo, BuildNovaG, Objectifs-AI, Heureuse Année 2026) dessiné par draw_header :
+    # le flux lui réserve seulement sa place en haut de la première page
+    story.append(Spacer(1, theme.header_height))
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Spacer(1, 0.2*inch))
+    
+    # Titre principal
+    story.append(Paragraph("Mes Objectifs pour l'Année 2026", theme.title))
+    story.append(Spacer(1, 0.15*inch))
+    story.append(Paragraph(f"<i>Document généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}</i>", theme.date))
+    story.append(Spacer(1, 0.4*inch))
+    
+    # Section SMART - Traitement INDIVIDUEL et SPÉCIFIQUE pour chaque objectif
+    if objectives_list and len(objectives_list) > 0:
+        # En-tête de section avec nombre d'objectifs
+        total_obj = len(objectives_list)
+        section_title = f"Mes Objectifs SMART ({total_obj} objectif{'s' if total_obj > 1 else ''} traité{'s' if total_obj > 1 else ''} individuellement)"
+        story.append(Paragraph(section_title, theme.heading))
+        story.append(Spacer(1, 0.3*inch))
+        
+        for idx, smart_data in enumerate(objectives_list, 1):
+            # Obtenir l'ID de l'objectif (utiliser objective_id si disponible)
+            obj_id = smart_data.get('objective_id', idx)
+            total_objs = len(objectives_list)
+            
+            # Séparation visuelle marquée entre les objectifs (sauf pour le premier)
+            if idx > 1:
+                story.append(Spacer(1, 0.4*inch))
+                # Ligne de séparation plus visible
+                separator_table = Table([['']], colWidths=theme.full_width, rowHeights=[0.03*inch])
+                separator_table.setStyle(theme.separator_table)
+                story.append(separator_table)
+                story.append(Spacer(1, 0.4*inch))
+            
+            # Encadré pour chaque objectif avec fond coloré - TRAITEMENT INDIVIDUEL
+            goal_clean = clean_text_for_pdf(smart_data.get('goal', 'Objectif'))
+            original_text = smart_data.get('original_text', '')
+            
+            # En-tête de l'objectif avec fond coloré et numéro
+            obj_header_text = f"<b>OBJECTIF #{obj_id} / {total_objs}</b>"
+            if idx == 1:
+                obj_header_text += " <i>(Prioritaire)</i>"
+            
+            obj_header_data = [[Paragraph(obj_header_text, theme.obj_number)]]
+            obj_header = Table(obj_header_data, colWidths=theme.full_width, rowHeights=[0.45*inch])
+            obj_header.setStyle(theme.obj_header_table)
+            story.append(obj_header)
+            story.append(Spacer(1, 0.2*inch))
+            
+            # Titre de l'objectif (reformulé par l'IA)
+            story.append(Paragraph(f"<b>{goal_clean}</b>", theme.obj_title))
+            
+            # Afficher le texte original si différent du goal reformulé
+            if original_text and original_text.strip() and original_text.strip() != goal_clean:
+                original_clean = clean_text_for_pdf(original_text)
+                story.append(Paragraph(f"<i>Objectif original : \"{original_clean}\"</i>", theme.original_text))
+            
+            story.append(Spacer(1, 0.25*inch))
+            
+            # Tableau SMART amélioré - utiliser Paragraph pour gérer les retours à la ligne
+            def prepare_table_cell(text):
+                """Prépare une cellule de tableau avec Paragraph pour gérer les retours à la ligne"""
+                text = clean_text_for_pdf(text)
+                if not text or text.strip() == '':
+                    # Au lieu de "Non défini", générer un texte structuré basé sur l'objectif
+                    goal_for_context = clean_text_for_pdf(smart_data.get('goal', smart_data.get('original_text', 'Objectif')))
+                    return Paragraph(f'À compléter pour : {goal_for_context[:50]}...', theme.cell_missing)
+                # Remplacer les retours à la ligne par <br/>
+                text = text.replace('\n', '<br/>')
+                return Paragraph(text, theme.cell)
+            
+            smart_table_data = [
+                [Paragraph('<b>Critère</b>', theme.header_cell), 
+                 Paragraph('<b>Détails</b>', theme.header_cell)],
+                [Paragraph('<b>S - Spécifique</b>', theme.label_cell), 
+                 prepare_table_cell(smart_data.get('specific', 'Non défini'))],
+                [Paragraph('<b>M - Mesurable</b>', theme.label_cell), 
+                 prepare_table_cell(smart_data.get('measurable', 'Non défini'))],
+                [Paragraph('<b>A - Atteignable</b>', theme.label_cell), 
+                 prepare_table_cell(smart_data.get('achievable', 'Non défini'))],
+                [Paragraph('<b>R - Pertinent</b>', theme.label_cell), 
+                 prepare_table_cell(smart_data.get('relevant', 'Non défini'))],
+                [Paragraph('<b>T - Temporel</b>', theme.label_cell), 
+                 prepare_table_cell(smart_data.get('time_bound', 'Non défini'))],
+            ]
+            
+            smart_table = Table(smart_table_data, colWidths=theme.smart_columns, repeatRows=1)
+            smart_table.setStyle(theme.smart_table)
+            story.append(smart_table)
+            
+            # Analyse améliorée - texte complet SPÉCIFIQUE à cet objectif dans une boîte
+            if smart_data.get('analysis'):
+                story.append(Spacer(1, 0.25*inch))
+                analysis_text = clean_text_for_pdf(smart_data.get('analysis', ''))
+                # Remplacer les retours à la ligne par <br/>
+                analysis_text = analysis_text.replace('\n', '<br/>')
+                
+                # Boîte pour l'analyse avec fond coloré - Analyse SPÉCIFIQUE de cet objectif
+                analysis_title = f"<b>Analyse Spécifique de l'Objectif #{obj_id}:</b>"
+                full_analysis = f"{analysis_title}<br/><br/>{analysis_text}"
+                analysis_box_data = [[Paragraph(full_analysis, theme.analysis)]]
+                analysis_box = Table(analysis_box_data, colWidths=theme.full_width)
+                analysis_box.setStyle(theme.analysis_table)
+                story.append(analysis_box)
+            
+            # Espacement final après chaque objectif - TRAITEMENT INDIVIDUEL
+            story.append(Spacer(1, 0.4*inch))
+            
+            # Note de traitement individuel pour chaque objectif (sauf le dernier)
+            if idx < len(objectives_list):
+                note_text = f"<i>Objectif #{obj_id} traité individuellement par l'IA</i>"
+                story.append(Paragraph(note_text, theme.obj_note))
+            
+            # Saut de page après chaque objectif (sauf le dernier) si on a plusieurs objectifs
+            # Cela permet à chaque objectif d'avoir sa propre page pour un meilleur traitement individuel
+            if idx < len(objectives_list) and len(objectives_list) > 1:
+                story.append(PageBreak())
+        
+        # Saut de page seulement si on a aussi une section IKIGAI
+        if ikigai_data and (ikigai_data.get('what_you_love') or ikigai_data.get('what_you_are_good_at')):
+            story.append(PageBreak())
+    
+    # Section IKIGAI - Style amélioré
+    if ikigai_data and (ikigai_data.get('what_you_love') or ikigai_data.get('what_you_are_good_at')):
+        story.append(Paragraph("Mon IKIGAI", theme.heading))
+        story.append(Spacer(1, 0.2*inch))
+        
+        # Tableau IKIGAI amélioré - utiliser Paragraph pour gérer les retours à la ligne
+        def prepare_table_cell(text):
+            """Prépare une cellule de tableau avec Paragraph pour gérer les retours à la ligne"""
+            text = clean_text_for_pdf(text)
+            if not text or text.strip() == '':
+                return Paragraph('Non défini', theme.cell_undefined)
+            # Remplacer les retours à la ligne par <br/>
+            text = text.replace('\n', '<br/>')
+            return Paragraph(text, theme.cell)
+        
+        ikigai_table_data = [
+            [Paragraph('<b>Élément</b>', theme.header_cell), 
+             Paragraph('<b>Détails</b>', theme.header_cell)],
+            [Paragraph('Ce que j\'aime', theme.label_cell), 
+             prepare_table_cell(ikigai_data.get('what_you_love', 'Non défini'))],
+            [Paragraph('Ce en quoi je suis doué', theme.label_cell), 
+             prepare_table_cell(ikigai_data.get('what_you_are_good_at', 'Non défini'))],
+            [Paragraph('Ce dont le monde a besoin', theme.label_cell), 
+             prepare_table_cell(ikigai_data.get('what_world_needs', 'Non défini'))],
+            [Paragraph('Ce pour quoi je peux être payé', theme.label_cell), 
+             prepare_table_cell(ikigai_data.get('what_you_can_be_paid_for', 'Non défini'))],
+        ]
+        
+        ikigai_table = Table(ikigai_table_data, colWidths=theme.ikigai_columns, repeatRows=1)
+        ikigai_table.setStyle(theme.ikigai_table)
+        story.append(ikigai_table)
+        story.append(Spacer(1, 0.2*inch))
+        
+        # Analyse IKIGAI améliorée - texte complet sans limitation
+        if ikigai_data.get('analysis'):
+            analysis_text = clean_text_for_pdf(ikigai_data.get('analysis', ''))
+            # Remplacer les retours à la ligne par <br/>
+            analysis_text = analysis_text.replace('\n', '<br/>')
+            
+            story.append(Paragraph("<b>Analyse IKIGAI:</b>", theme.ikigai_title))
+            story.append(Paragraph(analysis_text, theme.ikigai_text))
+    
+    # Footer amélioré
+    story.append(Spacer(1, 0.4*inch))
+    story.append(Paragraph("<i>Document généré par BuildNovaG Objectifs-AI</i>", theme.footer))
+    story.append(Spacer(1, 0.15*inch))
+    story.append(Paragraph("<b>www.buildnovag.fr</b>", theme.footer_link))
+    
+    # Génération optimisée avec gestion d'erreurs robuste
+    try:
+        doc.build(story, onFirstPage=draw_header)
+    except Exception as e:
+        # En cas d'erreur, logger et réessayer
+        print(f"Erreur génération PDF: {e}")
+        import traceback
+        traceback.print_exc()
+        raise Exception(f"Impossible de générer le PDF: {str(e)}")
+    
+    # Vérifier que le buffer contient des données (position en fin d'écriture : taille, sans copie)
+    if buffer.tell() == 0:
+        raise Exception("Le PDF généré est vide")
+    
+    if output is None:
+        buffer.seek(0)
+    return buffer
+
+
+def render_pdf(objectives_list, ikigai_data, spool_threshold=SPOOL_THRESHOLD, named=False):
+    """Rend le document dans un PdfSpool et retourne le RenderedPdf (transmissible entre processus si named)"""
+    spool = PdfSpool(spool_threshold, named=named)
+    try:
+        create_pdf(objectives_list, ikigai_data, output=spool)
+    except Exception:
+        spool.discard()
+        raise
+    return spool.result()
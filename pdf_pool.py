@@ -0,0 +1,212 @@
+"""
+Génération des PDF dans un pool de processus préchauffés
+
+doc.build (ReportLab) est du Python pur qui garde le GIL : exécuté sur le
+thread de la requête, un gros PDF bloque toutes les autres requêtes du worker,
+y compris celles qui ne font qu'attendre Mistral. Le rendu est confié à des
+processus dédiés, tous démarrés et préchauffés au premier PDF demandé
+(ReportLab importé, thème construit, un document rendu à blanc) puis conservés
+pour la durée du worker : le débit suit le nombre de cœurs.
+
+Pas de démarrage à l'import d'app.py : les scripts qui l'importent (tests,
+benchmarks) ne lancent pas de processus. Avec spawn / forkserver, chaque
+processus réimporte le module principal : les scripts qui génèrent des PDF par
+la route doivent être protégés par if __name__ == '__main__'.
+
+La file est bornée : au-delà de max_pending rendus en cours ou en attente,
+render lève PdfPoolFull (réponse 503 + Retry-After, estimé d'après la durée
+moyenne des rendus) au lieu d'accumuler les requêtes. Chaque rendu a un
+timeout (PdfPoolTimeout) ; un rendu qui dépasse continue dans son processus et
+occupe sa place dans la file jusqu'à la fin.
+
+Le document revient des processus en bytes (pickle) jusqu'à spool_threshold
+octets ; au-delà, il est écrit dans un fichier temporaire nommé dont seul le
+chemin est transmis : l'application l'envoie par blocs puis le supprime.
+
+Sans processus disponibles (workers = 0, plateforme sans multiprocessing
+comme Vercel, démarrage en échec), le rendu se fait sur le thread appelant,
+comme avant.
+"""
+
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf_document import SPOOL_THRESHOLD, configure_pdf_output, render_pdf
+
+# Document rendu au préchauffage de chaque processus (polices, caches de ReportLab)
+_WARMUP_IKIGAI = {'what_you_love': 'Préchauffage', 'analysis': 'Préchauffage'}
+
+
+class PdfPoolFull(Exception):
+    """File de génération pleine : le client doit réessayer après retry_after secondes"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"File de génération PDF pleine (réessayer dans {retry_after} s)")
+        self.retry_after = retry_after
+
+
+class PdfPoolTimeout(Exception):
+    """Rendu non terminé dans le délai imparti"""
+
+
+def _init_worker(ascii85):
+    """Initialisation d'un processus du pool : réglages de sortie, thème et premier rendu à blanc"""
+    configure_pdf_output(ascii85)
+    render_pdf([], _WARMUP_IKIGAI)
+
+
+def _render_job(objectives_list, ikigai_data, spool_threshold):
+    started = time.perf_counter()
+    pdf = render_pdf(objectives_list, ikigai_data, spool_threshold, named=True)
+    return pdf, time.perf_counter() - started
+
+
+def _discard_result(future):
+    """Rendu abandonné (timeout) : suppression de son fichier temporaire quand il se termine"""
+    if not future.cancelled() and future.exception() is None:
+        future.result()[0].discard()
+
+
+def _ready():
+    return True
+
+
+class PdfRenderPool:
+    """Pool de processus de rendu PDF, file bornée et timeout par rendu"""
+
+    def __init__(self, workers=2, max_queue=8, timeout=30.0, ascii85=False, spool_threshold=SPOOL_THRESHOLD):
+        self.workers = max(0, workers)
+        self.max_pending = self.workers + max(0, max_queue)  # Rendus en cours + en attente
+        self.timeout = timeout
+        self.ascii85 = ascii85
+        self.spool_threshold = spool_threshold
+        self._executor = None
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rendered = 0
+        self.local = 0          # Rendus sur le thread appelant (pool absent ou cassé)
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.spooled = 0        # Documents passés par un fichier temporaire
+        self._render_seconds = 0.0
+
+    def start(self):
+        """Démarre et préchauffe les processus (une fois) ; retourne False si le rendu reste local"""
+        with self._start_lock:
+            if not self._started:
+                self._started = True
+                # Pas de pool imbriqué dans un processus du pool (module principal réimporté par spawn / forkserver)
+                if self.workers and multiprocessing.parent_process() is None:
+                    self._executor = self._create_executor()
+            return self._executor is not None
+
+    def _create_executor(self):
+        # forkserver : processus issus d'un serveur propre (pas de fork d'un worker multithreadé)
+        # qui a déjà importé ReportLab et le module de rendu
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        if context.get_start_method() == 'forkserver':
+            context.set_forkserver_preload(['pdf_document'])
+        started = time.perf_counter()
+        try:
+            executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                           initializer=_init_worker, initargs=(self.ascii85,))
+            # Les processus démarrent à la demande : autant de tâches que de processus pour tous les lancer
+            for future in [executor.submit(_ready) for _ in range(self.workers)]:
+                future.result(timeout=60)
+        except Exception as e:
+            print(f"Pool PDF indisponible, rendu sur le thread de la requête : {e}")
+            return None
+        print(f"Pool PDF : {self.workers} processus prêts en {time.perf_counter() - started:.2f}s")
+        return executor
+
+    def render(self, objectives_list, ikigai_data):
+        """Document rendu (RenderedPdf) ; PdfPoolFull si la file est pleine, PdfPoolTimeout après timeout"""
+        executor = self._executor if self.start() else None
+        if executor is None:
+            return self._render_local(objectives_list, ikigai_data)
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PdfPoolFull(self._retry_after())
+            self._pending += 1
+        try:
+            future = executor.submit(_render_job, objectives_list, ikigai_data, self.spool_threshold)
+        except BrokenProcessPool:
+            self._release(None)
+            self._restart(executor)
+            return self._render_local(objectives_list, ikigai_data)
+        future.add_done_callback(self._release)
+
+        try:
+            pdf, seconds = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Retire le rendu s'il attend encore ; en cours, il va jusqu'au bout et son fichier est supprimé
+            if not future.cancel():
+                future.add_done_callback(_discard_result)
+            with self._lock:
+                self.timeouts += 1
+            raise PdfPoolTimeout(f"Génération du PDF non terminée après {self.timeout:g}s")
+        except BrokenProcessPool:
+            # Processus tué (mémoire, signal) : nouveau pool, ce rendu est fait localement
+            self._restart(executor)
+            return self._render_local(objectives_list, ikigai_data)
+        with self._lock:
+            self.rendered += 1
+            self._render_seconds += seconds
+            self.spooled += pdf.data is None
+        return pdf
+
+    def _render_local(self, objectives_list, ikigai_data):
+        pdf = render_pdf(objectives_list, ikigai_data, self.spool_threshold)
+        with self._lock:
+            self.local += 1
+            self.spooled += pdf.data is None
+        return pdf
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def _retry_after(self):
+        """Délai avant une place libre : rendus en attente x durée moyenne / processus (au moins 1 s)"""
+        average = self._render_seconds / self.rendered if self.rendered else 1.0
+        waiting = self._pending - self.workers + 1
+        return max(1, math.ceil(waiting * average / max(1, self.workers)))
+
+    def _restart(self, broken):
+        """Remplace le pool cassé (une seule fois si plusieurs rendus le constatent en même temps)"""
+        with self._start_lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create_executor()
+                self.restarts += 1
+
+    def shutdown(self):
+        with self._start_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers if self._executor is not None else 0,
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'rendered': self.rendered,
+                'local': self.local,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'restarts': self.restarts,
+                'spooled': self.spooled,
+                'avg_render_ms': round(self._render_seconds / self.rendered * 1000, 1) if self.rendered else 0.0,
+            }
@@ -0,0 +1,243 @@
+"""
+Thème du PDF : styles de paragraphes et de tableaux construits une seule fois
+
+create_pdf construisait à chaque appel la feuille de styles ReportLab
+(getSampleStyleSheet) et un ParagraphStyle / TableStyle par élément du
+document, soit 17 styles de paragraphes et 4 styles de tableaux de plus par
+objectif. Ces styles ne dépendent pas des données : ils sont désormais créés à
+la première génération de PDF, conservés pour la durée du processus et
+seulement référencés ensuite.
+
+Les styles partagés ne sont jamais modifiés après construction : ReportLab ne
+fait que les lire (Paragraph, Table.setStyle), ils peuvent donc servir à
+plusieurs générations simultanées.
+
+L'en-tête de la première page (logo, BuildNovaG, « Objectifs-AI », vœux) est
+dessiné par un rappel de page (draw_header, onFirstPage) : défini une fois par
+document comme XObject de formulaire, il ne passe plus par le flux du
+document, qui lui réserve seulement sa hauteur (header_height, mesurée une
+fois). Le logo JPEG est repris tel quel dans le PDF (DCTDecode, sans décodage) :
+drawImage reçoit son chemin, vérifié une fois par processus. Un ImageReader
+partagé coûterait plus cher, ReportLab hachant à chaque document les pixels
+décodés (750 Ko) pour nommer l'image.
+"""
+
+import io
+import os
+import threading
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Frame, Paragraph, Spacer, Table, TableStyle
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'logo_BuildNovaG.jpg')
+HEADER_FORM = 'BuildNovaGHeader'
+
+
+class PdfTheme:
+    """Styles de paragraphes et de tableaux du PDF des objectifs"""
+
+    # Page (A4) et marges du document
+    page_size = A4
+    margins = {'leftMargin': 0.7 * inch, 'rightMargin': 0.7 * inch, 'topMargin': 0.6 * inch, 'bottomMargin': 0.6 * inch}
+    frame_padding = 6  # Marge intérieure du cadre de SimpleDocTemplate
+    logo_size = (2 * inch, 0.8 * inch)
+
+    # Largeurs de colonnes (pouces convertis en points)
+    full_width = [6 * inch]
+    smart_columns = [1.8 * inch, 4.2 * inch]
+    ikigai_columns = [2 * inch, 4 * inch]
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        normal, italic = styles['Normal'], styles['Italic']
+
+        # En-tête du document
+        self.title = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24,
+                                    textColor=colors.HexColor('#2c3e50'), spaceAfter=20, alignment=TA_CENTER,
+                                    fontName='Helvetica-Bold')
+        self.heading = ParagraphStyle('CustomHeading', parent=styles['Heading2'], fontSize=18,
+                                      textColor=colors.HexColor('#3498db'), spaceAfter=15, spaceBefore=20,
+                                      fontName='Helvetica-Bold')
+        self.brand = ParagraphStyle('BrandStyleGold', parent=styles['Heading1'], fontSize=32,
+                                    textColor=colors.HexColor('#DAA520'), spaceAfter=12, alignment=TA_CENTER,
+                                    fontName='Helvetica-Bold')
+        self.tagline = ParagraphStyle('TaglineStyle', parent=normal, fontSize=16, textColor=colors.white,
+                                      spaceAfter=12, alignment=TA_CENTER, fontStyle='italic', fontWeight='bold',
+                                      backColor=colors.HexColor('#667eea'), borderPadding=5)
+        self.new_year = ParagraphStyle('NewYearStyle', parent=normal, fontSize=18,
+                                       textColor=colors.HexColor('#e74c3c'), alignment=TA_CENTER,
+                                       fontStyle='italic', fontName='Helvetica-Bold', fontWeight='bold')
+        self.date = ParagraphStyle('DateStyle', parent=normal, alignment=TA_CENTER,
+                                   textColor=colors.HexColor('#666'), fontSize=10)
+
+        # Objectifs SMART
+        self.obj_number = ParagraphStyle('ObjNum', parent=normal, fontSize=13, fontName='Helvetica-Bold',
+                                         textColor=colors.white, alignment=TA_CENTER)
+        self.obj_title = ParagraphStyle('ObjTitle', parent=styles['Heading3'], fontSize=18,
+                                        textColor=colors.HexColor('#2c3e50'), spaceAfter=12, spaceBefore=8,
+                                        fontName='Helvetica-Bold', alignment=TA_CENTER)
+        self.original_text = ParagraphStyle('OriginalText', parent=italic, fontSize=9,
+                                            textColor=colors.HexColor('#666'), spaceAfter=15, alignment=TA_CENTER)
+        self.cell = ParagraphStyle('CellText', parent=normal, fontSize=10, leading=12)
+        self.cell_missing = ParagraphStyle('CellText', parent=normal, fontSize=9,
+                                           textColor=colors.HexColor('#999'), fontStyle='italic')
+        self.cell_undefined = ParagraphStyle('CellText', parent=normal, fontSize=10)
+        self.header_cell = ParagraphStyle('HeaderText', parent=normal, fontSize=11, fontName='Helvetica-Bold')
+        self.label_cell = ParagraphStyle('LabelText', parent=normal, fontSize=10, fontName='Helvetica-Bold')
+        self.analysis = ParagraphStyle('AnalysisText', parent=normal, fontSize=10,
+                                       textColor=colors.HexColor('#495057'), leading=13)
+        self.obj_note = ParagraphStyle('ObjNote', parent=italic, fontSize=8, textColor=colors.HexColor('#999'),
+                                       alignment=TA_CENTER, spaceAfter=15)
+
+        # IKIGAI
+        self.ikigai_title = ParagraphStyle('IKIGAITitle', parent=styles['Heading4'], fontSize=11,
+                                           textColor=colors.HexColor('#2c3e50'), spaceAfter=5,
+                                           fontName='Helvetica-Bold')
+        self.ikigai_text = ParagraphStyle('IKIGAIText', parent=normal, fontSize=10,
+                                          textColor=colors.HexColor('#495057'), leftIndent=10, spaceAfter=8,
+                                          leading=13)
+
+        # Pied de document
+        self.footer = ParagraphStyle('FooterStyle', parent=italic, alignment=TA_CENTER, fontSize=10,
+                                     textColor=colors.HexColor('#999'))
+        self.footer_link = ParagraphStyle('FooterLink', parent=normal, alignment=TA_CENTER, fontSize=11,
+                                          textColor=colors.HexColor('#667eea'), fontName='Helvetica-Bold')
+
+        # Styles de tableaux
+        self.new_year_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#ffffff')),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('LEFTPADDING', (0, 0), (-1, -1), 20),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 20),
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.HexColor('#f8f9fa')]),
+        ])
+        self.separator_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#667eea')),
+            ('LINEBELOW', (0, 0), (-1, -1), 1, colors.HexColor('#667eea')),
+        ])
+        self.obj_header_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#667eea')),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ])
+        self.smart_table = self._criteria_table('#3498db', '#e8f4f8', '#f8f9fa')
+        self.analysis_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fff9e6')),
+            ('LEFTPADDING', (0, 0), (-1, -1), 15),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1.5, colors.HexColor('#ffd700')),
+        ])
+        self.ikigai_table = self._criteria_table('#e74c3c', '#ffe8e8', '#fff5f5')
+
+        # En-tête de la première page
+        self.logo = self._load_logo()
+        self.header_height = self._measure_header()
+
+    @staticmethod
+    def _load_logo():
+        return LOGO_PATH if os.path.exists(LOGO_PATH) else None
+
+    def _frame(self):
+        """Cadre identique à celui de SimpleDocTemplate pour ces marges"""
+        width, height = self.page_size
+        margins = self.margins
+        return Frame(margins['leftMargin'], margins['bottomMargin'],
+                     width - margins['leftMargin'] - margins['rightMargin'],
+                     height - margins['topMargin'] - margins['bottomMargin'],
+                     leftPadding=self.frame_padding, rightPadding=self.frame_padding,
+                     topPadding=self.frame_padding, bottomPadding=self.frame_padding)
+
+    def _header_top(self):
+        return self.page_size[1] - self.margins['topMargin'] - self.frame_padding
+
+    def _header_flowables(self):
+        """Éléments de l'en-tête, recréés à chaque document (les Paragraph gardent leur mise en page)"""
+        flowables = []
+        if self.logo is not None:
+            # Emplacement du logo, dessiné directement par draw_header_content
+            flowables += [Spacer(1, self.logo_size[1]), Spacer(1, 0.1 * inch)]
+        new_year = Table([[Paragraph("<b>Heureuse Année 2026</b>", self.new_year)]],
+                         colWidths=self.full_width, rowHeights=[0.5 * inch])
+        new_year.setStyle(self.new_year_table)
+        flowables += [
+            Paragraph("<b>BuildNovaG</b>", self.brand),
+            Spacer(1, 0.1 * inch),
+            Paragraph("Objectifs-AI", self.tagline),
+            Spacer(1, 0.15 * inch),
+            new_year,
+        ]
+        return flowables
+
+    def _measure_header(self):
+        """Hauteur occupée par l'en-tête en haut de la première page (mise en page à blanc, une fois)"""
+        frame = self._frame()
+        frame.addFromList(self._header_flowables(), Canvas(io.BytesIO(), pagesize=self.page_size))
+        return self._header_top() - frame._y
+
+    def draw_header_content(self, canvas):
+        """Dessine l'en-tête aux mêmes positions que lorsqu'il faisait partie du flux du document"""
+        if self.logo is not None:
+            logo_width, logo_height = self.logo_size
+            page_width = self.page_size[0]
+            available = page_width - self.margins['leftMargin'] - self.margins['rightMargin'] - 2 * self.frame_padding
+            x = self.margins['leftMargin'] + self.frame_padding + (available - logo_width) / 2
+            canvas.drawImage(self.logo, x, self._header_top() - logo_height, logo_width, logo_height)
+        self._frame().addFromList(self._header_flowables(), canvas)
+
+    @staticmethod
+    def _criteria_table(header, label_column, alternate_row):
+        """Tableau à deux colonnes (libellé / détails) : SMART en bleu, IKIGAI en rouge"""
+        return TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('TOPPADDING', (0, 0), (-1, 0), 8),
+            ('BACKGROUND', (0, 1), (0, -1), colors.HexColor(label_column)),  # Colonne gauche avec fond léger
+            ('BACKGROUND', (1, 1), (-1, -1), colors.white),  # Colonne droite blanche
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#dee2e6')),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 1), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor(alternate_row)]),  # Alternance de couleurs
+        ])
+
+
+_theme = None
+_theme_lock = threading.Lock()
+
+
+def get_pdf_theme():
+    """Thème partagé, construit à la première génération de PDF"""
+    global _theme
+    if _theme is None:
+        with _theme_lock:
+            if _theme is None:
+                _theme = PdfTheme()
+    return _theme
+
+
+def draw_header(canvas, doc):
+    """Rappel onFirstPage : en-tête défini une fois par document (XObject de formulaire) puis placé sur la page"""
+    if not canvas.hasForm(HEADER_FORM):
+        canvas.beginForm(HEADER_FORM)
+        get_pdf_theme().draw_header_content(canvas)
+        canvas.endForm()
+    canvas.doForm(HEADER_FORM)
@@ -0,0 +1,237 @@
+"""
+Prompts envoyés à Mistral : message système fixe + message utilisateur court
+
+Les consignes (rôle, règles, format JSON, exemples, année de référence) sont
+dans un message système identique octet pour octet d'un appel à l'autre ; seul
+le message utilisateur varie (texte de l'objectif, position, réponses IKIGAI).
+Les consignes ne sont plus répétées dans chaque variante du prompt, et le
+préfixe commun peut être mis en cache côté fournisseur. Le prompt individuel,
+le prompt groupé et le prompt de réparation partagent le même message système.
+
+Un objectif dont le domaine est reconnu (domain_classifier.py) reçoit un message
+système SMART plus court, propre à ce domaine : consignes compactes et un seul
+exemple adapté au lieu des trois exemples génériques. La partie commune est en
+tête, pour que le préfixe reste partagé entre domaines.
+
+Chaque gabarit a une version, à incrémenter à toute modification de son texte
+(elle entre dans l'espace de noms du cache des objectifs), et une estimation de
+son nombre de tokens (TEMPLATE_TOKENS, exposé dans /api/stats).
+"""
+
+import json
+
+REFERENCE_YEAR = 2026
+
+PROMPT_VERSIONS = {
+    'smart': 'smart-v2',
+    'smart_batch': 'smart-batch-v2',
+    'smart_repair': 'smart-repair-v2',
+    'smart_domain': 'smart-domain-v1',
+    'ikigai': 'ikigai-v2',
+}
+
+# Consigne de chaque champ SMART (format de réponse et prompt de réparation)
+SMART_FIELD_SPECS = {
+    'goal': "objectif reformulé, clair, inspirant et précis (10 mots min.)",
+    'specific': "qui, quoi, où, comment, pourquoi : actions concrètes et détaillées (20 mots min.)",
+    'measurable': "indicateurs de réussite chiffrés : quantités, pourcentages, valeurs (20 mots min.)",
+    'achievable': "pourquoi c'est réaliste : ressources, compétences, soutiens, moyens concrets (20 mots min.)",
+    'relevant': "importance, lien avec les valeurs et impact sur la vie de la personne (20 mots min.)",
+    'time_bound': f"date limite et jalons intermédiaires datés (jour/mois/{REFERENCE_YEAR}) (20 mots min.)",
+    'analysis': ("5 à 7 phrases : points forts, conseils personnalisés, étapes clés, risques à éviter, "
+                 "ressources à mobiliser (50 mots min.)"),
+}
+
+
+def smart_json_format(fields):
+    """Squelette JSON des champs demandés, avec leur consigne"""
+    listed = ",\n".join(f'  "{field}": "{SMART_FIELD_SPECS[field]}"' for field in fields)
+    return "{\n" + listed + "\n}"
+
+
+SMART_SYSTEM_PROMPT = f"""Tu es un coach expert en développement personnel et en définition d'objectifs. Tu transformes les objectifs d'une personne en objectifs SMART (Spécifique, Mesurable, Atteignable, Pertinent, Temporel). Nous sommes en {REFERENCE_YEAR} : toutes les dates sont en {REFERENCE_YEAR}.
+
+RÈGLES ABSOLUES :
+1. Chaque objectif est UNIQUE : réponse propre à son domaine (professionnel, personnel, santé, finances, éducation...), jamais générique, jamais mélangée avec un autre objectif.
+2. Champs toujours COMPLETS, d'au moins 2-3 phrases détaillées : jamais "À définir", "Non défini" ni valeur vide.
+3. Concret, chiffré, daté, motivant et actionnable.
+4. Réponse : UNIQUEMENT du JSON valide, sans texte, markdown ni backticks autour.
+
+Objet SMART d'un objectif :
+{smart_json_format(SMART_FIELD_SPECS)}
+
+EXEMPLES DE BONS CHAMPS :
+- "specific": "Je vais améliorer ma santé en faisant 30 minutes de sport 3 fois par semaine (lundi, mercredi, vendredi) le matin avant le travail, en suivant un programme d'entraînement personnalisé avec un coach."
+- "measurable": "Je mesurerai mon succès par : perte de 5 kg en 3 mois, capacité à courir 5 km sans s'arrêter, réduction de 10 points de tension artérielle, et amélioration de mon niveau d'énergie de 30%."
+- "time_bound": "Objectif final : 31 décembre {REFERENCE_YEAR}. Jalons : 1er mars {REFERENCE_YEAR} : perte de 2 kg - 1er juin {REFERENCE_YEAR} : perte de 4 kg - 1er septembre {REFERENCE_YEAR} : perte de 5 kg - 31 décembre {REFERENCE_YEAR} : maintien du poids et forme optimale."
+"""
+
+IKIGAI_SYSTEM_PROMPT = f"""Tu es un coach expert en IKIGAI (raison d'être) et en développement personnel. À partir des quatre réponses d'une personne, révèle son IKIGAI. Sois concis mais complet, inspirant, concret, positif et encourageant. Nous sommes en {REFERENCE_YEAR} : toutes les actions et dates sont pour {REFERENCE_YEAR}.
+
+Structure exacte de la réponse (markdown) :
+
+## TON IKIGAI (Raison d'Être)
+
+[L'intersection unique des 4 éléments : un IKIGAI personnalisé et inspirant en 2-3 phrases]
+
+## ANALYSE ET INSIGHTS
+
+[Les connexions entre les 4 éléments : ce qui ressort, les opportunités]
+
+## RECOMMANDATIONS CONCRÈTES
+
+[3-5 recommandations actionnables pour vivre son IKIGAI au quotidien]
+
+## PISTES D'ACTION POUR {REFERENCE_YEAR}
+
+[3-5 actions concrètes à entreprendre en {REFERENCE_YEAR} pour aligner sa vie avec son IKIGAI]
+"""
+
+
+SMART_DOMAIN_BASE_PROMPT = f"""Tu es un coach expert en développement personnel et en définition d'objectifs. Tu transformes l'objectif d'une personne en objectif SMART (Spécifique, Mesurable, Atteignable, Pertinent, Temporel). Nous sommes en {REFERENCE_YEAR} : toutes les dates sont en {REFERENCE_YEAR}.
+
+RÈGLES ABSOLUES :
+1. Réponse propre à CET objectif, jamais générique.
+2. Champs toujours COMPLETS, d'au moins 2-3 phrases détaillées : jamais "À définir", "Non défini" ni valeur vide.
+3. Concret, chiffré, daté, motivant et actionnable.
+4. Réponse : UNIQUEMENT du JSON valide, sans texte, markdown ni backticks autour.
+
+Objet SMART :
+{smart_json_format(SMART_FIELD_SPECS)}
+"""
+
+# Domaine : (libellé, points d'attention, exemple de champ)
+SMART_DOMAINS = {
+    'health': ("santé et sport",
+               "Progression graduelle, fréquence hebdomadaire, récupération, mesures physiques (poids, distance, temps).",
+               f'"measurable": "Courir 10 km en moins de 55 minutes au 30 juin {REFERENCE_YEAR}, 3 sorties par semaine suivies dans une application, perte de 4 kg mesurée chaque lundi."'),
+    'finance': ("finances personnelles",
+                "Montants en euros, épargne mensuelle automatique, budget par poste, échéancier de remboursement.",
+                f'"measurable": "Épargner 300 euros par mois par virement automatique le 1er du mois, soit 3 600 euros au 31 décembre {REFERENCE_YEAR}, suivis dans un tableau de budget mensuel."'),
+    'career': ("carrière et vie professionnelle",
+               "Compétences à développer, réseau, livrables visibles, entretiens et indicateurs (clients, chiffre d'affaires, candidatures).",
+               f'"measurable": "Envoyer 5 candidatures ciblées par semaine, obtenir 6 entretiens et 1 offre avant le 30 septembre {REFERENCE_YEAR}, avec un suivi dans un tableau de candidatures."'),
+    'education': ("apprentissage et formation",
+                  "Temps d'étude régulier, niveaux ou certifications visés, ressources (cours, livres, applications), pratique.",
+                  f'"measurable": "Étudier 30 minutes par jour, valider le niveau B1 au test du 15 juin {REFERENCE_YEAR} et tenir une conversation de 20 minutes sans aide en décembre {REFERENCE_YEAR}."'),
+    'relationships': ("relations et vie de famille",
+                      "Moments partagés planifiés, qualité de présence, rituels, communication.",
+                      f'"measurable": "Un dîner sans écrans 3 soirs par semaine et une sortie en famille chaque mois, soit 12 sorties au 31 décembre {REFERENCE_YEAR}, notées dans un agenda partagé."'),
+    'wellbeing': ("bien-être et équilibre personnel",
+                  "Habitudes quotidiennes courtes, déclencheurs, suivi du ressenti, limites (écrans, stress).",
+                  f'"measurable": "Méditer 10 minutes chaque matin, 300 séances au 31 décembre {REFERENCE_YEAR}, et noter son niveau de stress de 1 à 10 chaque soir pour le faire passer de 7 à 4."'),
+    'leisure': ("loisirs, création et voyages",
+                "Pratique régulière, projet concret à réaliser (morceau, œuvre, voyage), budget et préparation.",
+                f'"measurable": "Pratiquer 20 minutes 5 jours par semaine, jouer 5 morceaux complets d\'ici le 30 juin {REFERENCE_YEAR} et les enregistrer pour mesurer les progrès."'),
+}
+
+
+def smart_domain_system_prompt(label, guidance, example):
+    """Message système SMART court d'un domaine (partie commune en tête, puis le domaine)"""
+    return f"""{SMART_DOMAIN_BASE_PROMPT}
+DOMAINE : {label}. {guidance}
+
+EXEMPLE DE BON CHAMP :
+- {example}
+"""
+
+
+# Messages système par domaine, construits une fois (identiques d'un appel à l'autre)
+SMART_DOMAIN_SYSTEM_PROMPTS = {
+    domain: smart_domain_system_prompt(*spec) for domain, spec in SMART_DOMAINS.items()
+}
+
+
+def smart_system_prompt(domain=None):
+    """Message système SMART du domaine, ou le message générique si le domaine n'a pas de gabarit"""
+    return SMART_DOMAIN_SYSTEM_PROMPTS.get(domain, SMART_SYSTEM_PROMPT)
+
+
+def build_smart_prompt(objective_text, objective_number=None, total_objectives=None):
+    """Message utilisateur SMART pour un objectif (avec son contexte de position)"""
+    context_info = ""
+    if objective_number and total_objectives:
+        context_info = f"Objectif n°{objective_number} sur {total_objectives} définis par cette personne"
+        if objective_number == 1:
+            context_info += " (le premier, probablement le plus prioritaire)"
+        elif objective_number == total_objectives:
+            context_info += " (le dernier défini)"
+        context_info += ".\n"
+    return f"""{context_info}Objectif : "{objective_text}"
+
+Réponds UNIQUEMENT avec l'objet SMART de cet objectif."""
+
+
+def build_smart_batch_prompt(batch, total_objectives):
+    """Message utilisateur SMART d'un lot [(numéro, objectif), ...]"""
+    listed = "\n".join(f'[{idx}] "{objective_text}"' for idx, objective_text in batch)
+    return f"""Une personne a défini {total_objectives} objectifs (le n°1 est probablement le plus prioritaire). En voici {len(batch)}, chacun précédé de son numéro :
+
+{listed}
+
+Réponds UNIQUEMENT avec un objet JSON {{"objectives": [...]}} contenant exactement {len(batch)} objets SMART, un par objectif, dans le même ordre, chacun avec en plus "objective_id" : le numéro de l'objectif (ex. {batch[0][0]})."""
+
+
+def build_smart_repair_prompt(objective_text, fields, missing):
+    """Message utilisateur de réparation : seuls les champs manquants sont demandés"""
+    return f"""Objectif : "{objective_text}"
+
+Partie déjà rédigée de son objet SMART :
+{json.dumps(fields, ensure_ascii=False, indent=2)}
+
+Rédige UNIQUEMENT les champs manquants, en cohérence avec ce qui précède. Réponds avec un objet JSON au format exact :
+{smart_json_format(missing)}"""
+
+
+def build_ikigai_prompt(what_you_love, what_you_are_good_at, what_world_needs, what_you_can_be_paid_for):
+    """Message utilisateur IKIGAI : les quatre réponses de la personne"""
+    return f"""CE QUE J'AIME : {what_you_love}
+
+CE EN QUOI JE SUIS DOUÉ : {what_you_are_good_at}
+
+CE DONT LE MONDE A BESOIN : {what_world_needs}
+
+CE POUR QUOI JE PEUX ÊTRE PAYÉ : {what_you_can_be_paid_for}"""
+
+
+def estimate_tokens(text):
+    """Approximation : ~4 caractères par token"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _template_tokens(system, user, version):
+    system_tokens = estimate_tokens(system)
+    user_tokens = estimate_tokens(user)
+    return {
+        'version': version,
+        'system_tokens': system_tokens,
+        'user_tokens': user_tokens,   # Message utilisateur d'un exemple type
+        'total_tokens': system_tokens + user_tokens,
+    }
+
+
+# Taille des gabarits (calculée une fois au chargement, pour /api/stats)
+TEMPLATE_TOKENS = {
+    'smart': _template_tokens(SMART_SYSTEM_PROMPT, build_smart_prompt("Courir un semi-marathon", 1, 3),
+                              PROMPT_VERSIONS['smart']),
+    'smart_batch': _template_tokens(SMART_SYSTEM_PROMPT,
+                                    build_smart_batch_prompt([(1, "Courir un semi-marathon"),
+                                                              (2, "Apprendre l'espagnol")], 3),
+                                    PROMPT_VERSIONS['smart_batch']),
+    'smart_repair': _template_tokens(SMART_SYSTEM_PROMPT,
+                                     build_smart_repair_prompt("Courir un semi-marathon",
+                                                               {'goal': "Courir un semi-marathon en moins de 2h"},
+                                                               ['analysis']),
+                                     PROMPT_VERSIONS['smart_repair']),
+    'ikigai': _template_tokens(IKIGAI_SYSTEM_PROMPT,
+                               build_ikigai_prompt("La cuisine", "Organiser", "Manger mieux", "Des ateliers"),
+                               PROMPT_VERSIONS['ikigai']),
+}
+
+# Gabarits par domaine, comparés au message système générique
+DOMAIN_TEMPLATE_TOKENS = {
+    domain: dict(_template_tokens(system, build_smart_prompt("Courir un semi-marathon", 1, 3),
+                                  PROMPT_VERSIONS['smart_domain']),
+                 saved_tokens=TEMPLATE_TOKENS['smart']['system_tokens'] - estimate_tokens(system))
+    for domain, system in SMART_DOMAIN_SYSTEM_PROMPTS.items()
+}
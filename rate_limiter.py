@@ -0,0 +1,251 @@
+"""
+Limiteur de débit côté client (seau à jetons) pour l'API Mistral
+
+Un seau par clé API. L'état du seau (jetons restants, dernier remplissage,
+blocage imposé par le serveur) est stocké dans un petit fichier verrouillé par
+flock : tous les threads et tous les workers gunicorn de la machine partagent
+donc le même débit. Sans fcntl (Windows), l'état reste local au processus.
+
+Les en-têtes Retry-After et ratelimit-* des réponses bloquent le seau jusqu'à
+la date indiquée : on attend brièvement un jeton au lieu d'envoyer une requête
+qui recevrait un 429. Ce blocage est plafonné (max_block) : un en-tête aberrant
+ne peut pas bloquer la clé pour tous les workers, ni survivre aux redémarrages
+dans le fichier d'état.
+"""
+
+import asyncio
+import os
+import struct
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from mistral_client import key_fingerprint
+
+# tokens, last_refill, blocked_until
+_STATE = struct.Struct('<ddd')
+
+# Au-delà, une valeur de réinitialisation ratelimit-*-reset est une date (epoch), pas un délai (1e9 s : 2001)
+_EPOCH_THRESHOLD = 1e9
+
+
+def parse_retry_after(value, now=None):
+    """Retry-After en secondes (nombre ou date HTTP) ; None si absent ou illisible"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+    return max(0.0, when - (now if now is not None else time.time()))
+
+
+def parse_rate_limit_headers(headers, now=None):
+    """Délai (secondes) avant la prochaine requête autorisée d'après les en-têtes de la réponse"""
+    if not headers:
+        return None
+    delay = parse_retry_after(headers.get('Retry-After'), now)
+    if delay is not None:
+        return delay
+
+    # En-têtes ratelimit-* : quota épuisé -> attendre la réinitialisation
+    lowered = {name.lower(): value for name, value in headers.items()}
+    exhausted = False
+    for name, value in lowered.items():
+        if 'ratelimit' in name and 'remaining' in name:
+            try:
+                if float(value) <= 0:
+                    exhausted = True
+            except (TypeError, ValueError):
+                continue
+    if not exhausted:
+        return None
+    for name, value in lowered.items():
+        if 'ratelimit' in name and 'reset' in name:
+            try:
+                reset = float(value)
+            except (TypeError, ValueError):
+                continue
+            if reset >= _EPOCH_THRESHOLD:
+                # Date de réinitialisation (epoch) : délai restant
+                reset -= now if now is not None else time.time()
+            return max(0.0, reset)
+    return 1.0
+
+
+class TokenBucket:
+    """Seau à jetons partagé entre threads et, si possible, entre processus (fichier + flock)"""
+
+    def __init__(self, rate, burst, path=None, max_block=120.0):
+        self.rate = float(rate)
+        self.burst = float(max(1, burst))
+        self.max_block = max_block  # Blocage imposé par le serveur plafonné (y compris celui relu du fichier)
+        self.path = path if fcntl is not None else None
+        self._lock = threading.Lock()
+        self._state = (self.burst, time.time(), 0.0)
+
+    def _read(self, handle):
+        handle.seek(0)
+        data = handle.read(_STATE.size)
+        if len(data) != _STATE.size:
+            return (self.burst, time.time(), 0.0)
+        return _STATE.unpack(data)
+
+    def _write(self, handle, state):
+        handle.seek(0)
+        handle.write(_STATE.pack(*state))
+        handle.flush()
+
+    def _update(self, mutate):
+        """Applique mutate(state, now) -> (nouvel état, valeur de retour) sous verrou"""
+        with self._lock:
+            if self.path is None:
+                self._state, result = mutate(self._state, time.time())
+                return result
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            with os.fdopen(fd, 'r+b') as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    state, result = mutate(self._read(handle), time.time())
+                    self._write(handle, state)
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                return result
+
+    def try_take(self):
+        """Prend un jeton si possible ; sinon retourne le délai d'attente estimé (secondes)"""
+        def mutate(state, now):
+            tokens, last_refill, blocked_until = state
+            tokens = min(self.burst, tokens + max(0.0, now - last_refill) * self.rate)
+            blocked_until = min(blocked_until, now + self.max_block)
+            if now < blocked_until:
+                return (tokens, now, blocked_until), blocked_until - now
+            if tokens >= 1:
+                return (tokens - 1, now, blocked_until), 0.0
+            return (tokens, now, blocked_until), (1 - tokens) / self.rate
+        return self._update(mutate)
+
+    def block_for(self, seconds):
+        """Bloque le seau (Retry-After) : aucun jeton n'est délivré avant la fin du délai"""
+        def mutate(state, now):
+            tokens, last_refill, blocked_until = state
+            blocked_until = min(blocked_until, now + self.max_block)
+            return (0.0, now, max(blocked_until, now + min(seconds, self.max_block))), None
+        self._update(mutate)
+
+
+class RateLimiter:
+    """Un seau par clé API ; attend au plus max_wait secondes un jeton avant d'abandonner"""
+
+    def __init__(self, rate=5.0, burst=5, max_wait=2.0, shared=True, directory=None, max_block=120.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.max_block = max_block  # Plafond d'un blocage imposé par le serveur (Retry-After, ratelimit-*) (s)
+        self.shared = shared
+        self.directory = directory or tempfile.gettempdir()
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._stats_lock = threading.Lock()
+        self.granted = 0
+        self.waited = 0
+        self.rejected = 0
+        self.server_blocks = 0
+        self.total_wait = 0.0
+
+    def enabled(self):
+        return self.rate > 0
+
+    def bucket_for(self, api_key):
+        fingerprint = key_fingerprint(api_key)
+        with self._lock:
+            bucket = self._buckets.get(fingerprint)
+            if bucket is None:
+                path = None
+                if self.shared:
+                    os.makedirs(self.directory, exist_ok=True)
+                    path = os.path.join(self.directory, f'my_ia_ratelimit_{fingerprint}.bin')
+                bucket = TokenBucket(self.rate, self.burst, path, self.max_block)
+                self._buckets[fingerprint] = bucket
+        return bucket
+
+    def acquire(self, api_key, max_wait=None):
+        """True si un jeton a été obtenu dans le délai imparti"""
+        if not self.enabled():
+            return True
+        bucket = self.bucket_for(api_key)
+        budget = self.max_wait if max_wait is None else max_wait
+        started = time.monotonic()
+        slept = False
+        while True:
+            delay = bucket.try_take()
+            waited = time.monotonic() - started
+            if delay <= 0:
+                self._count(granted=1, waited=1 if slept else 0, total_wait=waited if slept else 0.0)
+                return True
+            if waited + delay > budget:
+                self._count(rejected=1, total_wait=waited)
+                return False
+            time.sleep(delay)
+            slept = True
+
+    async def acquire_async(self, api_key, max_wait=None):
+        """Comme acquire, en attendant avec asyncio.sleep (ne bloque pas la boucle)"""
+        if not self.enabled():
+            return True
+        bucket = self.bucket_for(api_key)
+        budget = self.max_wait if max_wait is None else max_wait
+        started = time.monotonic()
+        slept = False
+        while True:
+            delay = bucket.try_take()
+            waited = time.monotonic() - started
+            if delay <= 0:
+                self._count(granted=1, waited=1 if slept else 0, total_wait=waited if slept else 0.0)
+                return True
+            if waited + delay > budget:
+                self._count(rejected=1, total_wait=waited)
+                return False
+            await asyncio.sleep(delay)
+            slept = True
+
+    def observe(self, api_key, headers):
+        """Applique Retry-After / ratelimit-* d'une réponse ; retourne le délai imposé, plafonné (ou None)"""
+        delay = parse_rate_limit_headers(headers)
+        if delay:
+            delay = min(delay, self.max_block)
+        if delay and self.enabled():
+            self.bucket_for(api_key).block_for(delay)
+            self._count(server_blocks=1)
+        return delay
+
+    def _count(self, total_wait=0.0, **counters):
+        with self._stats_lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+            self.total_wait += total_wait
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'enabled': self.enabled(),
+                'shared_between_processes': bool(self.shared and fcntl is not None),
+                'rate_per_key': self.rate,
+                'burst': self.burst,
+                'granted': self.granted,
+                'waited': self.waited,
+                'rejected': self.rejected,
+                'server_blocks': self.server_blocks,
+                'total_wait_seconds': round(self.total_wait, 3),
+            }
@@ -0,0 +1,248 @@
+"""
+Index de similarité des objectifs déjà traités (n-grammes de caractères, NumPy)
+
+Chaque objectif est représenté par un vecteur dense de dimension fixe :
+n-grammes de caractères et mots du texte normalisé (objective_cache.normalize_objective),
+projetés par hachage (astuce du hachage : pas de vocabulaire à maintenir, les
+insertions sont incrémentales), pondérés en log(1 + tf) puis normalisés (L2).
+La similarité cosinus avec tous les objectifs de l'index est alors un simple
+produit matrice-vecteur.
+
+L'index est borné (max_entries) : une fois plein, l'entrée la plus ancienne est
+remplacée. Il peut être sauvegardé dans un fichier .npz (np.savez) et rechargé
+au démarrage ; le namespace (versions des prompts SMART) est enregistré avec, un
+index construit avec d'autres prompts n'est pas rechargé.
+
+NumPy est optionnel : sans lui, l'index est désactivé (available == False).
+"""
+
+import json
+import os
+import tempfile
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # Index désactivé, l'application fonctionne sans
+    np = None
+
+from objective_cache import normalize_objective
+
+# Mots qui ne distinguent pas deux objectifs (ignorés) : mots vides sans effet sur le plan d'action
+STOP_WORDS = frozenset(
+    'a au aux avec ce ces cet cette d de des du en et je la le les l ma mes mon ou par pour sa se ses son sur '
+    'ta tes ton un une annee enfin vraiment'.split()
+)
+
+# Modificateurs qui changent l'objectif (« travailler » / « travailler plus », « courir un marathon » /
+# « courir mon premier marathon ») : deux objectifs équivalents ont les mêmes, comme les mêmes nombres
+MODIFIERS = frozenset(
+    'plus moins davantage mieux encore trop premier premiere premiers premieres nouveau nouvel nouvelle '
+    'nouveaux nouvelles dernier derniere second seconde deuxieme autre autres ne pas jamais sans'.split()
+)
+
+
+def available():
+    return np is not None
+
+
+def iter_features(normalized, ngram=3):
+    """Traits d'un texte normalisé : mots pleins et leurs n-grammes de caractères (mot bordé d'espaces)"""
+    for word in normalized.split():
+        if word in STOP_WORDS:
+            continue
+        padded = f" {word} "
+        for start in range(max(1, len(padded) - ngram + 1)):
+            yield padded[start:start + ngram]
+        yield 'w:' + word
+
+
+def numbers_in(normalized):
+    """Nombres d'un texte normalisé : deux objectifs aux chiffres différents ne sont jamais équivalents"""
+    return sorted(word for word in normalized.split() if word.isdigit())
+
+
+def modifiers_in(normalized):
+    """Modificateurs d'un texte normalisé (MODIFIERS) : ils doivent être les mêmes pour réutiliser un objectif"""
+    return sorted(set(word for word in normalized.split() if word in MODIFIERS))
+
+
+def invariants(normalized):
+    """Ce que deux objectifs proches doivent avoir en commun : nombres et modificateurs"""
+    return numbers_in(normalized), modifiers_in(normalized)
+
+
+class SimilarityIndex:
+    """Vecteurs des objectifs traités et leur objectif SMART ; recherche top-k par similarité cosinus"""
+
+    def __init__(self, dim=512, max_entries=5000, ngram=3, reference_year=None, namespace='smart_objective_v1'):
+        if np is None:
+            raise RuntimeError("NumPy n'est pas installé : pip install -r requirements.txt")
+        self.dim = dim
+        self.max_entries = max_entries
+        self.ngram = ngram
+        self.reference_year = reference_year
+        self.namespace = namespace  # Versions des prompts SMART : un index sauvegardé avec d'autres n'est pas rechargé
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((min(max_entries, 256), dim), dtype=np.float32)
+        self._texts = []      # Texte d'origine de chaque entrée
+        self._payloads = []   # Objectif SMART de chaque entrée
+        self._slots = {}      # Texte normalisé -> ligne de la matrice
+        self._next = 0        # Prochaine ligne à remplacer une fois l'index plein
+        self.inserts = 0
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._texts)
+
+    def vectorize(self, text):
+        """Vecteur unitaire (float32) d'un objectif, ou None si le texte est vide"""
+        normalized = normalize_objective(text, self.reference_year)
+        if not normalized:
+            return None
+        vector = np.zeros(self.dim, dtype=np.float32)
+        buckets = [zlib.crc32(feature.encode('utf-8')) % self.dim
+                   for feature in iter_features(normalized, self.ngram)]
+        np.add.at(vector, buckets, 1.0)
+        np.log1p(vector, out=vector)
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return None
+        vector /= norm
+        return vector
+
+    def _grow(self):
+        rows = min(self.max_entries, len(self._vectors) * 2)
+        grown = np.zeros((rows, self.dim), dtype=np.float32)
+        grown[:len(self._vectors)] = self._vectors
+        self._vectors = grown
+
+    def add(self, text, payload):
+        """Ajoute (ou remplace) l'objectif et son objectif SMART ; évince le plus ancien si l'index est plein"""
+        vector = self.vectorize(text)
+        if vector is None:
+            return
+        normalized = normalize_objective(text, self.reference_year)
+        with self._lock:
+            slot = self._slots.get(normalized)
+            if slot is None:
+                if len(self._texts) < self.max_entries:
+                    slot = len(self._texts)
+                    if slot >= len(self._vectors):
+                        self._grow()
+                    self._texts.append(None)
+                    self._payloads.append(None)
+                else:
+                    slot = self._next
+                    self._next = (self._next + 1) % self.max_entries
+                    del self._slots[normalize_objective(self._texts[slot], self.reference_year)]
+                self._slots[normalized] = slot
+            self._vectors[slot] = vector
+            self._texts[slot] = text
+            self._payloads[slot] = payload
+            self.inserts += 1
+
+    def search(self, text, k=1):
+        """Les k objectifs les plus proches : [(score cosinus, texte, objectif SMART)], du plus proche au moins proche"""
+        vector = self.vectorize(text)
+        if vector is None:
+            return []
+        with self._lock:
+            count = len(self._texts)
+            if not count:
+                return []
+            scores = self._vectors[:count] @ vector
+            k = min(k, count)
+            if k < count:
+                top = np.argpartition(scores, -k)[-k:]
+                top = top[np.argsort(scores[top])[::-1]]
+            else:
+                top = np.argsort(scores)[::-1]
+            return [(float(scores[i]), self._texts[i], self._payloads[i]) for i in top]
+
+    def best(self, text, threshold, k=5):
+        """(score, texte, objectif SMART) du plus proche qui atteint le seuil avec les mêmes nombres
+        et modificateurs, sinon None"""
+        expected = invariants(normalize_objective(text, self.reference_year))
+        match = None
+        for candidate in self.search(text, k):
+            if candidate[0] < threshold:
+                break
+            if invariants(normalize_objective(candidate[1], self.reference_year)) == expected:
+                match = candidate
+                break
+        with self._lock:
+            self.lookups += 1
+            if match:
+                self.hits += 1
+        return match
+
+    def save(self, path):
+        """Sauvegarde atomique dans un fichier .npz (vecteurs + textes et objectifs SMART en JSON)"""
+        with self._lock:
+            count = len(self._texts)
+            vectors = self._vectors[:count].copy()
+            meta = json.dumps({'texts': self._texts, 'payloads': self._payloads, 'next': self._next,
+                               'dim': self.dim, 'ngram': self.ngram, 'namespace': self.namespace}, ensure_ascii=False)
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                np.savez(handle, vectors=vectors, meta=np.array(meta))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, path):
+        """Recharge un index sauvegardé (ignoré s'il a été construit avec d'autres paramètres)"""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            vectors = data['vectors']
+        if meta['dim'] != self.dim or meta['ngram'] != self.ngram or meta.get('namespace') != self.namespace:
+            return False
+        texts, payloads = meta['texts'][-self.max_entries:], meta['payloads'][-self.max_entries:]
+        with self._lock:
+            self._vectors = np.zeros((max(len(texts), min(self.max_entries, 256)), self.dim), dtype=np.float32)
+            self._vectors[:len(texts)] = vectors[-len(texts):] if texts else vectors[:0]
+            self._texts = list(texts)
+            self._payloads = list(payloads)
+            self._slots = {normalize_objective(text, self.reference_year): slot for slot, text in enumerate(texts)}
+            self._next = meta['next'] % self.max_entries if len(texts) == self.max_entries else 0
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._texts),
+                'max_entries': self.max_entries,
+                'inserts': self.inserts,
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                'memory_bytes': int(self._vectors.nbytes),
+            }
+
+
+def adapt_smart_object(smart_obj, source_text, target_text):
+    """Objectif SMART d'un objectif voisin reformulé pour le nouvel objectif
+
+    Les mentions littérales de l'ancien objectif sont remplacées par le nouveau texte ;
+    le reste (indicateurs, échéances, analyse) est repris tel quel.
+    """
+    adapted = dict(smart_obj)
+    source, target = (source_text or '').strip(), (target_text or '').strip()
+    if not source or not target or source == target:
+        return adapted
+    lowered = source.lower()
+    for field, value in adapted.items():
+        if not isinstance(value, str):
+            continue
+        position = value.lower().find(lowered)
+        while position != -1:
+            value = value[:position] + target + value[position + len(source):]
+            position = value.lower().find(lowered, position + len(target))
+        adapted[field] = value
+    return adapted
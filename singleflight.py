@@ -0,0 +1,216 @@
+"""
+Regroupement des appels identiques en vol (« single flight »)
+
+Quand plusieurs requêtes (plusieurs utilisateurs, un double clic, un objectif
+saisi deux fois) demandent le même résultat au même moment, seul le premier
+appelant (le meneur) fait le travail ; les suivants attendent son résultat au
+lieu de refaire un aller-retour vers Mistral.
+
+Dans un processus, l'attente passe par un threading.Event (ou une boucle
+asyncio.sleep pour le pipeline asynchrone). Entre workers gunicorn, un bail
+SQLite (SqliteLease) désigne le meneur : un worker qui trouve le bail pris
+attend sa libération puis lit le résultat dans le cache partagé (lookup).
+"""
+
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class _Flight:
+    """Appel en cours : événement de fin et résultat partagé"""
+
+    __slots__ = ('done', 'result')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """Un seul appel à la fois par clé ; les appelants simultanés partagent son résultat"""
+
+    def __init__(self, lease=None, poll_interval=0.05):
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.leaders = 0
+        self.coalesced = 0      # Appelants servis par un appel en cours du même processus
+        self.shared = 0         # Résultats produits par un autre worker (bail SQLite)
+        self.timeouts = 0       # Suiveurs lassés d'attendre (échéance de la requête)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _join(self, key):
+        """(appel en cours, True si l'appelant en est le meneur)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.leaders += 1
+            return flight, True
+
+    def _finish(self, key, flight, result):
+        flight.result = result
+        with self._lock:
+            self._flights.pop(key, None)
+        flight.done.set()
+
+    @staticmethod
+    def _limit(timeout):
+        return None if timeout is None or math.isinf(timeout) else max(0.0, timeout)
+
+    def do(self, key, fn, timeout=None, lookup=None):
+        """Résultat de fn(), exécuté une seule fois pour tous les appelants simultanés de même clé
+
+        timeout : attente maximale d'un suiveur (au-delà il reçoit None).
+        lookup() : lecture du résultat dans le cache partagé, pour attendre un autre worker.
+        """
+        timeout = self._limit(timeout)
+        flight, leader = self._join(key)
+        if not leader:
+            if not flight.done.wait(timeout):
+                self._count('timeouts')
+                return None
+            return flight.result
+        result = None
+        try:
+            result = self._lead(key, fn, timeout, lookup)
+        finally:
+            self._finish(key, flight, result)
+        return result
+
+    def _lead(self, key, fn, timeout, lookup):
+        if self.lease is None or lookup is None:
+            return fn()
+        owner = self.lease.acquire(key)
+        if owner is None:
+            # Un autre worker fait déjà cet appel : attendre la fin de son bail puis lire le cache partagé
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.lease.held(key) and (deadline is None or time.monotonic() < deadline):
+                time.sleep(self.poll_interval)
+            result = lookup()
+            if result is not None:
+                self._count('shared')
+                return result
+            owner = self.lease.acquire(key)
+        try:
+            return fn()
+        finally:
+            if owner:
+                self.lease.release(key, owner)
+
+    async def do_async(self, key, fn, timeout=None, lookup=None):
+        """Version asynchrone de do() : fn est une fonction qui retourne une coroutine"""
+        timeout = self._limit(timeout)
+        flight, leader = self._join(key)
+        if not leader:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not flight.done.is_set():
+                if deadline is not None and time.monotonic() >= deadline:
+                    self._count('timeouts')
+                    return None
+                await asyncio.sleep(self.poll_interval)
+            return flight.result
+        result = None
+        try:
+            result = await self._lead_async(key, fn, timeout, lookup)
+        finally:
+            self._finish(key, flight, result)
+        return result
+
+    async def _lead_async(self, key, fn, timeout, lookup):
+        if self.lease is None or lookup is None:
+            return await fn()
+        owner = self.lease.acquire(key)
+        if owner is None:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.lease.held(key) and (deadline is None or time.monotonic() < deadline):
+                await asyncio.sleep(self.poll_interval)
+            result = lookup()
+            if result is not None:
+                self._count('shared')
+                return result
+            owner = self.lease.acquire(key)
+        try:
+            return await fn()
+        finally:
+            if owner:
+                self.lease.release(key, owner)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'shared_between_workers': self.shared,
+                'follower_timeouts': self.timeouts,
+                'in_flight': len(self._flights),
+                'cross_worker': self.lease is not None,
+            }
+
+
+class SqliteLease:
+    """Bail par clé dans un fichier SQLite : un seul worker à la fois est meneur d'un appel
+
+    Le bail expire après ttl secondes, pour qu'un worker arrêté en plein appel ne
+    bloque pas les autres.
+    """
+
+    def __init__(self, path, ttl=30.0):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_leases ("
+            " key TEXT PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self):
+        # Une connexion par thread : sqlite3 n'autorise pas le partage par défaut
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key):
+        """Identifiant du bail obtenu, ou None si un autre worker le détient"""
+        owner = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connection()
+        conn.execute("DELETE FROM llm_leases WHERE key = ? AND expires_at <= ?", (key, now))
+        inserted = conn.execute(
+            "INSERT OR IGNORE INTO llm_leases (key, owner, expires_at) VALUES (?, ?, ?)",
+            (key, owner, now + self.ttl),
+        ).rowcount
+        conn.commit()
+        return owner if inserted else None
+
+    def release(self, key, owner):
+        conn = self._connection()
+        conn.execute("DELETE FROM llm_leases WHERE key = ? AND owner = ?", (key, owner))
+        conn.commit()
+
+    def held(self, key):
+        row = self._connection().execute(
+            "SELECT 1 FROM llm_leases WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row is not None
@@ -0,0 +1,199 @@
+"""
+Schéma des objectifs SMART renvoyés par l'IA
+
+Les réponses sont demandées en mode JSON (response_format de Mistral) puis
+validées contre un schéma compilé une seule fois au chargement du module.
+Une réponse à laquelle il ne manque que quelques champs est complétée par un
+court appel qui redemande ces seuls champs (partial_smart_fields) ; sinon une
+nouvelle tentative complète est faite.
+
+Le compilateur ne couvre que le sous-ensemble de JSON Schema utile ici
+(type, required, properties, minLength, items).
+"""
+
+import threading
+
+from json_extract import extract_json_object
+
+SMART_FIELDS = ('goal', 'specific', 'measurable', 'achievable', 'relevant', 'time_bound', 'analysis')
+
+# Longueur minimale de chaque champ (en dessous, la réponse est considérée incomplète)
+SMART_MIN_LENGTHS = {
+    'goal': 5,
+    'specific': 10,
+    'measurable': 10,
+    'achievable': 10,
+    'relevant': 10,
+    'time_bound': 10,
+    'analysis': 20,
+}
+
+SMART_SCHEMA = {
+    'type': 'object',
+    'required': list(SMART_FIELDS),
+    'properties': {
+        field: {'type': 'string', 'minLength': SMART_MIN_LENGTHS[field]}
+        for field in SMART_FIELDS
+    },
+}
+
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool,
+}
+
+
+def compile_schema(schema, path='$'):
+    """Compile un schéma en fonction validate(instance) -> liste d'erreurs (vide si conforme)"""
+    checks = []
+
+    expected_type = schema.get('type')
+    if expected_type:
+        python_type = _TYPES[expected_type]
+
+        def check_type(instance):
+            # bool est une sous-classe d'int : ne pas l'accepter comme entier
+            if not isinstance(instance, python_type) or (
+                    isinstance(instance, bool) and expected_type != 'boolean'):
+                return [f"{path} : {expected_type} attendu"]
+            return []
+        checks.append(check_type)
+
+    min_length = schema.get('minLength')
+    if min_length is not None:
+        def check_min_length(instance):
+            if isinstance(instance, str) and len(instance.strip()) < min_length:
+                return [f"{path} : au moins {min_length} caractères"]
+            return []
+        checks.append(check_min_length)
+
+    required = tuple(schema.get('required', ()))
+    if required:
+        def check_required(instance):
+            if not isinstance(instance, dict):
+                return []
+            return [f"{path}.{name} : champ manquant" for name in required if name not in instance]
+        checks.append(check_required)
+
+    properties = {
+        name: compile_schema(subschema, f"{path}.{name}")
+        for name, subschema in schema.get('properties', {}).items()
+    }
+    if properties:
+        def check_properties(instance):
+            if not isinstance(instance, dict):
+                return []
+            errors = []
+            for name, validate in properties.items():
+                if name in instance:
+                    errors.extend(validate(instance[name]))
+            return errors
+        checks.append(check_properties)
+
+    if 'items' in schema:
+        validate_item = compile_schema(schema['items'], f"{path}[]")
+
+        def check_items(instance):
+            if not isinstance(instance, list):
+                return []
+            errors = []
+            for item in instance:
+                errors.extend(validate_item(item))
+            return errors
+        checks.append(check_items)
+
+    def validate(instance):
+        errors = []
+        for check in checks:
+            errors.extend(check(instance))
+            if errors and check is checks[0] and expected_type:
+                # Mauvais type : inutile de vérifier le reste
+                break
+        return errors
+
+    return validate
+
+
+validate_smart_object = compile_schema(SMART_SCHEMA)
+
+
+class ValidationStats:
+    """Compteurs : réponses conformes du premier coup, nouvelles tentatives, réponses récupérées"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.valid = 0
+        self.invalid = 0
+        self.salvaged = 0
+        self.repaired = 0       # Réponses incomplètes complétées par un appel de réparation
+        self.repair_failed = 0
+
+    def add(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            checked = self.valid + self.invalid
+            return {
+                'valid': self.valid,
+                'invalid': self.invalid,
+                'salvaged': self.salvaged,
+                'repaired': self.repaired,
+                'repair_failed': self.repair_failed,
+                'invalid_rate': round(self.invalid / checked, 3) if checked else 0.0,
+            }
+
+
+validation_stats = ValidationStats()
+
+
+def clean_smart_object(instance):
+    """Ne garde que les champs SMART, sans espaces superflus"""
+    return {field: instance[field].strip() for field in SMART_FIELDS}
+
+
+def parse_smart_json(text):
+    """Décode et valide une réponse SMART - Retourne (objectif SMART ou None, erreurs)
+
+    Le balisage markdown, le texte autour de l'objet ou un guillemet non échappé
+    sont tolérés ; une réponse tronquée est refusée (champ coupé en pleine phrase).
+    """
+    if not text or not text.strip():
+        return None, ["réponse vide"]
+    extracted = extract_json_object(text)
+    if not extracted:
+        return None, ["JSON illisible"]
+    if 'truncated' in extracted.recoveries:
+        return None, ["réponse tronquée"]
+    instance = extracted.value
+    errors = validate_smart_object(instance)
+    if errors:
+        return None, errors
+    return clean_smart_object(instance), []
+
+
+def partial_smart_fields(text):
+    """Champs exploitables d'une réponse SMART non conforme - Retourne ({champ: texte}, champs manquants)
+
+    Un champ est exploitable s'il s'agit d'un texte d'au moins SMART_MIN_LENGTHS
+    caractères ; si la réponse a été tronquée, le dernier champ (coupé en pleine
+    phrase) est écarté. Réponse illisible : ({}, tous les champs).
+    """
+    extracted = extract_json_object(text) if text and text.strip() else None
+    instance = extracted.value if extracted else None
+    if not isinstance(instance, dict):
+        return {}, list(SMART_FIELDS)
+    present = [field for field in instance if field in SMART_MIN_LENGTHS]
+    if 'truncated' in extracted.recoveries and present:
+        present.pop()
+    fields = {}
+    for field in present:
+        value = instance[field]
+        if isinstance(value, str) and len(value.strip()) >= SMART_MIN_LENGTHS[field]:
+            fields[field] = value.strip()
+    return fields, [field for field in SMART_FIELDS if field not in fields]
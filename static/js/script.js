@@ -1,5 +1,7 @@
 let allObjectives = []; // Tous les objectifs SMART transformés
 let ikigaiData = {};
+let expectedObjectivesCount = 0; // Nombre d'objectifs envoyés à l'IA
+let objectivesStream = null; // Lecture en cours des résultats (streaming NDJSON)
 
 // Gestion des étapes
 function showStep(stepName) {
@@ -93,10 +95,11 @@ async function processObjectives() {
     showLoadingOverlay('Traitement de vos objectifs par l\'IA', `Analyse de ${objectives.length} objectif(s) en cours...`);
     
     try {
-        const response = await fetch('/api/process-objectives', {
+        const response = await fetch('/api/process-objectives?stream=ndjson', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'Accept': 'application/x-ndjson',
                 'Cache-Control': 'no-cache, no-store, must-revalidate',
                 'Pragma': 'no-cache'
             },
@@ -108,18 +111,43 @@ async function processObjectives() {
             throw new Error('Erreur lors du traitement des objectifs');
         }
         
-        const result = await response.json();
-        allObjectives = result.objectives || [];
+        allObjectives = [];
+        expectedObjectivesCount = objectives.length;
+        
+        if (response.body && response.body.getReader) {
+            // Chaque objectif est affiché dès qu'il est prêt ; on passe à l'IKIGAI dès le premier
+            objectivesStream = readNDJSON(response, (obj) => {
+                allObjectives.push(obj);
+                allObjectives.sort((a, b) => (a.objective_id || 0) - (b.objective_id || 0));
+                displaySMARTObjectives();
+                if (allObjectives.length === 1) {
+                    hideLoadingOverlay();
+                    showStep('ikigai');
+                }
+            });
+            await objectivesStream;
+        } else {
+            // Navigateur sans flux lisibles : le serveur renvoie toutes les lignes d'un coup
+            const text = await response.text();
+            allObjectives = text.split('\n').filter(line => line.trim()).map(line => JSON.parse(line));
+            allObjectives.sort((a, b) => (a.objective_id || 0) - (b.objective_id || 0));
+        }
         
         // Afficher les résultats
         displaySMARTObjectives();
         
         // Passer à l'étape IKIGAI
-        showStep('ikigai');
+        if (allObjectives.length === 0) {
+            throw new Error('Aucun objectif traité');
+        }
+        if (document.getElementById('step-objectives').classList.contains('active')) {
+            showStep('ikigai');
+        }
         
     } catch (error) {
         alert('Erreur lors du traitement des objectifs: ' + error.message);
     } finally {
+        objectivesStream = null;
         hideLoadingOverlay();
         const spinner = btn.querySelector('.btn-spinner');
         const btnText = btn.querySelector('.btn-text');
@@ -130,6 +158,28 @@ async function processObjectives() {
     }
 }
 
+// Lire une réponse NDJSON ligne par ligne et appeler onItem pour chaque objet
+async function readNDJSON(response, onItem) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let newline;
+        while ((newline = buffer.indexOf('\n')) !== -1) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (line) onItem(JSON.parse(line));
+        }
+    }
+    if (buffer.trim()) {
+        onItem(JSON.parse(buffer));
+    }
+}
+
 // Afficher les objectifs SMART transformés - Chaque objectif traité individuellement
 function displaySMARTObjectives() {
     const container = document.getElementById('smart-results');
@@ -139,8 +189,9 @@ function displaySMARTObjectives() {
         return;
     }
     
+    const pending = Math.max(0, expectedObjectivesCount - allObjectives.length);
     let html = `<div class="objectives-summary">
-        <p class="summary-text"><strong>${allObjectives.length}</strong> objectif(s) traité(s) individuellement par l'IA</p>
+        <p class="summary-text"><strong>${allObjectives.length}</strong> objectif(s) traité(s) individuellement par l'IA${pending > 0 ? ` - ${pending} en cours...` : ''}</p>
     </div>`;
     
     // Afficher chaque objectif avec un traitement spécifique et une séparation claire
@@ -250,7 +301,7 @@ async function processIKIGAI() {
     showLoadingOverlay('Analyse de votre IKIGAI', 'L\'IA révèle votre raison d\'être...');
     
     try {
-        const response = await fetch('/api/analyze-ikigai', {
+        const response = await fetch('/api/analyze-ikigai/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -265,8 +316,34 @@ async function processIKIGAI() {
             throw new Error('Erreur lors de l\'analyse IKIGAI');
         }
         
-        const result = await response.json();
-        ikigaiData.analysis = result.analysis;
+        if (response.body && response.body.getReader) {
+            // Affichage progressif : l'analyse s'écrit au fur et à mesure que l'IA la génère
+            ikigaiData.analysis = '';
+            let renderPending = false;
+            await readServerSentEvents(response, (eventName, data) => {
+                if (eventName === 'token') {
+                    if (!ikigaiData.analysis) {
+                        hideLoadingOverlay();
+                        showStep('results');
+                    }
+                    ikigaiData.analysis += data.text;
+                    if (!renderPending) {
+                        renderPending = true;
+                        requestAnimationFrame(() => {
+                            renderPending = false;
+                            displayIKIGAI();
+                        });
+                    }
+                } else if (eventName === 'done') {
+                    // Texte complet assemblé par le serveur (utilisé pour le PDF)
+                    ikigaiData.analysis = data.analysis;
+                }
+            });
+        } else {
+            // Navigateur sans flux lisibles : réponse complète en une fois
+            const result = await fetchIKIGAIAnalysis();
+            ikigaiData.analysis = result.analysis;
+        }
         
         // Afficher l'IKIGAI
         displayIKIGAI();
@@ -287,6 +364,62 @@ async function processIKIGAI() {
     }
 }
 
+// Analyse IKIGAI sans streaming (réponse JSON complète)
+async function fetchIKIGAIAnalysis() {
+    const response = await fetch('/api/analyze-ikigai', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Cache-Control': 'no-cache, no-store, must-revalidate',
+            'Pragma': 'no-cache'
+        },
+        body: JSON.stringify(ikigaiData),
+        cache: 'no-store'
+    });
+    
+    if (!response.ok) {
+        throw new Error('Erreur lors de l\'analyse IKIGAI');
+    }
+    
+    return response.json();
+}
+
+// Lire une réponse Server-Sent Events (POST) et appeler onEvent(nom, données) pour chaque événement
+async function readServerSentEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    const dispatch = (block) => {
+        let eventName = 'message';
+        const dataLines = [];
+        block.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                eventName = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trim());
+            }
+        });
+        if (dataLines.length > 0) {
+            onEvent(eventName, JSON.parse(dataLines.join('\n')));
+        }
+    };
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let separator;
+        while ((separator = buffer.indexOf('\n\n')) !== -1) {
+            dispatch(buffer.slice(0, separator));
+            buffer = buffer.slice(separator + 2);
+        }
+    }
+    if (buffer.trim()) {
+        dispatch(buffer);
+    }
+}
+
 // Afficher l'IKIGAI
 function displayIKIGAI() {
     const container = document.getElementById('ikigai-content');
@@ -339,6 +472,11 @@ async function generatePDF() {
         return;
     }
     
+    // Attendre les derniers objectifs encore en cours de traitement
+    if (objectivesStream) {
+        await objectivesStream.catch(() => {});
+    }
+    
     const pdfBtn = document.getElementById('generate-pdf-btn');
     
     if (!pdfBtn) {
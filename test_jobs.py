@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Script de test des tâches en arrière-plan (jobs.py) : détection des tâches abandonnées
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from jobs import STATUS_DONE, STATUS_FAILED, STATUS_QUEUED, STATUS_RUNNING, JobRunner, JobStore
+
+
+def new_store(stale_after):
+    directory = tempfile.mkdtemp()
+    return JobStore(os.path.join(directory, 'jobs.sqlite3'), stale_after=stale_after)
+
+
+def test_running_job_without_progress_is_failed():
+    """Tâche démarrée puis plus de signe de vie (worker recyclé) : en échec"""
+    store = new_store(stale_after=0.2)
+    job_id = store.create(3)
+    store.set_status(job_id, STATUS_RUNNING)
+    assert store.get(job_id)['status'] == STATUS_RUNNING
+    time.sleep(0.3)
+    job = store.get(job_id)
+    assert job['status'] == STATUS_FAILED
+    assert job['error']
+
+
+def test_queued_job_never_started_is_failed():
+    """Tâche créée mais jamais démarrée (processus suspendu après la réponse) : en échec"""
+    store = new_store(stale_after=0.2)
+    job_id = store.create(3)
+    assert store.get(job_id)['status'] == STATUS_QUEUED
+    time.sleep(0.3)
+    job = store.get(job_id)
+    assert job['status'] == STATUS_FAILED
+    assert job['error']
+
+
+def test_heartbeat_keeps_queued_and_running_jobs_alive():
+    """Tâches d'un runner actif : ni la tâche en cours ni celle en attente ne passent en échec"""
+    store = new_store(stale_after=0.3)
+    runner = JobRunner(store, max_workers=1, heartbeat=0.05)
+    release = threading.Event()
+
+    def run(emit):
+        release.wait(5)
+        emit(0, {'ok': True})
+
+    first = runner.submit(1, run)
+    second = runner.submit(1, run)  # Attend la fin de la première (un seul thread)
+    time.sleep(0.8)
+    assert store.get(first)['status'] == STATUS_RUNNING
+    assert store.get(second)['status'] == STATUS_QUEUED
+    release.set()
+    time.sleep(0.3)
+    assert store.get(first)['status'] == STATUS_DONE
+    assert store.get(second)['status'] == STATUS_DONE
+
+
+if __name__ == '__main__':
+    for test in (test_running_job_without_progress_is_failed, test_queued_job_never_started_is_failed,
+                 test_heartbeat_keeps_queued_and_running_jobs_alive):
+        test()
+        print(f"{test.__name__} : OK")
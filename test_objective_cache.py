@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Script de test de la normalisation des objectifs (objective_cache.py) : retrait de l'année de référence
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(__file__))
+
+from objective_cache import normalize_objective
+import similarity_index
+
+
+def test_reference_year_is_removed_as_a_date():
+    assert normalize_objective("Perdre du poids en 2026 !", 2026) == "perdre du poids"
+    assert normalize_objective("Courir un semi-marathon d'ici fin 2026", 2026) == "courir un semi marathon"
+    assert normalize_objective("Lancer mon blog 2026", 2026) == "lancer mon blog"
+    assert normalize_objective("Courir un marathon en 2027", 2026) == "courir un marathon en 2027"
+
+
+def test_reference_year_is_kept_as_a_quantity():
+    """« Économiser 2026 euros » n'est pas « Économiser euros »"""
+    assert normalize_objective("Économiser 2026 euros", 2026) == "economiser 2026 euros"
+    assert normalize_objective("Économiser 2026 euros", 2026) != normalize_objective("Économiser euros", 2026)
+    assert normalize_objective("Marcher 2026 km en 2026", 2026) == "marcher 2026 km"
+
+
+def test_similarity_index_sees_the_quantity():
+    if not similarity_index.available():
+        return
+    index = similarity_index.SimilarityIndex(reference_year=2026)
+    index.add("Économiser euros", {'goal': "Économiser euros"})
+    assert index.best("Économiser 2026 euros", 0.5) is None
+
+
+if __name__ == '__main__':
+    for test in (test_reference_year_is_removed_as_a_date, test_reference_year_is_kept_as_a_quantity,
+                 test_similarity_index_sees_the_quantity):
+        test()
+        print(f"{test.__name__} : OK")
@@ -0,0 +1,119 @@
+"""
+Consommation de tokens et max_tokens adaptatif
+
+Le bloc `usage` de chaque réponse Mistral est comptabilisé par type d'appel
+(objectif SMART, analyse IKIGAI...). La fenêtre des longueurs de réponse
+observées sert à fixer, pour chaque type, un plafond max_tokens égal à un
+percentile élevé multiplié par une marge : la génération est bornée au plus
+près du besoin réel (latence de queue plus faible) sans jamais dépasser le
+plafond configuré. Une réponse coupée (finish_reason == "length") est
+comptée à part pour pouvoir être refaite avec le plafond complet.
+"""
+
+import math
+import threading
+from collections import deque
+
+FINISH_LENGTH = 'length'
+
+
+class CallTypeUsage:
+    """Compteurs et fenêtre glissante des tokens générés pour un type d'appel"""
+
+    def __init__(self, window=200):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+        self.truncated = 0
+        self.truncation_retries = 0
+        self.completions = deque(maxlen=window)
+
+    def percentile(self, percent):
+        samples = sorted(self.completions)
+        if not samples:
+            return None
+        rank = min(len(samples) - 1, max(0, int(math.ceil(percent / 100.0 * len(samples))) - 1))
+        return samples[rank]
+
+
+class TokenBudget:
+    """Consommation par type d'appel et plafond max_tokens déduit de l'historique"""
+
+    def __init__(self, percentile=95, headroom=1.25, min_tokens=300, min_samples=20, adaptive=True):
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_tokens = min_tokens
+        self.min_samples = min_samples
+        self.adaptive = adaptive
+        self._lock = threading.Lock()
+        self._usage = {}
+        self._ceilings = {}  # Dernier plafond demandé par type d'appel (rapporté par stats)
+
+    def _for(self, call_type):
+        usage = self._usage.get(call_type)
+        if usage is None:
+            usage = self._usage[call_type] = CallTypeUsage()
+        return usage
+
+    def max_tokens_for(self, call_type, ceiling):
+        """max_tokens à envoyer : percentile observé x marge, borné par [min_tokens, ceiling]"""
+        if call_type is None:
+            return ceiling
+        with self._lock:
+            self._ceilings[call_type] = ceiling
+            return self._budget(call_type, ceiling)
+
+    def _budget(self, call_type, ceiling):
+        if not self.adaptive:
+            return ceiling
+        usage = self._usage.get(call_type)
+        if usage is None or len(usage.completions) < self.min_samples:
+            return ceiling
+        observed = usage.percentile(self.percentile)
+        return max(min(self.min_tokens, ceiling), min(ceiling, int(math.ceil(observed * self.headroom))))
+
+    def record(self, call_type, usage, finish_reason=None):
+        """Enregistre le bloc usage d'une réponse (dict prompt_tokens / completion_tokens / total_tokens)"""
+        usage = usage or {}
+        prompt_tokens = int(usage.get('prompt_tokens') or 0)
+        completion_tokens = int(usage.get('completion_tokens') or 0)
+        total_tokens = int(usage.get('total_tokens') or prompt_tokens + completion_tokens)
+        with self._lock:
+            stats = self._for(call_type or 'other')
+            stats.calls += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.total_tokens += total_tokens
+            if completion_tokens:
+                stats.completions.append(completion_tokens)
+            if finish_reason == FINISH_LENGTH:
+                stats.truncated += 1
+
+    def record_retry(self, call_type):
+        with self._lock:
+            self._for(call_type or 'other').truncation_retries += 1
+
+    def stats(self, ceilings=None):
+        """Consommation par type d'appel, avec le max_tokens actuel de chaque type enregistré
+
+        ceilings {type: plafond} : remplace le dernier plafond demandé pour ces types.
+        """
+        with self._lock:
+            snapshot = {
+                call_type: {
+                    'calls': usage.calls,
+                    'prompt_tokens': usage.prompt_tokens,
+                    'completion_tokens': usage.completion_tokens,
+                    'total_tokens': usage.total_tokens,
+                    'avg_completion_tokens': round(usage.completion_tokens / usage.calls, 1) if usage.calls else 0.0,
+                    f'p{self.percentile:g}_completion_tokens': usage.percentile(self.percentile),
+                    'truncated': usage.truncated,
+                    'truncation_retries': usage.truncation_retries,
+                }
+                for call_type, usage in self._usage.items()
+            }
+            for call_type, ceiling in dict(self._ceilings, **(ceilings or {})).items():
+                if call_type in snapshot:
+                    snapshot[call_type]['max_tokens'] = self._budget(call_type, ceiling)
+        return snapshot